@@ -7,21 +7,31 @@ from agents.models import (
     GetAgentResponse,
     AgentConfigurations,
     AgentConfiguration,
+    Message,
 )
 from agents.exceptions import AgentServiceException
+from chats.history_cache import ChatHistoryCache
+from http_client import create_session, decode_response, rename_id
 import requests
 from pydantic import ValidationError
-from typing import List
+from typing import List, Optional
 
 
 class AgentService:
-    def __init__(self, configs: ConfigModel):
+    def __init__(
+        self,
+        configs: ConfigModel,
+        history_cache: Optional[ChatHistoryCache] = None,
+        session: Optional[requests.Session] = None,
+    ):
         self.configs = configs
         self.endpoints = ServiceEndpoints()
+        self.history_cache = history_cache
+        self.session = session or create_session()
 
     def get_agent_types(self) -> GetAllAgentsResponse:
         url = f"{self.configs.base_url}/{self.endpoints.GET_AGENT_TYPES}"
-        response = requests.get(
+        response = self.session.get(
             url=url, headers={"Authorization": f"Bearer {self.configs.auth_token}"}
         )
         if response.status_code == 401:
@@ -36,13 +46,17 @@ class AgentService:
                 message="Failed to get agent types",
                 response_data=response.json(),
             )
-        return GetAllAgentsResponse(response=response.json())
+        return decode_response(
+            response,
+            GetAllAgentsResponse,
+            prepare=lambda agents: {"response": agents},
+        )
 
     def get_agent_response(
         self, get_agent_request_body: GetAgentRequest
     ) -> List[GetAgentResponse]:
         url = f"{self.configs.base_url}/{self.endpoints.GET_AGENT_RESPONSE}"
-        response = requests.post(
+        response = self.session.post(
             url=url,
             json=get_agent_request_body.model_dump(),
             headers={"Authorization": f"Bearer {self.configs.auth_token}"},
@@ -89,11 +103,20 @@ class AgentService:
                 decoded_line = line.decode("utf-8")
                 event = parse_sse_event(decoded_line)
                 resp.append(event)
+        if self.history_cache is not None:
+            self.history_cache.mark_stale(get_agent_request_body.chat_id)
         return resp
 
-    def get_chat_history(self, chat_id: str) -> ChatHistoryResponse:
+    def get_chat_history(
+        self, chat_id: str, refresh: bool = False
+    ) -> ChatHistoryResponse:
+        if self.history_cache is not None and not refresh:
+            cached_messages = self.history_cache.get(chat_id)
+            if cached_messages is not None:
+                return ChatHistoryResponse(messages=cached_messages)
+
         url = f"{self.configs.base_url}/{self.endpoints.GET_CHAT_HISTORY.format(CHAT_ID=chat_id)}"
-        response = requests.get(
+        response = self.session.get(
             url=url,
             headers={"Authorization": f"Bearer {self.configs.auth_token}"},
         )
@@ -109,11 +132,16 @@ class AgentService:
                 message="Failed to get chat history",
                 response_data=response.json(),
             )
-        return ChatHistoryResponse(**response.json())
+        if self.history_cache is None:
+            return decode_response(response, ChatHistoryResponse)
+        messages = self.history_cache.merge(
+            chat_id, response.json()["messages"], Message
+        )
+        return ChatHistoryResponse(messages=messages)
 
     def delete_chat_history(self, chat_id: str) -> str:
         url = f"{self.configs.base_url}/{self.endpoints.DELETE_CHAT_HISTORY}"
-        response = requests.delete(
+        response = self.session.delete(
             url=url,
             json={"chat_id": chat_id},
             headers={"Authorization": f"Bearer {self.configs.auth_token}"},
@@ -136,13 +164,22 @@ class AgentService:
                 message="Failed to get chat history",
                 response_data=response.json(),
             )
+        if self.history_cache is not None:
+            self.history_cache.invalidate(chat_id)
         return "Success"
 
 
 class AgentOperations:
-    def __init__(self, configs: ConfigModel):
+    def __init__(
+        self,
+        configs: ConfigModel,
+        history_cache: Optional[ChatHistoryCache] = None,
+        session: Optional[requests.Session] = None,
+    ):
         self.configs = configs
         self.endpoints = ServiceEndpoints()
+        self.history_cache = history_cache
+        self.session = session or create_session()
 
     def get_all_agents(self) -> AgentConfigurations:
         """Fetches all available agent types.
@@ -159,7 +196,7 @@ class AgentOperations:
         """
         url = f"{self.configs.base_url}/{self.endpoints.GET_AGENT_CONFIGURATIONS}"
         print(url)
-        response = requests.get(
+        response = self.session.get(
             url=url,
             headers={"Authorization": f"Bearer {self.configs.auth_token}"},
         )
@@ -217,7 +254,7 @@ class AgentOperations:
         get_agent_request_body = GetAgentRequest(
             user_input=user_input, chat_id=chat_id, stream=stream, agent_id=agent_id
         )
-        response = requests.post(
+        response = self.session.post(
             url=url,
             json=get_agent_request_body.model_dump(),
             headers={"Authorization": f"Bearer {self.configs.auth_token}"},
@@ -264,6 +301,8 @@ class AgentOperations:
                 decoded_line = line.decode("utf-8")
                 event = parse_sse_event(decoded_line)
                 resp.append(event)
+        if self.history_cache is not None:
+            self.history_cache.mark_stale(chat_id)
         return resp
 
     def get_agent(self, agent_id: str) -> AgentConfiguration:
@@ -291,7 +330,7 @@ class AgentOperations:
 
         url = f"{self.configs.base_url}/{self.endpoints.GET_AGENT.format(AGENT_ID=agent_id)}"
         print(url)
-        response = requests.get(
+        response = self.session.get(
             url=url,
             headers={"Authorization": f"Bearer {self.configs.auth_token}"},
         )
@@ -313,6 +352,6 @@ class AgentOperations:
                 message="Failed to get agent history",
                 response_data=response.json(),
             )
-        response_json = response.json()[0]
-        response_json["id"] = response_json.pop("_id")
-        return AgentConfiguration.model_validate(response_json)
+        return decode_response(
+            response, AgentConfiguration, prepare=lambda agents: rename_id(agents[0])
+        )
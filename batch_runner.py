@@ -0,0 +1,158 @@
+import json
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from config_models import ServiceType
+from journal import DONE, JobJournal
+from operations import OPERATIONS, ServiceCache, error_payload, run_operation
+
+DEFAULT_CONCURRENCY = 8
+
+
+class BatchRunner:
+    """Runs many operations concurrently with a concurrency limit per service.
+
+    Each operation is a dict such as
+    `{"op": "run_workflow", "workflow_name": ..., "doc_id": ...}`; every key
+    other than `op` and `id` is passed as a parameter. Each service type gets
+    its own worker pool, so a slow service cannot starve the others. At most
+    twice the total worker count is queued at once, which keeps memory flat
+    for inputs with millions of lines.
+
+    With a `journal`, each operation's outcome is recorded under its `id`, or
+    its position in the input when it has none. Operations that are done
+    according to the journal are skipped, so a rerun after a crash only runs
+    what is left.
+    """
+
+    def __init__(
+        self,
+        services: ServiceCache,
+        concurrency: Optional[Dict[ServiceType, int]] = None,
+        default_concurrency: int = DEFAULT_CONCURRENCY,
+        journal: Optional[JobJournal] = None,
+    ):
+        self.services = services
+        self.journal = journal
+        limits = {service_type: default_concurrency for service_type in ServiceType}
+        limits.update(concurrency or {})
+        self._executors = {
+            service_type: ThreadPoolExecutor(
+                max_workers=limit, thread_name_prefix=f"batch-{service_type.value}"
+            )
+            for service_type, limit in limits.items()
+        }
+        self.max_in_flight = 2 * sum(limits.values())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self) -> None:
+        for executor in self._executors.values():
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _run_one(self, index: int, operation: Dict[str, Any]) -> Dict[str, Any]:
+        params = {k: v for k, v in operation.items() if k not in ("op", "id")}
+        record = {"index": index, "op": operation.get("op")}
+        if "id" in operation:
+            record["id"] = operation["id"]
+        try:
+            record["result"] = run_operation(self.services, operation["op"], params)
+            record["ok"] = True
+        except Exception as e:
+            record["error"] = error_payload(e)
+            record["ok"] = False
+        if self.journal is not None:
+            key = str(operation.get("id", index))
+            if record["ok"]:
+                self.journal.done(key)
+            else:
+                self.journal.failed(key, record["error"]["message"])
+        return record
+
+    def _submit(self, index: int, operation: Dict[str, Any]) -> Future:
+        op = operation.get("op")
+        if "invalid_json" in operation or op not in OPERATIONS:
+            if "invalid_json" in operation:
+                message = f"Invalid JSON: {operation['json_error']}"
+            else:
+                message = f"Unknown operation: {op}" if op else "Missing op"
+            future = Future()
+            future.set_result(
+                {
+                    "index": index,
+                    "op": op,
+                    "ok": False,
+                    "error": {"type": "ValueError", "message": message},
+                }
+            )
+            return future
+        (service_type, _, _), _ = OPERATIONS[op]
+        return self._executors[service_type].submit(
+            self._run_one, index, operation
+        )
+
+    def run(
+        self, operations: Iterable[Dict[str, Any]], ordered: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        """Yields one result record per operation.
+
+        Records carry the operation's position in the input as `index`. With
+        `ordered=True` records come back in input order; otherwise they are
+        yielded as soon as each operation finishes. Operations skipped because
+        of the journal yield no record.
+        """
+        states = self.journal.states() if self.journal is not None else {}
+        pending = deque() if ordered else set()
+        for index, operation in enumerate(operations):
+            if states.get(str(operation.get("id", index))) == DONE:
+                continue
+            future = self._submit(index, operation)
+            if ordered:
+                pending.append(future)
+                while len(pending) >= self.max_in_flight or (
+                    pending and pending[0].done()
+                ):
+                    yield pending.popleft().result()
+            else:
+                pending.add(future)
+                if len(pending) >= self.max_in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for finished in done:
+                        yield finished.result()
+        if ordered:
+            while pending:
+                yield pending.popleft().result()
+        else:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for finished in done:
+                    yield finished.result()
+
+
+def read_operations(path: str) -> Iterator[Dict[str, Any]]:
+    """Reads a JSONL file of operations, skipping blank lines.
+
+    Malformed lines, and lines holding something other than a JSON object,
+    are passed on as `{"invalid_json": line, "json_error": message}`, so they
+    show up as failed records in the results instead of aborting the batch.
+    """
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                operation = json.loads(line)
+            except json.JSONDecodeError as error:
+                yield {"invalid_json": line, "json_error": str(error)}
+                continue
+            if isinstance(operation, dict):
+                yield operation
+            else:
+                message = f"expected an object, got {type(operation).__name__}"
+                yield {"invalid_json": line, "json_error": message}
@@ -0,0 +1,80 @@
+# python3 benchmarks/import_time.py --runs 10
+
+import sys
+import os
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+MODULES = [
+    "config_models",
+    "documents.service",
+    "workflows.service",
+    "chats.service",
+    "agents.service",
+]
+
+HEAVY_DEPENDENCIES = ["pandas", "numpy", "pyarrow"]
+
+
+def time_import(module: str) -> float:
+    """Seconds spent importing `module` in a fresh interpreter."""
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"import {module}; print(time.perf_counter() - start)"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def loaded_heavy_dependencies(module: str) -> list:
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {HEAVY_DEPENDENCIES!r} if m in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+    return [name for name in output.split(",") if name]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure import time of service modules.")
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=5,
+        required=False,
+        help="Fresh interpreters started per module",
+    )
+    parser.add_argument(
+        "--modules",
+        nargs="+",
+        default=MODULES,
+        required=False,
+        help="Modules to import",
+    )
+    args = parser.parse_args()
+
+    print(f"{'module':<24}{'median ms':>12}{'min ms':>10}  heavy dependencies")
+    for module in args.modules:
+        samples = [time_import(module) * 1000 for _ in range(args.runs)]
+        heavy = ", ".join(loaded_heavy_dependencies(module)) or "-"
+        print(
+            f"{module:<24}{statistics.median(samples):>12.1f}{min(samples):>10.1f}  {heavy}"
+        )
+    print(
+        "Run `python -X importtime -c 'import <module>'` for a per-module breakdown."
+    )
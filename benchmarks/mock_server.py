@@ -0,0 +1,863 @@
+# python3 benchmarks/mock_server.py --port 8080 --latency 0.02 --error_rate 0.01
+
+import sys
+import os
+import argparse
+import csv
+import gzip
+import io
+import json
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from config_models import BOOL_CHOICES, ServiceEndpoints, get_bool_value
+
+TIMESTAMP = "2024-10-01T12:00:00"
+WORDS = (
+    "invoice total amount due date account number customer address payment "
+    "terms balance policy claim contract signature agreement tax period"
+).split()
+
+
+class MockSettings:
+    """Behaviour of a `MockWeavServer`.
+
+    - latency / jitter: seconds added to every response, uniformly in
+      `[latency, latency + jitter]`.
+    - error_rate / error_status: fraction of requests answered with
+      `error_status` instead of a payload.
+    - pages_per_document, words_per_page, entities_per_page: size of document
+      and page payloads.
+    - form_instances: total number of form instances returned by paginated
+      `forms/instances/` calls.
+    - sse_events / sse_interval: number of agent stream events and the delay
+      between them.
+    - polls_until_done: status polls before a workflow run reports success.
+    - image_bytes: size of page images served at the page `download_url`.
+    - bandwidth: bytes per second of the simulated link; request and response
+      bodies take `size / bandwidth` seconds to transfer. None is unlimited.
+    - compress_responses: gzip response bodies of at least 1 KiB for clients
+      that accept it. Gzip request bodies are always accepted.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        pages_per_document: int = 5,
+        words_per_page: int = 300,
+        entities_per_page: int = 10,
+        form_instances: int = 500,
+        sse_events: int = 20,
+        sse_interval: float = 0.0,
+        polls_until_done: int = 3,
+        image_bytes: int = 200_000,
+        bandwidth: Optional[float] = None,
+        compress_responses: bool = False,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.pages_per_document = pages_per_document
+        self.words_per_page = words_per_page
+        self.entities_per_page = entities_per_page
+        self.form_instances = form_instances
+        self.sse_events = sse_events
+        self.sse_interval = sse_interval
+        self.polls_until_done = polls_until_done
+        self.image_bytes = image_bytes
+        self.bandwidth = bandwidth
+        self.compress_responses = compress_responses
+
+
+def _object_id(*parts: Any) -> str:
+    return ("%024x" % (hash(parts) & ((1 << 96) - 1)))[-24:]
+
+
+class _Route:
+    def __init__(self, method: str, template: str, handler: Callable):
+        self.method = method
+        self.template = template.split("?")[0].strip("/")
+        regex = re.sub(r"\\\{([A-Z_]+)\\\}", r"(?P<\1>[^/]+)", re.escape(self.template))
+        self.pattern = re.compile(f"(?:^|/){regex}/?$")
+        self.handler = handler
+        self.literal_length = len(re.sub(r"\{[A-Z_]+\}", "", self.template))
+
+
+class _Response:
+    def __init__(
+        self,
+        status: int = 200,
+        payload: Any = None,
+        body: Optional[bytes] = None,
+        content_type: str = "application/json",
+        events: Optional[List[str]] = None,
+    ):
+        self.status = status
+        self.payload = payload
+        self.body = body
+        self.content_type = content_type
+        self.events = events
+
+
+class MockWeavServer(ThreadingHTTPServer):
+    """In-process stand-in for the Weav API, for benchmarks and experiments.
+
+    Serves every path in `ServiceEndpoints` for any service prefix (the base
+    URL of every `ServiceType` can point at the same server) and collapses
+    repeated slashes the way the real gateway does. Payloads are generated
+    to satisfy the client models; sizes, latency and failures come from
+    `MockSettings`.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int] = ("127.0.0.1", 0),
+        settings: Optional[MockSettings] = None,
+    ):
+        super().__init__(address, _Handler)
+        self.settings = settings or MockSettings()
+        self.requests_served = 0
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        self._runs: Dict[str, int] = {}
+        self._payload_cache: "OrderedDict[Tuple, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._random = random.Random()
+        self.routes = self._build_routes()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockWeavServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "MockWeavServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _build_routes(self) -> List[_Route]:
+        e = ServiceEndpoints()
+        routes = [
+            _Route("GET", e.GET_ALL_WORKFLOWS, self._all_workflows),
+            _Route("GET", e.GET_SINGLE_WORKFLOW, self._workflow),
+            _Route("POST", e.SKIP_TASK_IN_WORKFLOW, self._workflow),
+            _Route("POST", e.RERUN_WORKFLOW, self._run_workflow),
+            _Route("POST", e.RUN_WORKFLOW, self._run_workflow),
+            _Route("GET", e.WORKFLOW_STATUS, self._workflow_status),
+            _Route("GET", e.WORKFLOW_RUNS, self._workflow_runs),
+            _Route("GET", e.GET_AGENT_TYPES, self._agent_types),
+            _Route("POST", e.GET_AGENT_RESPONSE, self._agent_stream),
+            _Route("GET", e.GET_CHAT_HISTORY, self._chat_history),
+            _Route("DELETE", e.DELETE_CHAT_HISTORY, self._ok),
+            _Route("POST", e.CREATE_FORM, self._form),
+            _Route("GET", e.FILTER_FORM, self._forms),
+            _Route("POST", e.EXECUTE_FORM_ANALYTICS, self._form_analytics),
+            _Route("GET", e.FILTER_FORM_INSTANCES, self._form_instances),
+            _Route("GET", e.GET_FORM_DEFINITON, self._form),
+            _Route("PUT", e.UPDATE_FORM_DEFINITON, self._form),
+            _Route("DELETE", e.DELETE_FORM_DEFINITON, self._form),
+            _Route("POST", e.DOWNLOAD_QUERY_RESULT, self._query_result),
+            _Route("POST", e.CREATE_DOCUMENT, self._create_document),
+            _Route("GET", e.GET_PAGE, self._page),
+            _Route("GET", e.GET_PAGE_TEXT_AND_WORDS, self._page_words),
+            _Route("GET", e.GET_PAGE_LEVEL_STATUS, self._page_level_status),
+            _Route("GET", e.GET_DOCUMENT_SUMMARY_STATUS, self._summary),
+            _Route("POST", e.TRIGGER_DOCUMENT_SUMMARY, self._summary),
+            _Route("GET", e.GET_DOCUMENT, self._document),
+            _Route("GET", e.GET_DOCUMENT_HIERARCHY, self._hierarchy),
+            _Route("GET", e.DOWNLOAD_FORM_INSTANCE, self._form_instance_download),
+            _Route("GET", e.GET_DOCUMENT_CATEGORIES, self._categories),
+            _Route("GET", e.GET_DOCUMENT_TAGS, self._tags),
+            _Route("PATCH", e.UPDATE_DOCUMENT_TAGS, self._update_tags),
+            _Route("GET", e.CHAT_LOGS, self._chat_logs),
+            _Route("GET", e.CHAT_HISTORY, self._chat_history),
+            _Route("POST", e.CHAT, self._chat),
+            _Route("POST", e.CREATE_FOLDER, self._folder),
+            _Route("GET", e.GET_WRITABLE_FOLDERS, self._writable_folders),
+            _Route("GET", e.GET_FOLDER_DEFINITION, self._folder),
+            _Route("GET", e.GET_AGENT_CONFIGURATIONS, self._agent_configurations),
+            _Route("GET", "images/{DOC_ID}/{PAGE_NUMBER}", self._image),
+        ]
+        # Literal paths win over templated ones, e.g. documents/categories
+        # over documents/{DOC_ID}.
+        return sorted(routes, key=lambda route: -route.literal_length)
+
+    def match(self, method: str, path: str) -> Tuple[Optional[_Route], Dict[str, str]]:
+        path = re.sub(r"/{2,}", "/", path)
+        for route in self.routes:
+            if route.method != method:
+                continue
+            match = route.pattern.search(path)
+            if match:
+                return route, match.groupdict()
+        return None, {}
+
+    def delay(self) -> None:
+        settings = self.settings
+        seconds = settings.latency + self._random.random() * settings.jitter
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def transfer(self, size: int, sent: bool) -> None:
+        """Counts `size` body bytes and waits for them to cross the link."""
+        with self._lock:
+            if sent:
+                self.bytes_sent += size
+            else:
+                self.bytes_received += size
+        if self.settings.bandwidth:
+            time.sleep(size / self.settings.bandwidth)
+
+    def should_fail(self) -> bool:
+        return self._random.random() < self.settings.error_rate
+
+    def cached_payload(self, key: Tuple, build: Callable[[], Any]) -> bytes:
+        """JSON body for `key`, generated once and kept in a small LRU."""
+        with self._lock:
+            body = self._payload_cache.get(key)
+            if body is not None:
+                self._payload_cache.move_to_end(key)
+                return body
+        body = json.dumps(build()).encode()
+        with self._lock:
+            self._payload_cache[key] = body
+            while len(self._payload_cache) > 256:
+                self._payload_cache.popitem(last=False)
+        return body
+
+    # Payload builders -----------------------------------------------------
+
+    def _workflow_payload(self, name: str) -> Dict[str, Any]:
+        tasks = ["ocr", "classification", "extraction", "summary"]
+        return {
+            "name": name,
+            "tasks": [
+                {
+                    "name": task,
+                    "is_active": True,
+                    "downstream_tasks": tasks[index + 1 : index + 2],
+                }
+                for index, task in enumerate(tasks)
+            ],
+            "params": [],
+        }
+
+    def _run_payload(self, workflow_id: str, run_id: str, doc_id: str) -> Dict:
+        return {
+            "run_id": run_id,
+            "workflow_id": workflow_id,
+            "document_id": doc_id,
+            "document_name": f"{doc_id}.pdf",
+            "in_folders": [],
+            "state": "queued",
+            "start_date": TIMESTAMP,
+            "end_date": "",
+            "created_at": TIMESTAMP,
+        }
+
+    def _document_payload(self, doc_id: str) -> Dict[str, Any]:
+        return {
+            "_id": doc_id,
+            "media_type": "application/pdf",
+            "download_url": f"{self.url}/images/{doc_id}/0",
+            "pages": [
+                {
+                    "page_number": page,
+                    "media_type": "image/png",
+                    "download_url": f"{self.url}/images/{doc_id}/{page}",
+                    "status": "DONE",
+                    "classification": {"page_class": "invoice"},
+                }
+                for page in range(1, self.settings.pages_per_document + 1)
+            ],
+            "status": "DONE",
+            "file_name": f"{doc_id}.pdf",
+            "created_at": TIMESTAMP,
+            "size": self.settings.image_bytes * self.settings.pages_per_document,
+            "source": "upload",
+            "tags": [],
+            "ai_tags": [],
+            "user_id": "user",
+            "tenant_id": "tenant",
+        }
+
+    def _entities_payload(self, doc_id: str, page: int) -> List[Dict[str, Any]]:
+        return [
+            {
+                "entity_group": "fields",
+                "entities": [
+                    {
+                        "polygon": [
+                            10.0 * i,
+                            20.0,
+                            10.0 * i + 8,
+                            20.0,
+                            10.0 * i + 8,
+                            30.0,
+                        ],
+                        "key": WORDS[i % len(WORDS)],
+                        "value": f"{doc_id}-{page}-{i}",
+                        "label": "PII" if i % 4 == 0 else "TEXT",
+                        "is_sensitive": i % 4 == 0,
+                    }
+                    for i in range(self.settings.entities_per_page)
+                ],
+            }
+        ]
+
+    def _page_text(self, doc_id: str, page: int) -> str:
+        rng = random.Random(f"{doc_id}:{page}")
+        return " ".join(rng.choice(WORDS) for _ in range(self.settings.words_per_page))
+
+    def _page_common(self, doc_id: str, page: int) -> Dict[str, Any]:
+        return {
+            "page_number": page,
+            "media_type": "image/png",
+            "page_text": self._page_text(doc_id, page),
+            "status": "DONE",
+            "classification": {
+                "page_class": "invoice",
+                "page_sections": ["header", "body"],
+                "page_no": page,
+            },
+            "extracted_entities": self._entities_payload(doc_id, page),
+            "redacted_summary": "",
+        }
+
+    def _form_instance(self, index: int) -> Dict[str, Any]:
+        return {
+            "form_instance": {
+                "data": [
+                    {
+                        "name": name,
+                        "value": f"{name}-{index}",
+                        "identifier": name,
+                        "weav_page_number": 1,
+                    }
+                    for name in WORDS[:6]
+                ],
+                "metadata": {"modified_at": TIMESTAMP, "status": "DONE"},
+            },
+            "doc_id": _object_id("doc", index),
+            "form_id": _object_id("form"),
+            "file_name": f"document-{index}.pdf",
+            "status": "DONE",
+            "category": "invoice",
+            "in_folders": [],
+            "owner_id": "user",
+        }
+
+    def _form_definition(self, form_id: str) -> Dict[str, Any]:
+        return {
+            "_id": form_id,
+            "name": "Invoice",
+            "category": "invoice",
+            "description": "",
+            "fields": [
+                {
+                    "name": name,
+                    "field_type": "Text",
+                    "description": "",
+                    "is_array": False,
+                    "fill_by_search": False,
+                }
+                for name in WORDS[:6]
+            ],
+            "is_shared": False,
+            "is_searchable": False,
+            "user_id": "user",
+            "created_at": TIMESTAMP,
+        }
+
+    def _chat_message(self, chat_id: str, index: int) -> Dict[str, Any]:
+        return {
+            "message_id": f"{chat_id}-{index}",
+            "chat_id": chat_id,
+            "text": " ".join(WORDS[: 5 + index % 10]),
+            "timestamp": TIMESTAMP,
+            "type": "user" if index % 2 == 0 else "bot",
+            "vote": "",
+            "search_results": [],
+            "tags": [],
+        }
+
+    # Route handlers ---------------------------------------------------------
+
+    def _ok(self, params, query, body) -> _Response:
+        return _Response(payload={"detail": "ok"})
+
+    def _all_workflows(self, params, query, body) -> _Response:
+        return _Response(payload=[self._workflow_payload("ingest")])
+
+    def _workflow(self, params, query, body) -> _Response:
+        return _Response(payload=self._workflow_payload(params["WORKFLOW_NAME"]))
+
+    def _run_workflow(self, params, query, body) -> _Response:
+        doc_id = (body or {}).get("doc_id", "")
+        workflow_id = params["WORKFLOW_NAME"]
+        run_id = f"run-{doc_id}-{time.monotonic_ns()}"
+        with self._lock:
+            self._runs[run_id] = 0
+        return _Response(payload=self._run_payload(workflow_id, run_id, doc_id))
+
+    def _workflow_status(self, params, query, body) -> _Response:
+        run_id = params["WORKFLOW_RUN_ID"]
+        with self._lock:
+            polls = self._runs.get(run_id, 0) + 1
+            self._runs[run_id] = polls
+        done = polls >= self.settings.polls_until_done
+        tasks = self._workflow_payload(params["WORKFLOW_ID"])["tasks"]
+        finished = (
+            len(tasks) if done else polls * len(tasks) // self.settings.polls_until_done
+        )
+        return _Response(
+            payload={
+                "status": "success" if done else "running",
+                "document_id": run_id.split("-")[1] if "-" in run_id else "",
+                "tasks": [
+                    {
+                        "name": task["name"],
+                        "status": "success" if index < finished else "running",
+                        "task_status_summary": {
+                            "success": int(index < finished),
+                            "running": int(index >= finished),
+                            "queued": 0,
+                            "failed": 0,
+                            "skipped": 0,
+                        },
+                        "start_date": TIMESTAMP,
+                        "end_date": TIMESTAMP if index < finished else None,
+                    }
+                    for index, task in enumerate(tasks)
+                ],
+                "start_date": TIMESTAMP,
+                "end_date": TIMESTAMP if done else None,
+            }
+        )
+
+    def _workflow_runs(self, params, query, body) -> _Response:
+        doc_id = query.get("doc_id", "")
+        skip = int(query.get("skip", 0))
+        limit = int(query.get("limit", 25))
+        total = 60
+        runs = [
+            dict(
+                self._run_payload("ingest", f"run-{doc_id}-{index}", doc_id),
+                state="success",
+                end_date=TIMESTAMP,
+            )
+            for index in range(skip, min(skip + limit, total))
+        ]
+        return _Response(payload={"docs": runs, "total": total})
+
+    def _agent_types(self, params, query, body) -> _Response:
+        return _Response(payload=["search", "analytics"])
+
+    def _agent_stream(self, params, query, body) -> _Response:
+        events = [
+            f"id: {index}\nevent: message\ndata: "
+            + json.dumps({"text": " ".join(WORDS[: 1 + index % 8])})
+            for index in range(self.settings.sse_events)
+        ]
+        return _Response(events=events, content_type="text/event-stream")
+
+    def _chat_history(self, params, query, body) -> _Response:
+        chat_id = query.get("chat_id", "chat")
+        return _Response(
+            payload={"messages": [self._chat_message(chat_id, i) for i in range(20)]}
+        )
+
+    def _chat(self, params, query, body) -> _Response:
+        chat_id = (body or {}).get("chat_id", "chat")
+        message = self._chat_message(chat_id, 1)
+        return _Response(payload=dict(message, search_results=[], generate_button=""))
+
+    def _chat_logs(self, params, query, body) -> _Response:
+        skip = int(query.get("skip", 0))
+        return _Response(
+            payload={
+                "messages": [
+                    {
+                        "id": f"log-{index}",
+                        "timestamp": TIMESTAMP,
+                        "type": "user",
+                        "vote": "",
+                        "chat_id": "chat",
+                        "user_id": "user",
+                        "text": "hello",
+                    }
+                    for index in range(skip, skip + int(query.get("limit", 25)))
+                ],
+                "total_records": 1000,
+                "current_skip": skip,
+            }
+        )
+
+    def _form(self, params, query, body) -> _Response:
+        form_id = params.get("FORM_ID") or _object_id("form")
+        return _Response(payload=self._form_definition(form_id))
+
+    def _forms(self, params, query, body) -> _Response:
+        return _Response(
+            payload=[self._form_definition(_object_id("form", i)) for i in range(5)]
+        )
+
+    def _form_analytics(self, params, query, body) -> _Response:
+        rows = [{name: f"{name}-{i}" for name in WORDS[:6]} for i in range(25)]
+        return _Response(
+            payload={
+                "summary": "",
+                "results": rows,
+                "total_count": len(rows),
+                "columns": WORDS[:6],
+            }
+        )
+
+    def _form_instances(self, params, query, body) -> _Response:
+        total = self.settings.form_instances
+        skip = int(query.get("skip", 0))
+        limit = int(query.get("limit", 25))
+        key = ("form_instances", skip, limit, total)
+        return _Response(
+            body=self.cached_payload(
+                key,
+                lambda: {
+                    "total": total,
+                    "form_instances": [
+                        self._form_instance(index)
+                        for index in range(skip, min(skip + limit, total))
+                    ],
+                },
+            )
+        )
+
+    def _csv(self, rows: List[Dict[str, Any]]) -> _Response:
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+        return _Response(body=output.getvalue().encode(), content_type="text/csv")
+
+    def _query_result(self, params, query, body) -> _Response:
+        rows = [{name: f"{name}-{i}" for name in WORDS[:6]} for i in range(100)]
+        if query.get("download_format") == "CSV":
+            return self._csv(rows)
+        return _Response(payload={"docs": rows})
+
+    def _form_instance_download(self, params, query, body) -> _Response:
+        rows = [
+            {
+                item["name"]: item["value"]
+                for item in self._form_instance(i)["form_instance"]["data"]
+            }
+            for i in range(10)
+        ]
+        if query.get("download_format") == "CSV":
+            return self._csv(rows)
+        return _Response(payload={"form_instances": rows})
+
+    def _create_document(self, params, query, body) -> _Response:
+        doc_id = _object_id("upload", time.monotonic_ns())
+        return _Response(payload=self._document_payload(doc_id))
+
+    def _document(self, params, query, body) -> _Response:
+        return _Response(payload=self._document_payload(params["DOC_ID"]))
+
+    def _update_tags(self, params, query, body) -> _Response:
+        payload = self._document_payload(params["DOC_ID"])
+        payload["tags"] = (body or {}).get("tags_to_add", [])
+        return _Response(payload=payload)
+
+    def _page(self, params, query, body) -> _Response:
+        doc_id, page = params["DOC_ID"], int(params["PAGE_NUMBER"])
+
+        def build() -> Dict[str, Any]:
+            payload = self._page_common(doc_id, page)
+            payload.update(
+                download_url=f"{self.url}/images/{doc_id}/{page}",
+                step_status={},
+                sensitive_words=[],
+                summary="",
+                page_hierarchy=None,
+            )
+            return payload
+
+        return _Response(body=self.cached_payload(("page", doc_id, page), build))
+
+    def _page_words(self, params, query, body) -> _Response:
+        doc_id, page = params["DOC_ID"], int(params["PAGE_NUMBER"])
+
+        def build() -> Dict[str, Any]:
+            payload = self._page_common(doc_id, page)
+            words, offset = [], 0
+            for index, content in enumerate(payload["page_text"].split(" ")):
+                x, y = 12.0 * (index % 40), 18.0 * (index // 40)
+                words.append(
+                    {
+                        "content": content,
+                        "polygon": [
+                            {"x": x, "y": y},
+                            {"x": x + 10, "y": y},
+                            {"x": x + 10, "y": y + 12},
+                            {"x": x, "y": y + 12},
+                        ],
+                        "span": {"offset": offset, "length": len(content)},
+                        "confidence": 0.99,
+                    }
+                )
+                offset += len(content) + 1
+            payload["words"] = words
+            return payload
+
+        return _Response(body=self.cached_payload(("words", doc_id, page), build))
+
+    def _page_level_status(self, params, query, body) -> _Response:
+        done = {"pages_done": self.settings.pages_per_document, "pages_failed": 0}
+        return _Response(
+            payload={
+                "ocr": done,
+                "classification": done,
+                "entity_extraction": done,
+                "vectorization": done,
+            }
+        )
+
+    def _summary(self, params, query, body) -> _Response:
+        return _Response(payload={"summary_status": "DONE", "summary": "Summary."})
+
+    def _hierarchy(self, params, query, body) -> _Response:
+        return _Response(payload={"hierarchy": [{"text": "Header", "type": "title"}]})
+
+    def _categories(self, params, query, body) -> _Response:
+        return _Response(payload={"categories": ["invoice", "contract"]})
+
+    def _tags(self, params, query, body) -> _Response:
+        return _Response(payload={"tags": [["finance", "2024"]]})
+
+    def _folder(self, params, query, body) -> _Response:
+        folder_id = params.get("FOLDER_ID") or _object_id("folder")
+        return _Response(
+            payload={
+                "_id": folder_id,
+                "document_ids": [_object_id("doc", i) for i in range(20)],
+                "name": "Folder",
+                "workflow": {"workflow_id": "ingest"},
+            }
+        )
+
+    def _writable_folders(self, params, query, body) -> _Response:
+        return _Response(
+            payload=[
+                {"name": f"Folder {i}", "id": _object_id("folder", i)} for i in range(3)
+            ]
+        )
+
+    def _agent_configurations(self, params, query, body) -> _Response:
+        agent_id = query.get("agent_id") or _object_id("agent")
+        action = {
+            "name": "search",
+            "description": "",
+            "event_message": "",
+            "input_schema": "{}",
+            "identifier": "search",
+            "type": "search",
+        }
+        return _Response(
+            payload=[
+                {
+                    "_id": agent_id,
+                    "name": "Agent",
+                    "reply_format": "text",
+                    "intents": {"event_message": "", "intents": []},
+                    "actions": [action],
+                    "publish_results_configuration": {"publish_action": action},
+                }
+            ]
+        )
+
+    def _image(self, params, query, body) -> _Response:
+        key = ("image", params["DOC_ID"], params["PAGE_NUMBER"])
+        with self._lock:
+            image = self._payload_cache.get(key)
+        if image is None:
+            seed = f"{params['DOC_ID']}:{params['PAGE_NUMBER']}"
+            image = random.Random(seed).randbytes(self.settings.image_bytes)
+            with self._lock:
+                self._payload_cache[key] = image
+        return _Response(body=image, content_type="image/png")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without TCP_NODELAY, Nagle's
+    # algorithm and delayed ACKs add ~40ms to every keep-alive response.
+    disable_nagle_algorithm = True
+    server: MockWeavServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _read_body(self) -> Any:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        self.server.transfer(len(raw), sent=False)
+        if self.headers.get("Content-Encoding") == "gzip":
+            raw = gzip.decompress(raw)
+        if self.headers.get("Content-Type", "").startswith("application/json"):
+            try:
+                return json.loads(raw or b"null")
+            except ValueError:
+                return None
+        return None
+
+    def _dispatch(self, method: str) -> None:
+        server = self.server
+        body = self._read_body()
+        url = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        with server._lock:
+            server.requests_served += 1
+        server.delay()
+
+        if not self.headers.get("Authorization") and not url.path.startswith(
+            "/images/"
+        ):
+            return self._send(_Response(401, {"detail": "Not authenticated"}))
+        route, params = server.match(method, url.path)
+        if route is None:
+            return self._send(_Response(404, {"detail": "Not Found"}))
+        if server.should_fail():
+            return self._send(
+                _Response(server.settings.error_status, {"detail": "Injected error"})
+            )
+        self._send(route.handler(params, query, body))
+
+    def _send(self, response: _Response) -> None:
+        if response.events is not None:
+            return self._send_events(response)
+        body = response.body
+        if body is None:
+            body = json.dumps(response.payload).encode()
+        compress = (
+            self.server.settings.compress_responses
+            and len(body) >= 1024
+            and "gzip" in self.headers.get("Accept-Encoding", "")
+        )
+        if compress:
+            body = gzip.compress(body, compresslevel=6)
+        self.server.transfer(len(body), sent=True)
+        self.send_response(response.status)
+        self.send_header("Content-Type", response.content_type)
+        if compress:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_events(self, response: _Response) -> None:
+        # No Content-Length: the stream ends when the connection closes.
+        self.send_response(response.status)
+        self.send_header("Content-Type", response.content_type)
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for event in response.events:
+            self.wfile.write(event.encode() + b"\n\n")
+            self.wfile.flush()
+            if self.server.settings.sse_interval:
+                time.sleep(self.server.settings.sse_interval)
+        self.close_connection = True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local mock Weav server.")
+    parser.add_argument("--host", type=str, default="127.0.0.1", required=False)
+    parser.add_argument("--port", type=int, default=8080, required=False)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Seconds added to every response"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.0, help="Extra random latency in seconds"
+    )
+    parser.add_argument(
+        "--error_rate", type=float, default=0.0, help="Fraction of failed requests"
+    )
+    parser.add_argument(
+        "--pages_per_document", type=int, default=5, help="Pages of each document"
+    )
+    parser.add_argument(
+        "--words_per_page", type=int, default=300, help="Words on each page"
+    )
+    parser.add_argument(
+        "--bandwidth",
+        type=float,
+        default=None,
+        required=False,
+        help="Bytes per second of the simulated link",
+    )
+    parser.add_argument(
+        "--compress_responses",
+        type=str,
+        choices=BOOL_CHOICES,
+        default="false",
+        required=False,
+        help="Gzip responses for clients that accept it",
+    )
+
+    args = parser.parse_args()
+
+    settings = MockSettings(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        pages_per_document=args.pages_per_document,
+        words_per_page=args.words_per_page,
+        bandwidth=args.bandwidth,
+        compress_responses=get_bool_value(args.compress_responses),
+    )
+    server = MockWeavServer((args.host, args.port), settings)
+    print(f"Mock Weav server listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
@@ -0,0 +1,294 @@
+# python3 benchmarks/run_benchmarks.py --operations 200 --concurrency 16 --latency 0.01
+
+import sys
+import os
+import argparse
+import json
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.mock_server import MockSettings, MockWeavServer
+from config_models import BOOL_CHOICES, ConfigModel, EnvTypes, get_bool_value
+from http_client import create_session
+from instrumentation import LatencyHistogram
+
+SERVICE_PREFIXES = {
+    "document": "/file-service",
+    "workflows": "/workflow-service",
+    "agent": "/agent-service",
+    "chats": "/chat-service",
+}
+
+
+class ScenarioResult:
+    def __init__(self, name: str):
+        self.name = name
+        self.latency = LatencyHistogram()
+        self.operations = 0
+        self.items = 0
+        self.errors = 0
+        self.elapsed = 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "scenario": self.name,
+            "operations": self.operations,
+            "errors": self.errors,
+            "items": self.items,
+            "seconds": round(self.elapsed, 3),
+            "ops_per_second": round(self.operations / self.elapsed, 1),
+            "items_per_second": round(self.items / self.elapsed, 1),
+            "p50_ms": round(self.latency.percentile(50) * 1000, 2),
+            "p99_ms": round(self.latency.percentile(99) * 1000, 2),
+        }
+
+
+def run_scenario(
+    name: str, operation: Callable[[int], int], operations: int, concurrency: int
+) -> ScenarioResult:
+    """Runs `operation(i)` for `i` in `range(operations)` on a thread pool.
+
+    `operation` returns the number of items it processed (pages, instances,
+    events...), which is reported next to the operation throughput.
+    """
+    result = ScenarioResult(name)
+    lock = threading.Lock()
+
+    def timed(index: int) -> None:
+        start = time.perf_counter()
+        try:
+            items, failed = operation(index), False
+        except Exception:
+            items, failed = 0, True
+        elapsed = time.perf_counter() - start
+        with lock:
+            result.latency.record(elapsed)
+            result.items += items
+            result.errors += failed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(timed, range(operations)))
+    result.elapsed = time.perf_counter() - start
+    result.operations = operations
+    return result
+
+
+def build_configs(url: str) -> Dict[str, ConfigModel]:
+    return {
+        service: ConfigModel(
+            env=EnvTypes.OTHER, auth_token="benchmark-token", base_url=url + prefix
+        )
+        for service, prefix in SERVICE_PREFIXES.items()
+    }
+
+
+def benchmark(
+    url: str,
+    operations: int,
+    concurrency: int,
+    scenarios: Optional[List[str]] = None,
+    upload_bytes: int = 1_000_000,
+    page_size: int = 25,
+    compress_requests: bool = False,
+) -> List[ScenarioResult]:
+    from agents.models import GetAgentRequest
+    from agents.service import AgentService
+    from documents.models import FilterFormInstanceRequest
+    from documents.service import DocumentOperations, FormOperations
+    from operations import to_jsonable
+    from workflows.models import WorkflowRequest
+    from workflows.service import WorkflowService
+
+    configs = build_configs(url)
+    session = create_session(
+        pool_maxsize=max(concurrency, 1) * 2, compress_requests=compress_requests
+    )
+    documents = DocumentOperations(configs["document"], session=session)
+    forms = FormOperations(configs["document"], session=session)
+    workflows = WorkflowService(configs["workflows"], session=session)
+    agents = AgentService(configs["agent"], session=session)
+
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as upload_file:
+        upload_file.write(os.urandom(upload_bytes))
+
+    def upload(index: int) -> int:
+        documents.create_document(file_path=upload_file.name)
+        return 1
+
+    def pages(index: int) -> int:
+        return sum(1 for _ in documents.get_pages(f"doc{index:021d}", concurrency=4))
+
+    def compact_pages(index: int) -> int:
+        # Same conversion the daemon and `weav.py batch` apply to results.
+        page = documents.get_page_text_and_words(
+            f"doc{index:021d}", page_number=1, compact=True
+        )
+        return len(json.loads(json.dumps(to_jsonable(page)))["words"])
+
+    def form_instances(index: int) -> int:
+        skip, fetched, total = 0, 0, None
+        while total is None or skip < total:
+            response = forms.filter_form_instances(
+                FilterFormInstanceRequest(
+                    scope="all_documents", skip=skip, limit=page_size
+                )
+            )
+            total = response.total
+            fetched += len(response.form_instances)
+            skip += page_size
+        return fetched
+
+    def agent_stream(index: int) -> int:
+        events = agents.get_agent_response(
+            GetAgentRequest(
+                user_input="What is the total?",
+                chat_id=f"chat-{index}",
+                stream=True,
+                agent_id="agent",
+            )
+        )
+        return len(events)
+
+    def workflow_polling(index: int) -> int:
+        run = workflows.run_workflow(
+            "ingest", WorkflowRequest(doc_id=f"doc{index:021d}")
+        )
+        completed = list(
+            workflows.wait_for_runs(
+                [(run.workflow_id, run.run_id)],
+                initial_interval=0.01,
+                min_interval=0.01,
+                max_interval=0.05,
+            )
+        )
+        return sum(item.polls for item in completed)
+
+    available = {
+        "uploads": upload,
+        "pages": pages,
+        "compact_pages": compact_pages,
+        "form_instances": form_instances,
+        "agent_streams": agent_stream,
+        "workflow_polling": workflow_polling,
+    }
+    try:
+        return [
+            run_scenario(name, available[name], operations, concurrency)
+            for name in (scenarios or list(available))
+        ]
+    finally:
+        os.remove(upload_file.name)
+        session.close()
+
+
+def print_table(results: List[ScenarioResult]) -> None:
+    columns = [
+        "scenario",
+        "operations",
+        "errors",
+        "ops_per_second",
+        "items_per_second",
+        "p50_ms",
+        "p99_ms",
+    ]
+    rows = [result.to_dict() for result in results]
+    widths = [max(len(c), *(len(str(row[c])) for row in rows)) for c in columns]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(str(row[c]).ljust(w) for c, w in zip(columns, widths)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the client against a local mock server."
+    )
+    parser.add_argument(
+        "--url",
+        type=str,
+        default=None,
+        required=False,
+        help="Running mock server to use; one is started in-process by default",
+    )
+    parser.add_argument(
+        "--scenarios",
+        type=str,
+        nargs="+",
+        default=None,
+        required=False,
+        help="uploads, pages, compact_pages, form_instances, agent_streams, workflow_polling",
+    )
+    parser.add_argument(
+        "--operations", type=int, default=100, help="Operations per scenario"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=8, help="Operations run in parallel"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Mock server latency in seconds"
+    )
+    parser.add_argument(
+        "--error_rate", type=float, default=0.0, help="Mock server error rate"
+    )
+    parser.add_argument(
+        "--bandwidth",
+        type=float,
+        default=None,
+        required=False,
+        help="Bytes per second of the mock server's simulated link",
+    )
+    parser.add_argument(
+        "--compress",
+        type=str,
+        choices=BOOL_CHOICES,
+        default="false",
+        required=False,
+        help="Gzip responses and large request bodies",
+    )
+    parser.add_argument(
+        "--upload_bytes", type=int, default=1_000_000, help="Size of uploaded files"
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        required=False,
+        help="Write the results as JSON for comparing runs",
+    )
+
+    args = parser.parse_args()
+    compress = get_bool_value(args.compress)
+
+    server = None
+    url = args.url
+    if url is None:
+        settings = MockSettings(
+            latency=args.latency,
+            error_rate=args.error_rate,
+            bandwidth=args.bandwidth,
+            compress_responses=compress,
+        )
+        server = MockWeavServer(settings=settings).start()
+        url = server.url
+    try:
+        results = benchmark(
+            url,
+            operations=args.operations,
+            concurrency=args.concurrency,
+            scenarios=args.scenarios,
+            upload_bytes=args.upload_bytes,
+            compress_requests=compress,
+        )
+    finally:
+        if server is not None:
+            server.stop()
+
+    print_table(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump([result.to_dict() for result in results], f, indent=2)
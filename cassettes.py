@@ -0,0 +1,312 @@
+import gzip
+import hashlib
+import io
+import json
+import re
+import struct
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
+from urllib3.response import HTTPResponse
+
+_LENGTH = struct.Struct(">I")
+_UNRECORDED_HEADERS = {"set-cookie", "authorization"}
+_BOUNDARY = re.compile(r"boundary=([^;\s]+)")
+CHUNK_SIZE = 64 * 1024
+
+
+class CassetteMissError(requests.exceptions.RequestException):
+    """Raised in replay mode for a request that is not in the cassette."""
+
+
+def request_key(request: requests.PreparedRequest) -> Tuple[str, str, str]:
+    """Identifies a request by method, normalised URL and body digest.
+
+    Query parameters are sorted and repeated slashes collapsed. Multipart
+    boundaries are random per request, so they are blanked out before the
+    body is hashed.
+    """
+    parts = urlsplit(request.url)
+    path = re.sub(r"/{2,}", "/", parts.path)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    url = urlunsplit((parts.scheme, parts.netloc, path, query, ""))
+
+    body = request.body
+    if isinstance(body, str):
+        body = body.encode()
+    if body is None:
+        digest = ""
+    elif isinstance(body, bytes):
+        match = _BOUNDARY.search(request.headers.get("Content-Type", ""))
+        if match:
+            body = body.replace(match.group(1).encode(), b"BOUNDARY")
+        digest = hashlib.sha1(body).hexdigest()
+    else:
+        # Streamed bodies (file objects, generators) cannot be hashed up front.
+        digest = "stream"
+    return request.method, url, digest
+
+
+class _Interaction:
+    """One recorded request/response pair.
+
+    `chunks` lists `(seconds after the headers arrived, byte count)` for the
+    raw, still content-encoded body, so streams can be replayed with their
+    original pacing.
+    """
+
+    def __init__(
+        self,
+        key: Tuple[str, str, str],
+        status: int,
+        reason: str,
+        headers: List[Tuple[str, str]],
+        body: bytes,
+        ttfb: float,
+        chunks: List[Tuple[float, int]],
+    ):
+        self.key = key
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+        self.ttfb = ttfb
+        self.chunks = chunks
+
+    def metadata(self) -> Dict[str, Any]:
+        method, url, digest = self.key
+        return {
+            "method": method,
+            "url": url,
+            "body_digest": digest,
+            "status": self.status,
+            "reason": self.reason,
+            "headers": self.headers,
+            "ttfb": round(self.ttfb, 6),
+            "chunks": [(round(offset, 6), size) for offset, size in self.chunks],
+            "body_length": len(self.body),
+        }
+
+
+def write_interaction(stream, interaction: _Interaction) -> None:
+    metadata = json.dumps(interaction.metadata(), separators=(",", ":")).encode()
+    stream.write(_LENGTH.pack(len(metadata)))
+    stream.write(metadata)
+    stream.write(interaction.body)
+
+
+def read_interactions(path: str) -> Iterator[_Interaction]:
+    """Reads a cassette: gzip-compressed, length-prefixed JSON metadata + raw body."""
+    with gzip.open(path, "rb") as stream:
+        while True:
+            prefix = stream.read(_LENGTH.size)
+            if not prefix:
+                return
+            (length,) = _LENGTH.unpack(prefix)
+            metadata = json.loads(stream.read(length))
+            body = stream.read(metadata["body_length"])
+            yield _Interaction(
+                key=(metadata["method"], metadata["url"], metadata["body_digest"]),
+                status=metadata["status"],
+                reason=metadata["reason"],
+                headers=[tuple(header) for header in metadata["headers"]],
+                body=body,
+                ttfb=metadata["ttfb"],
+                chunks=[tuple(chunk) for chunk in metadata["chunks"]],
+            )
+
+
+class _PacedBody(io.RawIOBase):
+    """Body stream that releases recorded chunks no faster than they arrived."""
+
+    def __init__(self, body: bytes, chunks: List[Tuple[float, int]], speed: float):
+        self._body = body
+        self._position = 0
+        self._available: List[Tuple[float, int]] = []
+        end = 0
+        for offset, size in chunks:
+            end += size
+            self._available.append((offset / speed, end))
+        self._start = time.monotonic()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self._position >= len(self._body):
+            return 0
+        for offset, end in self._available:
+            if end > self._position:
+                delay = offset - (time.monotonic() - self._start)
+                if delay > 0:
+                    time.sleep(delay)
+                break
+        else:
+            end = len(self._body)
+        size = min(len(buffer), end - self._position)
+        buffer[:size] = self._body[self._position : self._position + size]
+        self._position += size
+        return size
+
+
+class RecordingAdapter(HTTPAdapter):
+    """`HTTPAdapter` that appends every exchange to a cassette file.
+
+    Response bodies are read completely (and timed chunk by chunk) before the
+    response is handed back, so a streamed response still works but arrives
+    all at once while recording. Authorization and cookie headers are never
+    written.
+    """
+
+    def __init__(self, path: str, **kwargs):
+        self.path = path
+        self._lock = threading.Lock()
+        super().__init__(**kwargs)
+
+    def send(self, request, stream=False, **kwargs) -> requests.Response:
+        start = time.monotonic()
+        response = super().send(request, stream=True, **kwargs)
+        headers_received = time.monotonic()
+        chunks, parts = [], []
+        for chunk in response.raw.stream(CHUNK_SIZE, decode_content=False):
+            chunks.append((time.monotonic() - headers_received, len(chunk)))
+            parts.append(chunk)
+        interaction = _Interaction(
+            key=request_key(request),
+            status=response.status_code,
+            reason=response.reason or "",
+            headers=[
+                (name, value)
+                for name, value in response.raw.headers.items()
+                if name.lower() not in _UNRECORDED_HEADERS
+            ],
+            body=b"".join(parts),
+            ttfb=headers_received - start,
+            chunks=chunks,
+        )
+        with self._lock, gzip.open(self.path, "ab") as cassette:
+            write_interaction(cassette, interaction)
+        response.close()
+        return _build_response(self, request, interaction, stream, speed=None)
+
+
+class ReplayAdapter(HTTPAdapter):
+    """`HTTPAdapter` that answers requests from a cassette without the network.
+
+    Requests are matched with `request_key`, falling back to method and URL
+    alone when no recorded body matches (e.g. an upload of a file at another
+    path). Repeated requests (e.g. status polling) get the recorded responses
+    in order, and the last one again once they run out. With
+    `timing="original"` the recorded time to first byte and body pacing are
+    reproduced, divided by `speed`; with `timing="wire"` responses are
+    returned immediately.
+    """
+
+    def __init__(self, path: str, timing: str = "wire", speed: float = 1.0, **kwargs):
+        if timing not in ("wire", "original"):
+            raise ValueError("timing must be 'wire' or 'original'")
+        if speed <= 0:
+            raise ValueError("speed must be positive")
+        self.path = path
+        self.timing = timing
+        self.speed = speed
+        self._interactions = list(read_interactions(path))
+        self._by_key: Dict[Tuple, List[_Interaction]] = defaultdict(list)
+        for interaction in self._interactions:
+            self._by_key[interaction.key].append(interaction)
+            self._by_key[interaction.key[:2]].append(interaction)
+        self._cursors: Dict[Tuple, int] = defaultdict(int)
+        self._replayed = set()
+        self._lock = threading.Lock()
+        super().__init__(**kwargs)
+
+    def __len__(self) -> int:
+        return len(self._interactions)
+
+    def _next(self, key: Tuple) -> Optional[_Interaction]:
+        candidates = self._by_key.get(key)
+        if not candidates:
+            return None
+        cursor = self._cursors[key]
+        while cursor < len(candidates) and id(candidates[cursor]) in self._replayed:
+            cursor += 1
+        self._cursors[key] = cursor
+        if cursor == len(candidates):
+            return candidates[-1]
+        self._replayed.add(id(candidates[cursor]))
+        return candidates[cursor]
+
+    def send(self, request, stream=False, **kwargs) -> requests.Response:
+        key = request_key(request)
+        with self._lock:
+            interaction = self._next(key) or self._next(key[:2])
+        if interaction is None:
+            raise CassetteMissError(
+                f"No recorded response for {key[0]} {key[1]}", request=request
+            )
+        speed = None
+        if self.timing == "original":
+            time.sleep(interaction.ttfb / self.speed)
+            speed = self.speed
+        return _build_response(self, request, interaction, stream, speed)
+
+
+def _build_response(
+    adapter: HTTPAdapter,
+    request: requests.PreparedRequest,
+    interaction: _Interaction,
+    stream: bool,
+    speed: Optional[float],
+) -> requests.Response:
+    if speed is None:
+        body = io.BytesIO(interaction.body)
+    else:
+        body = io.BufferedReader(
+            _PacedBody(interaction.body, interaction.chunks, speed)
+        )
+    raw = HTTPResponse(
+        body=body,
+        headers=interaction.headers,
+        status=interaction.status,
+        reason=interaction.reason,
+        preload_content=False,
+        decode_content=True,
+        request_method=request.method,
+        request_url=request.url,
+    )
+    response = adapter.build_response(request, raw)
+    if not stream:
+        response.content
+    return response
+
+
+def use_cassette(
+    session: requests.Session,
+    path: str,
+    mode: str = "replay",
+    timing: str = "wire",
+    speed: float = 1.0,
+    pool_maxsize: int = DEFAULT_POOLSIZE,
+) -> HTTPAdapter:
+    """Mounts a recording or replaying adapter for all URLs of `session`.
+
+    In `"record"` mode the real API is called and every exchange is appended
+    to `path`. In `"replay"` mode nothing leaves the process. The adapter
+    replaces the ones mounted on `session`.
+    """
+    if mode == "record":
+        adapter = RecordingAdapter(path, pool_maxsize=pool_maxsize)
+    elif mode == "replay":
+        adapter = ReplayAdapter(
+            path, timing=timing, speed=speed, pool_maxsize=pool_maxsize
+        )
+    else:
+        raise ValueError("mode must be 'record' or 'replay'")
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return adapter
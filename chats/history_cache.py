@@ -0,0 +1,132 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, List, Optional, Type
+
+from pydantic import BaseModel
+
+DEFAULT_MAX_AGE = 60.0
+
+
+def _digest(raw: Dict[str, Any]) -> bytes:
+    payload = json.dumps(raw, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=16).digest()
+
+
+def _copies(messages: List[Any]) -> List[Any]:
+    return [message.model_copy(deep=True) for message in messages]
+
+
+class _CachedHistory:
+    def __init__(self, messages: List[Any], digests: Optional[Dict[str, bytes]]):
+        self.messages = messages
+        # Digest of each message's server payload by `message_id`, to spot edits.
+        self.digests = digests or {}
+        self.fetched_at = time.monotonic()
+        self.stale = False
+
+
+class ChatHistoryCache:
+    """In-memory LRU cache of chat histories keyed by chat ID.
+
+    Shared by `ChatService` and `AgentService`. A history is fetched from the
+    server once; later reads are served locally until the chat receives a new
+    turn, at which point the entry is marked stale, or is older than `max_age`
+    seconds, so turns added by other clients show up too. The next read
+    refetches the history but only validates messages that are new or whose
+    payload changed on the server (e.g. a vote or tags), so a long
+    conversation is parsed once instead of on every turn.
+
+    Callers get copies of the cached messages and may change them freely.
+    """
+
+    def __init__(
+        self, max_chats: int = 128, max_age: Optional[float] = DEFAULT_MAX_AGE
+    ):
+        if max_chats < 1:
+            raise ValueError("max_chats must be at least 1")
+        self.max_chats = max_chats
+        self.max_age = max_age
+        self._histories: "OrderedDict[str, _CachedHistory]" = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._histories)
+
+    def __contains__(self, chat_id: str) -> bool:
+        return chat_id in self._histories
+
+    def get(self, chat_id: str) -> Optional[List[Any]]:
+        """Returns copies of the cached messages, or None if missing or stale."""
+        with self._lock:
+            entry = self._histories.get(chat_id)
+            if entry is None or entry.stale or self._expired(entry):
+                return None
+            self._histories.move_to_end(chat_id)
+            messages = entry.messages
+        return _copies(messages)
+
+    def _expired(self, entry: _CachedHistory) -> bool:
+        return (
+            self.max_age is not None
+            and time.monotonic() - entry.fetched_at > self.max_age
+        )
+
+    def put(
+        self,
+        chat_id: str,
+        messages: List[Any],
+        digests: Optional[Dict[str, bytes]] = None,
+    ) -> None:
+        with self._lock:
+            self._histories[chat_id] = _CachedHistory(list(messages), digests)
+            self._histories.move_to_end(chat_id)
+            while len(self._histories) > self.max_chats:
+                self._histories.popitem(last=False)
+
+    def mark_stale(self, chat_id: str) -> None:
+        """Forces the next read of `chat_id` to resync with the server."""
+        with self._lock:
+            entry = self._histories.get(chat_id)
+            if entry is not None:
+                entry.stale = True
+
+    def merge(
+        self, chat_id: str, raw_messages: List[Dict[str, Any]], model: Type[BaseModel]
+    ) -> List[Any]:
+        """Rebuilds a history from a server payload, reusing cached messages.
+
+        The server order is kept. Messages already cached are matched by
+        `message_id` and reused when their payload is unchanged; new and
+        edited ones are validated. Returns copies of the messages.
+        """
+        with self._lock:
+            entry = self._histories.get(chat_id)
+            if entry is None:
+                known, digests = {}, {}
+            else:
+                known = {m.message_id: m for m in entry.messages if m.message_id}
+                digests = entry.digests
+        messages = []
+        new_digests = {}
+        for raw in raw_messages:
+            message_id = raw.get("message_id")
+            digest = _digest(raw)
+            message = known.get(message_id)
+            if message is None or digests.get(message_id) != digest:
+                message = model.model_validate(raw)
+            if message_id:
+                new_digests[message_id] = digest
+            messages.append(message)
+        self.put(chat_id, messages, new_digests)
+        return _copies(messages)
+
+    def invalidate(self, chat_id: str) -> None:
+        with self._lock:
+            self._histories.pop(chat_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._histories.clear()
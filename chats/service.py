@@ -5,16 +5,27 @@ from chats.models import (
     ChatHistoryResponse,
     ChatResponse,
     ChatRequest,
+    ChatHistoryMessage,
 )
 
 from chats.exceptions import ChatServiceException
+from chats.history_cache import ChatHistoryCache
+from http_client import create_session, decode_response
 import requests
+from typing import Optional
 
 
 class ChatService:
-    def __init__(self, configs: ConfigModel):
+    def __init__(
+        self,
+        configs: ConfigModel,
+        history_cache: Optional[ChatHistoryCache] = None,
+        session: Optional[requests.Session] = None,
+    ):
         self.configs = configs
         self.endpoints = ServiceEndpoints()
+        self.history_cache = history_cache
+        self.session = session or create_session()
 
     def get_chat_logs(self, chat_logs_request: GetChatLogsRequest) -> ChatLogsResponse:
         url = f"{self.configs.base_url}/{self.endpoints.CHAT_LOGS}"
@@ -27,7 +38,7 @@ class ChatService:
         ]
         filtered_params = [(k, v) for k, v in params if v is not None and v != ""]
 
-        response = requests.get(
+        response = self.session.get(
             url=url,
             params=filtered_params,
             headers={"Authorization": f"Bearer {self.configs.auth_token}"},
@@ -44,13 +55,20 @@ class ChatService:
                 message="Failed to retrieve chat logs",
                 response_data=response.json(),
             )
-        return ChatLogsResponse(**response.json())
+        return decode_response(response, ChatLogsResponse)
+
+    def get_chat_history(
+        self, chat_id: str, refresh: bool = False
+    ) -> ChatHistoryResponse:
+        if self.history_cache is not None and not refresh:
+            cached_messages = self.history_cache.get(chat_id)
+            if cached_messages is not None:
+                return ChatHistoryResponse(messages=cached_messages)
 
-    def get_chat_history(self, chat_id: str) -> ChatHistoryResponse:
         url = f"{self.configs.base_url}/{self.endpoints.CHAT_HISTORY}"
         params = [("chat_id", chat_id)]
 
-        response = requests.get(
+        response = self.session.get(
             url=url,
             params=params,
             headers={"Authorization": f"Bearer {self.configs.auth_token}"},
@@ -67,11 +85,16 @@ class ChatService:
                 message="Failed to retrieve chat logs",
                 response_data=response.json(),
             )
-        return ChatHistoryResponse(**response.json())
+        if self.history_cache is None:
+            return decode_response(response, ChatHistoryResponse)
+        messages = self.history_cache.merge(
+            chat_id, response.json()["messages"], ChatHistoryMessage
+        )
+        return ChatHistoryResponse(messages=messages)
 
     def chat(self, chat_request: ChatRequest) -> ChatResponse:
         url = f"{self.configs.base_url}/{self.endpoints.CHAT}"
-        response = requests.post(
+        response = self.session.post(
             url=url,
             json=chat_request.model_dump(),
             headers={"Authorization": f"Bearer {self.configs.auth_token}"},
@@ -88,4 +111,6 @@ class ChatService:
                 message="Failed to send chat",
                 response_data=response.json(),
             )
-        return ChatResponse(**response.json())
+        if self.history_cache is not None:
+            self.history_cache.mark_stale(chat_request.chat_id)
+        return decode_response(response, ChatResponse)
@@ -0,0 +1,135 @@
+import inspect
+import os
+from threading import RLock
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple, Type
+
+import requests
+from dotenv import dotenv_values
+
+from chats.history_cache import ChatHistoryCache
+from config_models import ConfigModel, ServiceType, build_config
+from http_client import DEFAULT_POOL_SIZE, create_session
+
+if TYPE_CHECKING:
+    from instrumentation import Instrumentation
+
+
+class _Tenant:
+    def __init__(self, env: Optional[str], auth_token: Optional[str]):
+        self.env = env
+        self.auth_token = auth_token
+        self.configs: Dict[ServiceType, ConfigModel] = {}
+        self.clients: Dict[Tuple[Type, ServiceType], Any] = {}
+        self.session: Optional[requests.Session] = None
+        self.history_cache = ChatHistoryCache()
+
+
+class ClientRegistry:
+    """Process-wide cache of configurations and service clients per tenant.
+
+    A tenant is an `ENV`/`AUTH_TOKEN` pair, registered directly or from its
+    own `.env` file. Env files are read with `dotenv_values`, so tenants never
+    overwrite each other through `os.environ`; the environment only fills in
+    keys a file does not set. For every tenant, each
+    `ConfigModel` is resolved once per `ServiceType`. All of the tenant's
+    clients share one pooled session and one chat history cache. With
+    `instrumentation`, the calls of every tenant are timed and recorded there.
+    """
+
+    def __init__(
+        self,
+        pool_maxsize: int = DEFAULT_POOL_SIZE,
+        instrumentation: Optional["Instrumentation"] = None,
+    ):
+        self.pool_maxsize = pool_maxsize
+        self.instrumentation = instrumentation
+        self._tenants: Dict[str, _Tenant] = {}
+        self._lock = RLock()
+
+    def register_tenant(self, tenant: str, env: str, auth_token: str) -> str:
+        with self._lock:
+            current = self._tenants.get(tenant)
+            if current is None or (current.env, current.auth_token) != (
+                env,
+                auth_token,
+            ):
+                if current is not None and current.session is not None:
+                    current.session.close()
+                self._tenants[tenant] = _Tenant(env, auth_token)
+        return tenant
+
+    def register_env_file(
+        self, env_file_path: str, tenant: Optional[str] = None
+    ) -> str:
+        """Registers a tenant from an env file; the tenant defaults to its path.
+
+        Like `LoadConfigurations`, keys missing from the file are taken from
+        the process environment.
+        """
+        if not os.path.exists(env_file_path):
+            raise ValueError("No environment file found")
+        values = dotenv_values(env_file_path)
+        env, auth_token = (
+            values[key] if values.get(key) is not None else os.environ.get(key)
+            for key in ("ENV", "AUTH_TOKEN")
+        )
+        return self.register_tenant(
+            tenant or os.path.abspath(env_file_path), env=env, auth_token=auth_token
+        )
+
+    def _get_tenant(self, tenant: str) -> _Tenant:
+        try:
+            return self._tenants[tenant]
+        except KeyError:
+            raise ValueError(f"Unknown tenant: {tenant}") from None
+
+    def get_config(self, tenant: str, service_type: ServiceType) -> ConfigModel:
+        with self._lock:
+            settings = self._get_tenant(tenant)
+            if service_type not in settings.configs:
+                settings.configs[service_type] = build_config(
+                    settings.env, settings.auth_token, service_type
+                )
+            return settings.configs[service_type]
+
+    def get_session(self, tenant: str) -> requests.Session:
+        with self._lock:
+            settings = self._get_tenant(tenant)
+            if settings.session is None:
+                settings.session = create_session(
+                    pool_maxsize=self.pool_maxsize,
+                    instrumentation=self.instrumentation,
+                )
+            return settings.session
+
+    def get_client(self, tenant: str, service_class: Type, service_type: ServiceType):
+        """Returns the tenant's cached instance of `service_class`.
+
+        For example `registry.get_client("acme", WorkflowService, ServiceType.WORKFLOWS)`.
+        """
+        key = (service_class, service_type)
+        with self._lock:
+            settings = self._get_tenant(tenant)
+            client = settings.clients.get(key)
+            if client is None:
+                kwargs = {
+                    "configs": self.get_config(tenant, service_type),
+                    "session": self.get_session(tenant),
+                }
+                if "history_cache" in inspect.signature(service_class).parameters:
+                    kwargs["history_cache"] = settings.history_cache
+                client = settings.clients[key] = service_class(**kwargs)
+            return client
+
+    def reload(self, tenant: Optional[str] = None) -> None:
+        """Drops cached configurations and clients of one or all tenants."""
+        with self._lock:
+            tenants = [tenant] if tenant is not None else list(self._tenants)
+            for name in tenants:
+                settings = self._get_tenant(name)
+                if settings.session is not None:
+                    settings.session.close()
+                self._tenants[name] = _Tenant(settings.env, settings.auth_token)
+
+
+default_registry = ClientRegistry()
@@ -0,0 +1,29 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def imap_ordered(
+    func: Callable[[T], R], items: Iterable[T], max_workers: int
+) -> Iterator[R]:
+    """Like `map`, but runs up to `max_workers` calls ahead on a thread pool.
+
+    Results are yielded in input order. Only `max_workers` items are in flight
+    at any time, so a slow consumer does not cause unbounded buffering.
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1")
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque(
+            executor.submit(func, item) for _, item in zip(range(max_workers), items)
+        )
+        while pending:
+            result = pending.popleft().result()
+            for item in items:
+                pending.append(executor.submit(func, item))
+                break
+            yield result
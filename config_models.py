@@ -3,7 +3,8 @@ from enum import Enum
 from dotenv import load_dotenv
 import os
 from loguru import logger
-from typing import Optional
+from threading import Lock
+from typing import Optional, Tuple
 
 ENV_PATH = os.path.join(os.path.dirname(os.path.abspath("__file__")), ".env")
 
@@ -76,34 +77,47 @@ class BaseURLMapper:
         return f"{environment}{endpoint}"
 
 
+BASE_URL_MAPPER = BaseURLMapper()
+
+
+def build_config(
+    env: Optional[str], auth_token: Optional[str], service: ServiceType
+) -> ConfigModel:
+    """Builds the configuration of one service from raw ENV and AUTH_TOKEN values."""
+    try:
+        env_type = EnvTypes.from_str(env) if env == "local" else env
+        if isinstance(env_type, EnvTypes):
+            base_url = BASE_URL_MAPPER.get_base_url(env_type, service)
+        else:
+            base_url = BASE_URL_MAPPER.get_base_url(env_type, service, env_type)
+            env_type = EnvTypes.OTHER
+
+        configs = ConfigModel(env=env_type, auth_token=auth_token, base_url=base_url)
+        logger.info("Config set.")
+        return configs
+    except Exception as e:
+        raise ValueError(f"Error loading configuration: {e}") from e
+
+
+_env_file_lock = Lock()
+_loaded_env_file: Optional[Tuple[str, float]] = None
+
+
 class LoadConfigurations:
     def __init__(self, env_file_path: str = ENV_PATH):
+        global _loaded_env_file
         if not os.path.exists(env_file_path):
             raise ValueError("No environment file found")
-        load_dotenv(env_file_path, override=True)
-
-    def __convert_env_str_to_enum(self, value) -> str:
-        return EnvTypes.from_str(value) if value == "local" else value
+        # Re-parse only when a different file is requested or the file
+        # changed since it was last loaded into the process environment.
+        loaded_key = (os.path.abspath(env_file_path), os.path.getmtime(env_file_path))
+        with _env_file_lock:
+            if loaded_key != _loaded_env_file:
+                load_dotenv(env_file_path, override=True)
+                _loaded_env_file = loaded_key
 
     def set_config(self, service: ServiceType) -> ConfigModel:
-        env = os.getenv("ENV")
-        auth_token = os.getenv("AUTH_TOKEN")
-
-        try:
-            env_type = self.__convert_env_str_to_enum(env)
-            if isinstance(env_type, EnvTypes):
-                base_url = BaseURLMapper().get_base_url(env_type, service)
-            else:
-                base_url = BaseURLMapper().get_base_url(env_type, service, env_type)
-                env_type = EnvTypes.OTHER
-
-            configs = ConfigModel(
-                env=env_type, auth_token=auth_token, base_url=base_url
-            )
-            logger.info("Config set.")
-            return configs
-        except Exception as e:
-            raise ValueError(f"Error loading configuration: {e}") from e
+        return build_config(os.getenv("ENV"), os.getenv("AUTH_TOKEN"), service)
 
 
 class ServiceEndpoints:
@@ -137,6 +151,7 @@ class ServiceEndpoints:
         self.DOWNLOAD_FORM_INSTANCE = "documents/{DOC_ID}/form/"
         self.GET_DOCUMENT_CATEGORIES = "documents/categories/"
         self.GET_DOCUMENT_TAGS = "documents/tags/"
+        self.UPDATE_DOCUMENT_TAGS = "documents/{DOC_ID}/tags"
         self.TRIGGER_DOCUMENT_SUMMARY = "documents/{DOC_ID}/summary"
         self.CHAT_LOGS = "/chat_logs/"
         self.CHAT_HISTORY = "/chat_history"
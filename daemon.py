@@ -0,0 +1,141 @@
+import json
+import os
+import socket
+import socketserver
+import stat
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from loguru import logger
+
+from client_registry import ClientRegistry
+from config_models import ENV_PATH
+from operations import OPERATIONS, ServiceCache, error_payload, run_operation
+
+if TYPE_CHECKING:
+    from instrumentation import Instrumentation
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        # One JSON request per line; a connection may send several.
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            response = self.server.dispatch(line)
+            self.wfile.write(json.dumps(response, default=str).encode() + b"\n")
+            self.wfile.flush()
+
+
+def _check_socket_directory(directory: str) -> None:
+    """Creates the socket's directory, or checks that others cannot tamper with it.
+
+    A missing directory is created private to the user. An existing one must
+    be owned by the user (or root), and must not be writable by others unless
+    it has the sticky bit, like `/tmp`.
+    """
+    if not os.path.exists(directory):
+        os.makedirs(directory, mode=0o700)
+        return
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode):
+        raise RuntimeError(f"Socket directory {directory} is not a directory")
+    if info.st_uid not in (os.getuid(), 0):
+        raise RuntimeError(f"Socket directory {directory} is owned by another user")
+    if info.st_mode & 0o022 and not info.st_mode & stat.S_ISVTX:
+        raise RuntimeError(f"Socket directory {directory} is writable by others")
+
+
+def _remove_stale_socket(socket_path: str) -> None:
+    """Removes a socket left behind by a daemon that is no longer running."""
+    try:
+        info = os.lstat(socket_path)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(info.st_mode):
+        raise RuntimeError(f"{socket_path} exists and is not a socket")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        probe.settimeout(1.0)
+        try:
+            probe.connect(socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.unlink(socket_path)
+            return
+        except OSError as e:
+            raise RuntimeError(f"Cannot check socket {socket_path}: {e}") from e
+    raise RuntimeError(f"A daemon is already listening on {socket_path}")
+
+
+class WeavDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Long-lived process that serves service operations over a Unix socket.
+
+    Configurations, pooled connections and caches live for the lifetime of
+    the daemon, so each call only pays for its HTTP request. Requests are
+    `{"op": ..., "params": {...}}` lines; `ping` and `reload` are built in.
+    With `instrument=True` every API call is timed, and the `metrics` op
+    returns the latency histograms in Prometheus text format (or as a JSON
+    summary with `{"format": "summary"}`).
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self, socket_path: str, env_file_path: str = ENV_PATH, instrument: bool = False
+    ):
+        _check_socket_directory(os.path.dirname(os.path.abspath(socket_path)))
+        _remove_stale_socket(socket_path)
+        self.socket_path = socket_path
+        self.instrumentation: Optional["Instrumentation"] = None
+        registry = None
+        if instrument:
+            from instrumentation import Instrumentation
+
+            self.instrumentation = Instrumentation()
+            registry = ClientRegistry(instrumentation=self.instrumentation)
+        self.services = ServiceCache(env_file_path, registry)
+        # The daemon calls the API with the configured token, so only the
+        # owner may talk to it. The umask makes the socket private from the
+        # moment it is bound.
+        umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, _RequestHandler)
+        finally:
+            os.umask(umask)
+
+    def dispatch(self, line: bytes) -> Dict[str, Any]:
+        try:
+            request = json.loads(line)
+            op = request["op"]
+            if op == "ping":
+                return {"ok": True, "result": "pong"}
+            if op == "reload":
+                self.services.reload()
+                return {"ok": True, "result": "reloaded"}
+            if op == "list_operations":
+                return {"ok": True, "result": sorted(OPERATIONS)}
+            if op == "metrics":
+                if self.instrumentation is None:
+                    raise ValueError("Daemon was started without instrumentation")
+                params = request.get("params") or {}
+                if params.get("format") == "summary":
+                    return {"ok": True, "result": self.instrumentation.summary()}
+                return {"ok": True, "result": self.instrumentation.prometheus_text()}
+            result = run_operation(self.services, op, request.get("params") or {})
+            return {"ok": True, "result": result}
+        except Exception as e:
+            return {"ok": False, "error": error_payload(e)}
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def serve(
+    socket_path: str, env_file_path: str = ENV_PATH, instrument: bool = False
+) -> None:
+    with WeavDaemon(socket_path, env_file_path, instrument) as server:
+        logger.info(f"Weav daemon listening on {socket_path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logger.info("Weav daemon stopped")
@@ -0,0 +1,156 @@
+from typing import Any, Dict, List
+
+try:
+    import numpy as np
+except ImportError as e:
+    raise ImportError(
+        "Compact page words need numpy, install it with `pip install numpy`"
+    ) from e
+from pydantic import BaseModel, ConfigDict, field_serializer
+
+from documents.models import Classification, ExtractedEntity, Word
+
+
+class CompactWords:
+    """Struct-of-arrays representation of the words on a page.
+
+    Word `i` has its text in `text[text_offsets[i]:text_offsets[i + 1]]` and its
+    polygon points in `points[point_offsets[i]:point_offsets[i + 1]]`. Points
+    are float32 `(x, y)` rows; span offsets/lengths are int32 and confidences
+    float32. A dense page is a handful of arrays instead of thousands of
+    pydantic objects and dicts.
+    """
+
+    __slots__ = (
+        "text",
+        "text_offsets",
+        "points",
+        "point_offsets",
+        "span_offsets",
+        "span_lengths",
+        "confidences",
+    )
+
+    def __init__(
+        self,
+        text: str,
+        text_offsets: "np.ndarray",
+        points: "np.ndarray",
+        point_offsets: "np.ndarray",
+        span_offsets: "np.ndarray",
+        span_lengths: "np.ndarray",
+        confidences: "np.ndarray",
+    ):
+        self.text = text
+        self.text_offsets = text_offsets
+        self.points = points
+        self.point_offsets = point_offsets
+        self.span_offsets = span_offsets
+        self.span_lengths = span_lengths
+        self.confidences = confidences
+
+    @classmethod
+    def from_json(cls, words: List[Dict[str, Any]]) -> "CompactWords":
+        """Builds the arrays straight from the `words` list of a JSON response."""
+        contents = [word["content"] for word in words]
+        text_offsets = np.zeros(len(words) + 1, dtype=np.int32)
+        np.cumsum([len(content) for content in contents], out=text_offsets[1:])
+        point_offsets = np.zeros(len(words) + 1, dtype=np.int32)
+        np.cumsum([len(word["polygon"]) for word in words], out=point_offsets[1:])
+        coordinates = [
+            coordinate
+            for word in words
+            for point in word["polygon"]
+            for coordinate in (point["x"], point["y"])
+        ]
+        spans = [word.get("span") or {} for word in words]
+        return cls(
+            text="".join(contents),
+            text_offsets=text_offsets,
+            points=np.array(coordinates, dtype=np.float32).reshape(-1, 2),
+            point_offsets=point_offsets,
+            span_offsets=np.array([s.get("offset", 0) for s in spans], dtype=np.int32),
+            span_lengths=np.array([s.get("length", 0) for s in spans], dtype=np.int32),
+            confidences=np.array(
+                [word["confidence"] for word in words], dtype=np.float32
+            ),
+        )
+
+    def __len__(self) -> int:
+        return len(self.confidences)
+
+    def content(self, index: int) -> str:
+        return self.text[self.text_offsets[index] : self.text_offsets[index + 1]]
+
+    def polygon(self, index: int) -> "np.ndarray":
+        return self.points[self.point_offsets[index] : self.point_offsets[index + 1]]
+
+    def bounding_boxes(self) -> "np.ndarray":
+        """`(n, 4)` float32 array of `x_min, y_min, x_max, y_max` per word."""
+        boxes = np.zeros((len(self), 4), dtype=np.float32)
+        has_points = self.point_offsets[1:] > self.point_offsets[:-1]
+        if not has_points.any():
+            return boxes
+        starts = self.point_offsets[:-1][has_points]
+        boxes[has_points, :2] = np.minimum.reduceat(self.points, starts)
+        boxes[has_points, 2:] = np.maximum.reduceat(self.points, starts)
+        return boxes
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (
+            self.text_offsets,
+            self.points,
+            self.point_offsets,
+            self.span_offsets,
+            self.span_lengths,
+            self.confidences,
+        )
+        return len(self.text.encode()) + sum(array.nbytes for array in arrays)
+
+    def to_json(self) -> List[Dict[str, Any]]:
+        """Expands back into the `words` list of the JSON response."""
+        return [
+            {
+                "content": self.content(i),
+                "polygon": [{"x": x, "y": y} for x, y in self.polygon(i).tolist()],
+                "span": {
+                    "offset": int(self.span_offsets[i]),
+                    "length": int(self.span_lengths[i]),
+                },
+                "confidence": float(self.confidences[i]),
+            }
+            for i in range(len(self))
+        ]
+
+    def to_words(self) -> List[Word]:
+        """Expands back into pydantic `Word` objects."""
+        return [Word.model_validate(word) for word in self.to_json()]
+
+
+class CompactPageTextResponse(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    page_number: int
+    media_type: str
+    page_text: str
+    status: str
+    classification: Classification
+    extracted_entities: List[ExtractedEntity]
+    redacted_summary: str
+    words: CompactWords
+
+    @field_serializer("words")
+    def _serialize_words(self, words: CompactWords) -> List[Dict[str, Any]]:
+        return words.to_json()
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "CompactPageTextResponse":
+        """Builds the response from the parsed JSON body.
+
+        The body is still parsed into plain dicts first; what is saved is
+        the memory held by the response afterwards, not the parsing peak.
+        """
+        data = dict(data)
+        data["words"] = CompactWords.from_json(data.get("words") or [])
+        return cls.model_validate(data)
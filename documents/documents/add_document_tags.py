@@ -0,0 +1,38 @@
+# python3 documents/documents/add_document_tags.py --document_id 66ff1732927ce8c0ebda42bd --tags finance 2024
+
+import sys
+import os
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from config_models import LoadConfigurations, ServiceType
+from documents.service import DocumentOperations
+from pprint import pprint
+
+if __name__ == "__main__":
+    configs = LoadConfigurations().set_config(service=ServiceType.DOCUMENT)
+    document_operation = DocumentOperations(configs=configs)
+    parser = argparse.ArgumentParser(description="Provide parameters for the script.")
+
+    parser.add_argument(
+        "--document_id",
+        type=str,
+        required=True,
+        help="Document ID",
+    )
+    parser.add_argument(
+        "--tags",
+        type=str,
+        nargs="+",
+        required=True,
+        help="Tags to add to the document",
+    )
+
+    args = parser.parse_args()
+
+    add_tags_response = document_operation.add_document_tags(
+        document_id=args.document_id,
+        tags=args.tags,
+    )
+    pprint(add_tags_response.model_dump())
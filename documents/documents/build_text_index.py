@@ -0,0 +1,85 @@
+# python3 documents/documents/build_text_index.py --index_path page_text.db --folder_ids 66f9cc8a927ce8c0ebda4260
+
+import sys
+import os
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from config_models import LoadConfigurations, ServiceType, get_bool_value, BOOL_CHOICES
+from documents.service import DocumentOperations, FolderOperations
+from documents.harvest import folder_document_ids, tenant_document_ids
+from documents.text_index import TextIndex
+
+if __name__ == "__main__":
+    configs = LoadConfigurations().set_config(service=ServiceType.DOCUMENT)
+    document_operation = DocumentOperations(configs=configs)
+    folder_operation = FolderOperations(
+        configs=configs, session=document_operation.session
+    )
+    parser = argparse.ArgumentParser(description="Provide parameters for the script.")
+
+    parser.add_argument(
+        "--index_path", type=str, required=True, help="Path of the index database"
+    )
+    parser.add_argument(
+        "--document_ids",
+        type=str,
+        nargs="+",
+        default=[],
+        required=False,
+        help="Documents to index",
+    )
+    parser.add_argument(
+        "--folder_ids",
+        type=str,
+        nargs="+",
+        default=[],
+        required=False,
+        help="Index every document of these folders",
+    )
+    parser.add_argument(
+        "--all_folders",
+        type=str,
+        default="false",
+        choices=BOOL_CHOICES,
+        required=False,
+        help="Index every document of every writable folder",
+    )
+    parser.add_argument(
+        "--refresh",
+        type=str,
+        default="false",
+        choices=BOOL_CHOICES,
+        required=False,
+        help="Re-index documents even if they have not changed",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        required=False,
+        help="Number of documents harvested in parallel",
+    )
+
+    args = parser.parse_args()
+
+    document_ids = list(args.document_ids)
+    document_ids += folder_document_ids(folder_operation, args.folder_ids)
+    if get_bool_value(args.all_folders):
+        document_ids += tenant_document_ids(folder_operation)
+
+    with TextIndex(args.index_path) as text_index:
+        result = text_index.index_documents(
+            document_operation,
+            list(dict.fromkeys(document_ids)),
+            refresh=get_bool_value(args.refresh),
+            document_concurrency=args.concurrency,
+        )
+        text_index.optimize()
+        print(
+            f"Indexed {len(result.document_ids)} documents, "
+            f"{len(text_index)} in index"
+        )
+        for doc_id, error in result.failed.items():
+            print(f"Failed {doc_id}: {error}")
@@ -0,0 +1,60 @@
+# python3 documents/documents/download_page_image.py --document_id 66f9ccbb927ce8c0ebda4261 --page_number 1
+
+import sys
+import os
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from config_models import LoadConfigurations, ServiceType, get_bool_value, BOOL_CHOICES
+from documents.service import DocumentOperations
+from documents.page_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, PageImageCache
+
+if __name__ == "__main__":
+    configs = LoadConfigurations().set_config(service=ServiceType.DOCUMENT)
+    parser = argparse.ArgumentParser(description="Provide parameters for the script.")
+
+    parser.add_argument(
+        "--document_id",
+        type=str,
+        required=True,
+        help="Document ID",
+    )
+    parser.add_argument(
+        "--page_number", type=int, required=True, help="Page number to be downloaded"
+    )
+    parser.add_argument(
+        "--cache_dir",
+        type=str,
+        default=DEFAULT_CACHE_DIR,
+        required=False,
+        help="Directory of the page image cache",
+    )
+    parser.add_argument(
+        "--max_bytes",
+        type=int,
+        default=DEFAULT_MAX_BYTES,
+        required=False,
+        help="Size limit of the page image cache in bytes",
+    )
+    parser.add_argument(
+        "--refresh",
+        type=str,
+        default="false",
+        choices=BOOL_CHOICES,
+        required=False,
+        help="Download the image again even if it is cached",
+    )
+
+    args = parser.parse_args()
+
+    document_operation = DocumentOperations(
+        configs=configs,
+        page_cache=PageImageCache(cache_dir=args.cache_dir, max_bytes=args.max_bytes),
+    )
+    cached_image = document_operation.download_page_image(
+        document_id=args.document_id,
+        page_number=args.page_number,
+        refresh=get_bool_value(args.refresh),
+    )
+    print(cached_image.path)
@@ -0,0 +1,65 @@
+# python3 documents/documents/get_pages.py --document_id 66f9ccbb927ce8c0ebda4261 --concurrency 16
+
+import sys
+import os
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from config_models import LoadConfigurations, ServiceType, get_bool_value, BOOL_CHOICES
+from documents.service import DocumentOperations
+from pprint import pprint
+
+if __name__ == "__main__":
+    configs = LoadConfigurations().set_config(service=ServiceType.DOCUMENT)
+    document_operation = DocumentOperations(configs=configs)
+    parser = argparse.ArgumentParser(description="Provide parameters for the script.")
+
+    parser.add_argument(
+        "--document_id",
+        type=str,
+        required=True,
+        help="Document ID",
+    )
+    parser.add_argument(
+        "--page_numbers",
+        type=int,
+        nargs="+",
+        default=None,
+        required=False,
+        help="Pages to fetch, all pages by default",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        required=False,
+        help="Number of pages fetched in parallel",
+    )
+    parser.add_argument(
+        "--text_and_words",
+        type=str,
+        default="false",
+        choices=BOOL_CHOICES,
+        required=False,
+        help="Fetch page text and words instead of page status",
+    )
+    parser.add_argument(
+        "--bounding_boxes",
+        type=str,
+        default="false",
+        choices=BOOL_CHOICES,
+        required=False,
+        help="Get information about bounding boxes",
+    )
+
+    args = parser.parse_args()
+
+    for page_response in document_operation.get_pages(
+        document_id=args.document_id,
+        page_numbers=args.page_numbers,
+        concurrency=args.concurrency,
+        text_and_words=get_bool_value(args.text_and_words),
+        bounding_boxes=get_bool_value(args.bounding_boxes),
+    ):
+        pprint(page_response.model_dump())
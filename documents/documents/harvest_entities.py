@@ -0,0 +1,80 @@
+# python3 documents/documents/harvest_entities.py --output entities.parquet --folder_ids 66f9cc8a927ce8c0ebda4260
+
+import sys
+import os
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from config_models import LoadConfigurations, ServiceType, get_bool_value, BOOL_CHOICES
+from documents.service import DocumentOperations, FolderOperations
+from documents.harvest import folder_document_ids
+from documents.entity_store import EntityStore
+
+if __name__ == "__main__":
+    configs = LoadConfigurations().set_config(service=ServiceType.DOCUMENT)
+    document_operation = DocumentOperations(configs=configs)
+    folder_operation = FolderOperations(
+        configs=configs, session=document_operation.session
+    )
+    parser = argparse.ArgumentParser(description="Provide parameters for the script.")
+
+    parser.add_argument(
+        "--output", type=str, required=True, help="Parquet file to create or update"
+    )
+    parser.add_argument(
+        "--document_ids",
+        type=str,
+        nargs="+",
+        default=[],
+        required=False,
+        help="Documents to harvest",
+    )
+    parser.add_argument(
+        "--folder_ids",
+        type=str,
+        nargs="+",
+        default=[],
+        required=False,
+        help="Harvest every document of these folders",
+    )
+    parser.add_argument(
+        "--refresh",
+        type=str,
+        default="false",
+        choices=BOOL_CHOICES,
+        required=False,
+        help="Fetch documents again even if they are already in the file",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        required=False,
+        help="Number of documents harvested in parallel",
+    )
+
+    args = parser.parse_args()
+
+    document_ids = list(args.document_ids)
+    document_ids += folder_document_ids(folder_operation, args.folder_ids)
+
+    entity_store = (
+        EntityStore.read_parquet(args.output)
+        if os.path.exists(args.output)
+        else EntityStore()
+    )
+    result = entity_store.add_documents(
+        document_operation,
+        document_ids,
+        refresh=get_bool_value(args.refresh),
+        document_concurrency=args.concurrency,
+        path=args.output,
+    )
+    entity_store.to_parquet(args.output)
+    print(
+        f"Fetched {len(result.document_ids)} documents, "
+        f"{len(entity_store)} entities in {args.output}"
+    )
+    for doc_id, error in result.failed.items():
+        print(f"Failed {doc_id}: {error}")
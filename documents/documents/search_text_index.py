@@ -0,0 +1,42 @@
+# python3 documents/documents/search_text_index.py --index_path page_text.db --query "invoice total"
+
+import sys
+import os
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from config_models import get_bool_value, BOOL_CHOICES
+from documents.text_index import TextIndex
+from pprint import pprint
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Provide parameters for the script.")
+
+    parser.add_argument(
+        "--index_path", type=str, required=True, help="Path of the index database"
+    )
+    parser.add_argument("--query", type=str, required=True, help="Words to search for")
+    parser.add_argument(
+        "--phrase",
+        type=str,
+        default="false",
+        choices=BOOL_CHOICES,
+        required=False,
+        help="Match the words as an exact phrase",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=20,
+        required=False,
+        help="Maximum number of pages returned",
+    )
+
+    args = parser.parse_args()
+
+    with TextIndex(args.index_path) as text_index:
+        for hit in text_index.search(
+            args.query, limit=args.limit, phrase=get_bool_value(args.phrase)
+        ):
+            pprint(hit.model_dump())
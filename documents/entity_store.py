@@ -0,0 +1,174 @@
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional
+
+from documents.harvest import HarvestResult, iter_document_pages
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+ENTITY_COLUMNS = [
+    "doc_id",
+    "page_number",
+    "entity_group",
+    "key",
+    "value",
+    "label",
+    "is_sensitive",
+]
+_CATEGORY_COLUMNS = ["doc_id", "entity_group", "key", "value", "label"]
+# Documents harvested between two merges into the table.
+CHUNK_SIZE = 200
+
+
+def _empty_columns() -> Dict[str, List[Any]]:
+    return {column: [] for column in ENTITY_COLUMNS}
+
+
+def _to_frame(columns: Dict[str, List[Any]]) -> "pd.DataFrame":
+    import pandas as pd
+
+    frame = pd.DataFrame(columns, columns=ENTITY_COLUMNS)
+    frame["page_number"] = frame["page_number"].astype("int32")
+    frame["is_sensitive"] = frame["is_sensitive"].astype(bool)
+    # Keys, labels and groups repeat on every page, so categorical columns
+    # store each distinct string once and become dictionary pages in parquet.
+    return frame.astype({column: "category" for column in _CATEGORY_COLUMNS})
+
+
+class EntityStore:
+    """Columnar table of the extracted entities of many documents.
+
+    One row per `EntityDetail`, with the columns in `ENTITY_COLUMNS`. String
+    columns are pandas categoricals, which `to_parquet` writes dictionary
+    encoded. `add_documents` harvests pages concurrently and only fetches
+    documents not in the table yet, so a saved table can be topped up
+    instead of rebuilt.
+    """
+
+    def __init__(self, frame: Optional["pd.DataFrame"] = None):
+        self.frame = frame if frame is not None else _to_frame(_empty_columns())
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def document_ids(self) -> List[str]:
+        return list(self.frame["doc_id"].unique())
+
+    @classmethod
+    def read_parquet(cls, path: str) -> "EntityStore":
+        import pandas as pd
+
+        _require_pyarrow()
+        frame = pd.read_parquet(path, engine="pyarrow")
+        return cls(frame.astype({column: "category" for column in _CATEGORY_COLUMNS}))
+
+    def to_parquet(self, path: str) -> None:
+        _require_pyarrow()
+        self.frame.to_parquet(path, engine="pyarrow", index=False, use_dictionary=True)
+
+    def add_pages(self, document_id: str, pages: Iterable[Any]) -> None:
+        """Replaces the rows of a document with the entities of `pages`.
+
+        `pages` are `GetPageStatusResponse` or `GetPageTextResponse` objects.
+        """
+        columns = _empty_columns()
+        _append_entities(columns, document_id, pages)
+        self._replace([document_id], columns)
+
+    def add_documents(
+        self,
+        document_operations,
+        document_ids: Iterable[str],
+        refresh: bool = False,
+        document_concurrency: int = 4,
+        page_concurrency: int = 8,
+        chunk_size: int = CHUNK_SIZE,
+        path: Optional[str] = None,
+    ) -> HarvestResult:
+        """Harvests entities with `get_pages` for documents not in the table yet.
+
+        With `refresh=True` every document is fetched again. Documents without
+        any entities leave no rows, so they are fetched on every call.
+
+        Fetched documents are merged into the table every `chunk_size`
+        documents, and the table is then saved to `path` if given, so an
+        interrupted harvest keeps what it fetched. A document whose requests
+        fail is skipped and keeps its earlier rows. The result lists the
+        fetched documents and the failed ones with their error.
+        """
+        known = set() if refresh else set(self.document_ids())
+        pending = [
+            doc_id for doc_id in dict.fromkeys(document_ids) if doc_id not in known
+        ]
+
+        def on_error(document_id: str, error: Exception) -> None:
+            result.failed[document_id] = f"{type(error).__name__}: {error}"
+
+        def merge() -> None:
+            self._replace(chunk, columns)
+            if path is not None:
+                self.to_parquet(path)
+            result.document_ids.extend(chunk)
+
+        result = HarvestResult()
+        chunk: List[str] = []
+        columns = _empty_columns()
+        for document, pages in iter_document_pages(
+            document_operations,
+            pending,
+            document_concurrency=document_concurrency,
+            page_concurrency=page_concurrency,
+            on_error=on_error,
+        ):
+            _append_entities(columns, document.id, pages)
+            chunk.append(document.id)
+            if len(chunk) >= chunk_size:
+                merge()
+                chunk, columns = [], _empty_columns()
+        if chunk:
+            merge()
+        return result
+
+    def _replace(self, document_ids: List[str], columns: Dict[str, List[Any]]) -> None:
+        import pandas as pd
+
+        kept = self.frame[~self.frame["doc_id"].isin(document_ids)]
+        if kept.empty or not columns["doc_id"]:
+            self.frame = (
+                _to_frame(columns) if kept.empty else kept.reset_index(drop=True)
+            )
+            return
+        # Concatenating categoricals with different categories falls back to
+        # object columns, so re-encode once after the concat.
+        combined = pd.concat([kept, _to_frame(columns)], ignore_index=True)
+        self.frame = combined.astype({c: "category" for c in _CATEGORY_COLUMNS})
+
+    def sensitive(self, document_ids: Optional[Iterable[str]] = None) -> "pd.DataFrame":
+        """Rows of sensitive entities, optionally limited to some documents."""
+        mask = self.frame["is_sensitive"]
+        if document_ids is not None:
+            mask = mask & self.frame["doc_id"].isin(list(document_ids))
+        return self.frame[mask]
+
+
+def _append_entities(
+    columns: Dict[str, List[Any]], document_id: str, pages: Iterable[Any]
+) -> None:
+    for page in pages:
+        for group in page.extracted_entities or []:
+            for entity in group.entities:
+                columns["doc_id"].append(document_id)
+                columns["page_number"].append(page.page_number)
+                columns["entity_group"].append(group.entity_group)
+                columns["key"].append(entity.key)
+                columns["value"].append(entity.value)
+                columns["label"].append(entity.label)
+                columns["is_sensitive"].append(entity.is_sensitive)
+
+
+def _require_pyarrow() -> None:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError(
+            "Parquet files need pyarrow, install it with `pip install pyarrow`"
+        ) from e
@@ -7,7 +7,7 @@ from pprint import pprint
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
-from config_models import LoadConfigurations, ServiceType
+from config_models import LoadConfigurations, ServiceType, BOOL_CHOICES, get_bool_value
 from documents.service import FormOperations
 from documents.models import ExecuteFormAnalyticsRequest
 
@@ -31,6 +31,14 @@ if __name__ == "__main__":
         required=False,
         help="Total number of documents to consider",
     )
+    parser.add_argument(
+        "--trusted",
+        type=str,
+        choices=BOOL_CHOICES,
+        default="False",
+        required=False,
+        help="Skip validation of the response for faster decoding",
+    )
 
     args = parser.parse_args()
 
@@ -39,6 +47,6 @@ if __name__ == "__main__":
         limit=args.limit,
     )
     execute_form_analytics_response = form_operation.execute_form_analytics(
-        form_id=args.form_id, form_data=body
+        form_id=args.form_id, form_data=body, trusted=get_bool_value(args.trusted)
     )
     pprint(execute_form_analytics_response.model_dump())
@@ -94,6 +94,14 @@ if __name__ == "__main__":
         required=False,
         help="If set to true, all instances are fetched",
     )
+    parser.add_argument(
+        "--trusted",
+        type=str,
+        choices=BOOL_CHOICES,
+        default="False",
+        required=False,
+        help="Skip validation of the response for faster decoding",
+    )
     args = parser.parse_args()
 
     body = FilterFormInstanceRequest(
@@ -108,5 +116,7 @@ if __name__ == "__main__":
         limit=args.limit,
         all=get_bool_value(args.all),
     )
-    form_create_response = form_operation.filter_form_instances(form_data=body)
+    form_create_response = form_operation.filter_form_instances(
+        form_data=body, trusted=get_bool_value(args.trusted)
+    )
     print(form_create_response.model_dump())
@@ -0,0 +1,77 @@
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from concurrency import imap_ordered
+from documents.models import CreateDocumentResponse
+
+
+class HarvestResult(BaseModel):
+    """Outcome of harvesting many documents.
+
+    `document_ids` lists the documents that were stored, `failed` maps the
+    documents whose requests failed to the error.
+    """
+
+    document_ids: List[str] = []
+    failed: Dict[str, str] = {}
+
+
+def folder_document_ids(folder_operations, folder_ids: Iterable[str]) -> List[str]:
+    """Document IDs of the given folders, without duplicates, in folder order."""
+    document_ids = {}
+    for folder_id in folder_ids:
+        folder = folder_operations.get_folder_definition(folder_id=folder_id)
+        document_ids.update(dict.fromkeys(folder.document_ids or []))
+    return list(document_ids)
+
+
+def tenant_document_ids(folder_operations) -> List[str]:
+    """Document IDs of every folder the current user can write to."""
+    folders = folder_operations.get_writable_folders().folders or []
+    return folder_document_ids(folder_operations, [folder.id for folder in folders])
+
+
+def iter_document_pages(
+    document_operations,
+    document_ids: Iterable[str],
+    document_concurrency: int = 4,
+    page_concurrency: int = 8,
+    should_fetch: Optional[Callable[[CreateDocumentResponse], bool]] = None,
+    on_error: Optional[Callable[[str, Exception], None]] = None,
+    **get_pages_kwargs: Any,
+) -> Iterator[Tuple[CreateDocumentResponse, List[Any]]]:
+    """Fetches the pages of many documents, yielding `(document, pages)` in input order.
+
+    Up to `document_concurrency` documents are harvested at once, each with up
+    to `page_concurrency` page requests in flight. When `should_fetch` returns
+    False for a document, its pages are not requested and `pages` is empty.
+    With `on_error`, a document whose requests fail is skipped and passed to
+    `on_error(document_id, error)` instead of ending the iteration. Remaining
+    keyword arguments are passed on to `DocumentOperations.get_pages`.
+    """
+
+    def harvest(document_id: str) -> Tuple[Any, Any]:
+        try:
+            document = document_operations.get_document(document_id=document_id)
+            if should_fetch is not None and not should_fetch(document):
+                return document, []
+            pages = document_operations.get_pages(
+                document_id=document_id,
+                page_numbers=sorted(page.page_number for page in document.pages),
+                concurrency=page_concurrency,
+                **get_pages_kwargs,
+            )
+            return document, list(pages)
+        except Exception as error:
+            if on_error is None:
+                raise
+            return document_id, error
+
+    for document, pages in imap_ordered(
+        harvest, document_ids, max_workers=document_concurrency
+    ):
+        if isinstance(pages, Exception):
+            on_error(document, pages)
+        else:
+            yield document, pages
@@ -318,6 +318,10 @@ class DocumentSummaryResponse(BaseModel):
     redacted_summary: Optional[str] = ""
 
 
+class UpdateDocumentTagsRequest(BaseModel):
+    tags_to_add: List[str]
+
+
 class CreateFolderRequest(BaseModel):
     name: str
     category: Optional[str] = ""
@@ -353,3 +357,10 @@ class WritableFolderData(BaseModel):
 
 class WritableFoldersResponse(BaseModel):
     folders: Optional[List[WritableFolderData]] = []
+
+
+class TextSearchHit(BaseModel):
+    doc_id: str
+    page_number: int
+    score: float
+    snippet: str
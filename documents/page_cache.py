@@ -0,0 +1,210 @@
+import hashlib
+import mmap
+import os
+import re
+import shutil
+import tempfile
+from threading import Lock
+from typing import Callable, Iterable, Optional
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "WEAV_PAGE_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "weav_ai", "pages"),
+)
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+# Document ids become directory names, so nothing that could leave the cache.
+_DOCUMENT_ID = re.compile(r"[A-Za-z0-9_-]+")
+_DIGEST = re.compile(r"[0-9a-f]{64}")
+
+
+class CachedPageImage:
+    """A page image stored in the cache.
+
+    `read()` returns the bytes; `open()` maps the file read-only so callers
+    can slice or hand the buffer to an image decoder without copying it.
+    """
+
+    def __init__(self, path: str, digest: str, size: int):
+        self.path = path
+        self.digest = digest
+        self.size = size
+
+    def __repr__(self) -> str:
+        return f"CachedPageImage(digest={self.digest!r}, size={self.size})"
+
+    def open(self) -> mmap.mmap:
+        with open(self.path, "rb") as f:
+            if self.size == 0:
+                raise ValueError(f"Cannot map empty file {self.path}")
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def read(self) -> bytes:
+        if self.size == 0:
+            return b""
+        with self.open() as mapped:
+            return mapped[:]
+
+
+class PageImageCache:
+    """Content-addressed on-disk cache of page images.
+
+    Image bytes are stored once under `objects/<sha256>`; `refs/<doc>/<page>`
+    holds the digest of the image for that page. Reads bump the object's
+    mtime, and whenever the cache grows past `max_bytes` the least recently
+    used objects are removed. A ref whose object was evicted is a cache miss.
+    An image larger than `max_bytes` on its own is refused.
+    """
+
+    def __init__(
+        self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES
+    ):
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be at least 1")
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._objects_dir = os.path.join(cache_dir, "objects")
+        self._refs_dir = os.path.join(cache_dir, "refs")
+        os.makedirs(self._objects_dir, exist_ok=True)
+        os.makedirs(self._refs_dir, exist_ok=True)
+        self._lock = Lock()
+        self._total: Optional[int] = None
+
+    def _ref_path(self, document_id: str, page_number: int) -> str:
+        if not _DOCUMENT_ID.fullmatch(document_id):
+            raise ValueError(f"Invalid document id: {document_id!r}")
+        return os.path.join(self._refs_dir, document_id, str(int(page_number)))
+
+    def _object_path(self, digest: str) -> str:
+        if not _DIGEST.fullmatch(digest):
+            raise ValueError(f"Invalid digest: {digest!r}")
+        return os.path.join(self._objects_dir, digest[:2], digest)
+
+    def get(self, document_id: str, page_number: int) -> Optional[CachedPageImage]:
+        ref_path = self._ref_path(document_id, page_number)
+        try:
+            with open(ref_path) as f:
+                digest = f.read().strip()
+            path = self._object_path(digest)
+            os.utime(path)
+            size = os.path.getsize(path)
+        except (FileNotFoundError, ValueError):
+            return None
+        return CachedPageImage(path, digest, size)
+
+    def put(
+        self, document_id: str, page_number: int, chunks: Iterable[bytes]
+    ) -> CachedPageImage:
+        """Streams `chunks` into the cache and points the page's ref at them.
+
+        Raises:
+            ValueError: Raised if the image alone is larger than `max_bytes`.
+        """
+        ref_path = self._ref_path(document_id, page_number)
+        hasher = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self._objects_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    if chunk:
+                        hasher.update(chunk)
+                        f.write(chunk)
+                        size += len(chunk)
+            if size > self.max_bytes:
+                raise ValueError(
+                    f"Page image of {size} bytes does not fit in a cache of "
+                    f"{self.max_bytes} bytes"
+                )
+            digest = hasher.hexdigest()
+            path = self._object_path(digest)
+            # Checking for the object, storing it and counting it happen
+            # together, so concurrent puts of the same image count it once.
+            with self._lock:
+                if self._total is None:
+                    self._total = sum(size for _, size, _ in self._objects())
+                if os.path.exists(path):
+                    os.remove(tmp_path)
+                    os.utime(path)
+                else:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.replace(tmp_path, path)
+                    self._total += size
+                self._write_ref(ref_path, digest)
+                over_limit = self._total > self.max_bytes
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if over_limit:
+            self.evict(keep=path)
+        return CachedPageImage(path, digest, size)
+
+    def _write_ref(self, ref_path: str, digest: str) -> None:
+        os.makedirs(os.path.dirname(ref_path), exist_ok=True)
+        fd, tmp_ref = tempfile.mkstemp(dir=os.path.dirname(ref_path))
+        with os.fdopen(fd, "w") as f:
+            f.write(digest)
+        os.replace(tmp_ref, ref_path)
+
+    def get_or_fetch(
+        self,
+        document_id: str,
+        page_number: int,
+        fetch: Callable[[], Iterable[bytes]],
+    ) -> CachedPageImage:
+        cached = self.get(document_id, page_number)
+        if cached is not None:
+            return cached
+        return self.put(document_id, page_number, fetch())
+
+    @property
+    def size(self) -> int:
+        with self._lock:
+            if self._total is None:
+                self._total = sum(size for _, size, _ in self._objects())
+            return self._total
+
+    def _objects(self):
+        for root, _, files in os.walk(self._objects_dir):
+            for name in files:
+                if name.endswith(".part"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """Removes least recently used objects until under `max_bytes`.
+
+        `keep`, the image just stored by `put`, is never removed. Returns the
+        number of bytes freed.
+        """
+        with self._lock:
+            objects = sorted(self._objects(), key=lambda entry: entry[2])
+            total = sum(size for _, size, _ in objects)
+            freed = 0
+            for path, size, _ in objects:
+                if total - freed <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+                freed += size
+            self._total = total - freed
+            return freed
+
+    def clear(self) -> None:
+        """Removes every object and ref."""
+        with self._lock:
+            for path, _, _ in list(self._objects()):
+                os.remove(path)
+            shutil.rmtree(self._refs_dir, ignore_errors=True)
+            os.makedirs(self._refs_dir, exist_ok=True)
+            self._total = 0
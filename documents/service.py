@@ -6,6 +6,8 @@ from documents.models import (
     FilterFormInstanceRequest,
     FilterFormInstanceResponse,
     FilterFormResponse,
+    Form,
+    FormInstanceDetail,
     GetFormDefinitonResponse,
     UpdateFormDefinitonRequest,
     DownloadQueryResultRequest,
@@ -19,27 +21,50 @@ from documents.models import (
     DocumentCategoriesResponse,
     DocumentTagResponse,
     DownloadQueryResultResponse,
+    UpdateDocumentTagsRequest,
     CreateFolderRequest,
     CreateFolderResponse,
     WritableFoldersResponse,
+    WritableFolderData,
 )
 from config_models import ServiceEndpoints, AUTHENTICATION_FAILED_MESSAGE
 from documents.exceptions import DocumentProcessingException
+from documents.page_cache import CHUNK_SIZE, CachedPageImage, PageImageCache
+from http_client import create_session, decode_response, json_loads, rename_id
+from concurrency import imap_ordered
+from json_stream import iter_response_items
+import os
 import requests
 import urllib.parse
-from typing import Optional, Dict, Any, Union
-import pandas as pd
+from typing import TYPE_CHECKING, Optional, Dict, Any, Iterator, List, Union
 from io import StringIO
 
+if TYPE_CHECKING:
+    import pandas as pd
+    from documents.compact_words import CompactPageTextResponse
+
+
+def _read_csv(text: str) -> "pd.DataFrame":
+    # pandas takes longer to import than everything else in this module, and
+    # only the CSV download paths need it.
+    import pandas as pd
+
+    return pd.read_csv(StringIO(text))
+
+
+def _rename_form_id(form: Dict[str, Any]) -> Dict[str, Any]:
+    return rename_id(form) if "_id" in form else form
+
 
 class FormOperations:
-    def __init__(self, configs):
+    def __init__(self, configs, session: Optional[requests.Session] = None):
         self.configs = configs
         self.endpoints = ServiceEndpoints()
+        self.session = session or create_session()
 
     def create_form(self, form_data: CreateFormRequest) -> CreateFormResponse:
         url = f"{self.configs.base_url}/{self.endpoints.CREATE_FORM}"
-        response = requests.post(
+        response = self.session.post(
             url=url,
             json=form_data.model_dump(),
             headers={"Authorization": f"Bearer {self.configs.auth_token}"},
@@ -62,11 +87,24 @@ class FormOperations:
                 message="Failed to create form",
                 response_data=response.json(),
             )
-        final_response = response.json()
-        final_response["id"] = final_response.pop("_id")
-        return CreateFormResponse.model_validate(final_response)
+        return decode_response(response, CreateFormResponse, prepare=rename_id)
 
     def filter_form(self, form_data: FilterFormRequest) -> FilterFormResponse:
+        response = self._request_filter_form(form_data)
+        return decode_response(
+            response,
+            FilterFormResponse,
+            prepare=lambda forms: {"forms": [_rename_form_id(form) for form in forms]},
+        )
+
+    def iter_forms(self, form_data: FilterFormRequest) -> Iterator[Form]:
+        """Like `filter_form`, but yields each form as soon as it is received."""
+        response = self._request_filter_form(form_data, stream=True)
+        yield from iter_response_items(response, model=Form, prepare=_rename_form_id)
+
+    def _request_filter_form(
+        self, form_data: FilterFormRequest, stream: bool = False
+    ) -> requests.Response:
         url = f"{self.configs.base_url}/{self.endpoints.FILTER_FORM}"
         params = [
             ("query", form_data.query),
@@ -80,9 +118,10 @@ class FormOperations:
                 for k, v in filtered_params
             ]
         )
-        response = requests.get(
+        response = self.session.get(
             url=f"{url}?{query_string}",
             headers={"Authorization": f"Bearer {self.configs.auth_token}"},
+            stream=stream,
         )
         if response.status_code == 401:
             raise DocumentProcessingException(
@@ -102,18 +141,17 @@ class FormOperations:
                 message="Failed to filter form data",
                 response_data=response.json(),
             )
-        response = response.json()
-        for item in response:
-            if "_id" in item:
-                item["id"] = item.pop("_id")
-        return FilterFormResponse(forms=response)
+        return response
 
     def execute_form_analytics(
-        self, form_id: str, form_data: ExecuteFormAnalyticsRequest
+        self,
+        form_id: str,
+        form_data: ExecuteFormAnalyticsRequest,
+        trusted: bool = False,
     ) -> ExecuteFormAnalyticsResponse:
         url = f"{self.configs.base_url}/{self.endpoints.EXECUTE_FORM_ANALYTICS.format(FORM_ID=form_id)}"
         final_data = {data[0]: data[1] for data in form_data if data[1]}
-        response = requests.post(
+        response = self.session.post(
             url=url,
             json=final_data,
             headers={
@@ -139,11 +177,27 @@ class FormOperations:
                 message="Failed to execute form analytics",
                 response_data=response.json(),
             )
-        return ExecuteFormAnalyticsResponse.model_validate(response.json())
+        return decode_response(response, ExecuteFormAnalyticsResponse, trusted=trusted)
 
     def filter_form_instances(
-        self, form_data: FilterFormInstanceRequest
+        self, form_data: FilterFormInstanceRequest, trusted: bool = False
     ) -> FilterFormInstanceResponse:
+        response = self._request_filter_form_instances(form_data)
+        return decode_response(response, FilterFormInstanceResponse, trusted=trusted)
+
+    def iter_form_instances(
+        self, form_data: FilterFormInstanceRequest, trusted: bool = False
+    ) -> Iterator[FormInstanceDetail]:
+        """Like `filter_form_instances`, but yields each instance as soon as it
+        is received, so memory stays flat for `all=True` on large tenants."""
+        response = self._request_filter_form_instances(form_data, stream=True)
+        yield from iter_response_items(
+            response, "form_instances", FormInstanceDetail, trusted=trusted
+        )
+
+    def _request_filter_form_instances(
+        self, form_data: FilterFormInstanceRequest, stream: bool = False
+    ) -> requests.Response:
         url = f"{self.configs.base_url}/{self.endpoints.FILTER_FORM_INSTANCES}"
         params = [
             ("scope", form_data.scope),
@@ -165,9 +219,10 @@ class FormOperations:
             ]
         )
 
-        response = requests.get(
+        response = self.session.get(
             url=f"{url}?{query_string}",
             headers={"Authorization": f"Bearer {self.configs.auth_token}"},
+            stream=stream,
         )
         if response.status_code == 401:
             raise DocumentProcessingException(
@@ -187,11 +242,11 @@ class FormOperations:
                 message="Failed to filter form instances",
                 response_data=response.json(),
             )
-        return FilterFormInstanceResponse.model_validate(response.json())
+        return response
 
     def get_form_definition(self, form_id: str) -> GetFormDefinitonResponse:
         url = f"{self.configs.base_url}/{self.endpoints.GET_FORM_DEFINITON.format(FORM_ID=form_id)}"
-        response = requests.get(
+        response = self.session.get(
             url=url,
             headers={"Authorization": f"Bearer {self.configs.auth_token}"},
         )
@@ -213,15 +268,13 @@ class FormOperations:
                 message="Failed to get form definition",
                 response_data=response.json(),
             )
-        final_response = response.json()
-        final_response["id"] = final_response.pop("_id")
-        return GetFormDefinitonResponse.model_validate(final_response)
+        return decode_response(response, GetFormDefinitonResponse, prepare=rename_id)
 
     def update_form_definition(
         self, form_id: str, form_data: UpdateFormDefinitonRequest
     ) -> GetFormDefinitonResponse:
         url = f"{self.configs.base_url}/{self.endpoints.UPDATE_FORM_DEFINITON.format(FORM_ID=form_id)}"
-        response = requests.put(
+        response = self.session.put(
             url=url,
             json=form_data.model_dump(),
             headers={"Authorization": f"Bearer {self.configs.auth_token}"},
@@ -244,13 +297,11 @@ class FormOperations:
                 message="Failed to update form instances",
                 response_data=response.json(),
             )
-        final_response = response.json()
-        final_response["id"] = final_response.pop("_id")
-        return GetFormDefinitonResponse.model_validate(final_response)
+        return decode_response(response, GetFormDefinitonResponse, prepare=rename_id)
 
     def delete_form_definition(self, form_id: str) -> GetFormDefinitonResponse:
         url = f"{self.configs.base_url}/{self.endpoints.DELETE_FORM_DEFINITON.format(FORM_ID=form_id)}"
-        response = requests.delete(
+        response = self.session.delete(
             url=url,
             headers={"Authorization": f"Bearer {self.configs.auth_token}"},
         )
@@ -266,16 +317,33 @@ class FormOperations:
                 message="Failed to delete form definition",
                 response_data=response.json(),
             )
-        final_response = response.json()
-        final_response["id"] = final_response.pop("_id")
-        return GetFormDefinitonResponse.model_validate(final_response)
+        return decode_response(response, GetFormDefinitonResponse, prepare=rename_id)
 
     def download_query_result(
         self, form_id: str, download_format: str, form_data: DownloadQueryResultRequest
-    ) -> Union[DownloadQueryResultResponse, pd.DataFrame]:
+    ) -> Union[DownloadQueryResultResponse, "pd.DataFrame"]:
+        response = self._request_query_result(form_id, download_format, form_data)
+        if download_format != "CSV":
+            return decode_response(response, DownloadQueryResultResponse)
+        return _read_csv(response.text)
+
+    def iter_query_result(
+        self, form_id: str, form_data: DownloadQueryResultRequest
+    ) -> Iterator[Dict[str, Any]]:
+        """Yields the documents of a JSON query result as they are received."""
+        response = self._request_query_result(form_id, "JSON", form_data, stream=True)
+        yield from iter_response_items(response, "docs")
+
+    def _request_query_result(
+        self,
+        form_id: str,
+        download_format: str,
+        form_data: DownloadQueryResultRequest,
+        stream: bool = False,
+    ) -> requests.Response:
         url = f"{self.configs.base_url}/{self.endpoints.DOWNLOAD_QUERY_RESULT.format(FORM_ID=form_id)}"
         params = [("download_format", download_format)]
-        response = requests.post(
+        response = self.session.post(
             url=url,
             params=params,
             json={"query": form_data.query},
@@ -283,6 +351,7 @@ class FormOperations:
                 "Authorization": f"Bearer {self.configs.auth_token}",
                 "Content-Type": "application/json",
             },
+            stream=stream,
         )
 
         if response.status_code == 401:
@@ -303,29 +372,48 @@ class FormOperations:
                 message="Failed to download form definition",
                 response_data=response.json(),
             )
-        if download_format != "CSV":
-            return DownloadQueryResultResponse.model_validate(response.json())
-        data = StringIO(response.text)
-        return pd.read_csv(data)
+        return response
 
 
 class DocumentOperations:
 
-    def __init__(self, configs):
+    def __init__(
+        self,
+        configs,
+        session: Optional[requests.Session] = None,
+        page_cache: Optional[PageImageCache] = None,
+    ):
         self.configs = configs
         self.endpoints = ServiceEndpoints()
+        self.session = session or create_session()
+        self._page_cache = page_cache
+
+    @property
+    def page_cache(self) -> PageImageCache:
+        if self._page_cache is None:
+            self._page_cache = PageImageCache()
+        return self._page_cache
 
     def create_document(
-        self, file_path: str, folder_id: Optional[str] = ""
+        self,
+        file_path: str,
+        folder_id: Optional[str] = "",
+        content_type: Optional[str] = None,
     ) -> CreateDocumentResponse:
         url = f"{self.configs.base_url}/{self.endpoints.CREATE_DOCUMENT}"
-        files = {"file_uploaded": open(file_path, "rb")}
         data = {"folder_id": folder_id} if folder_id else {}
         headers = {
             "Authorization": f"Bearer {self.configs.auth_token}",
             "Accept": "application/json",
         }
-        response = requests.post(url, headers=headers, files=files, data=data)
+        with open(file_path, "rb") as f:
+            if content_type:
+                files = {
+                    "file_uploaded": (os.path.basename(file_path), f, content_type)
+                }
+            else:
+                files = {"file_uploaded": f}
+            response = self.session.post(url, headers=headers, files=files, data=data)
 
         if response.status_code == 401:
             raise DocumentProcessingException(
@@ -346,9 +434,7 @@ class DocumentOperations:
                 response_data=response.json(),
             )
 
-        final_response = response.json()
-        final_response["id"] = final_response.pop("_id")
-        return CreateDocumentResponse.model_validate(final_response)
+        return decode_response(response, CreateDocumentResponse, prepare=rename_id)
 
     def get_page(
         self, document_id: str, page_number: int, bounding_boxes: Optional[bool] = False
@@ -359,7 +445,7 @@ class DocumentOperations:
         headers = {
             "Authorization": f"Bearer {self.configs.auth_token}",
         }
-        response = requests.get(
+        response = self.session.get(
             url, headers=headers, params=[("bounding_boxes", bounding_boxes)]
         )
 
@@ -388,11 +474,11 @@ class DocumentOperations:
                 response_data=response.json(),
             )
 
-        return GetPageStatusResponse.model_validate(response.json())
+        return decode_response(response, GetPageStatusResponse)
 
     def get_page_text_and_words(
-        self, document_id: str, page_number: int
-    ) -> GetPageTextResponse:
+        self, document_id: str, page_number: int, compact: bool = False
+    ) -> Union[GetPageTextResponse, "CompactPageTextResponse"]:
         url = (
             f"{self.configs.base_url}/{self.endpoints.GET_PAGE_TEXT_AND_WORDS}".format(
                 DOC_ID=document_id, PAGE_NUMBER=page_number
@@ -401,7 +487,7 @@ class DocumentOperations:
         headers = {
             "Authorization": f"Bearer {self.configs.auth_token}",
         }
-        response = requests.get(url, headers=headers)
+        response = self.session.get(url, headers=headers)
 
         if response.status_code == 401:
             raise DocumentProcessingException(
@@ -427,7 +513,93 @@ class DocumentOperations:
                 message="Failed to get page",
                 response_data=response.json(),
             )
-        return GetPageTextResponse.model_validate(response.json())
+        if compact:
+            from documents.compact_words import CompactPageTextResponse
+
+            return CompactPageTextResponse.from_json(json_loads(response.content))
+        return decode_response(response, GetPageTextResponse)
+
+    def get_pages(
+        self,
+        document_id: str,
+        page_numbers: Optional[List[int]] = None,
+        concurrency: int = 8,
+        text_and_words: bool = False,
+        bounding_boxes: Optional[bool] = False,
+        compact: bool = False,
+    ) -> Iterator[
+        Union[GetPageStatusResponse, GetPageTextResponse, "CompactPageTextResponse"]
+    ]:
+        """Fetches many pages of a document concurrently, yielding them in page order.
+
+        Args:
+            - document_id (str): The document to read.
+            - page_numbers (List[int]): Pages to fetch. Defaults to every page listed by `get_document`.
+            - concurrency (int): Maximum number of page requests in flight.
+            - text_and_words (bool): Fetch `get_page_text_and_words` instead of `get_page`.
+            - bounding_boxes (bool): Passed on to `get_page`.
+            - compact (bool): Passed on to `get_page_text_and_words`.
+
+        Raises:
+            DocumentProcessingException: Raised if the document or any page cannot be fetched.
+        """
+        if page_numbers is None:
+            document = self.get_document(document_id=document_id)
+            page_numbers = sorted(page.page_number for page in document.pages)
+
+        if text_and_words:
+
+            def fetch_page(page_number: int) -> GetPageTextResponse:
+                return self.get_page_text_and_words(
+                    document_id=document_id, page_number=page_number, compact=compact
+                )
+
+        else:
+
+            def fetch_page(page_number: int) -> GetPageStatusResponse:
+                return self.get_page(
+                    document_id=document_id,
+                    page_number=page_number,
+                    bounding_boxes=bounding_boxes,
+                )
+
+        return imap_ordered(fetch_page, page_numbers, max_workers=concurrency)
+
+    def download_page_image(
+        self, document_id: str, page_number: int, refresh: bool = False
+    ) -> CachedPageImage:
+        """Returns the image of a page from the local page cache, downloading it on a miss.
+
+        The image is streamed from the page's `download_url` straight to disk, so
+        it is never held in memory whole. Repeat calls for the same page do not
+        touch the network at all.
+
+        Args:
+            - document_id (str): The document the page belongs to.
+            - page_number (int): The page to download.
+            - refresh (bool): Download again even if the page is cached.
+
+        Raises:
+            DocumentProcessingException: Raised if the page or its image cannot be fetched.
+            ValueError: Raised if the image is larger than the whole page cache.
+        """
+        if not refresh:
+            cached = self.page_cache.get(document_id, page_number)
+            if cached is not None:
+                return cached
+
+        page = self.get_page(document_id=document_id, page_number=page_number)
+        # The download URL is pre-signed, so no Authorization header is sent.
+        with self.session.get(page.download_url, stream=True) as response:
+            if response.status_code != 200:
+                raise DocumentProcessingException(
+                    status_code=response.status_code,
+                    message="Failed to download page image",
+                    response_data=response.text,
+                )
+            return self.page_cache.put(
+                document_id, page_number, response.iter_content(CHUNK_SIZE)
+            )
 
     def get_page_level_status(self, document_id: str) -> PageLevelStatusResponse:
         url = f"{self.configs.base_url}/{self.endpoints.GET_PAGE_LEVEL_STATUS}".format(
@@ -436,7 +608,7 @@ class DocumentOperations:
         headers = {
             "Authorization": f"Bearer {self.configs.auth_token}",
         }
-        response = requests.get(url, headers=headers)
+        response = self.session.get(url, headers=headers)
 
         if response.status_code == 401:
             raise DocumentProcessingException(
@@ -462,7 +634,7 @@ class DocumentOperations:
                 message="Failed to get page level status",
                 response_data=response.json(),
             )
-        return PageLevelStatusResponse.model_validate(response.json())
+        return decode_response(response, PageLevelStatusResponse)
 
     def get_document_summary_status(self, document_id: str) -> DocumentSummaryResponse:
         url = f"{self.configs.base_url}/{self.endpoints.GET_DOCUMENT_SUMMARY_STATUS}".format(
@@ -471,7 +643,7 @@ class DocumentOperations:
         headers = {
             "Authorization": f"Bearer {self.configs.auth_token}",
         }
-        response = requests.get(url, headers=headers)
+        response = self.session.get(url, headers=headers)
 
         if response.status_code == 401:
             raise DocumentProcessingException(
@@ -497,7 +669,7 @@ class DocumentOperations:
                 message="Failed to get summary status",
                 response_data=response.json(),
             )
-        return DocumentSummaryResponse.model_validate(response.json())
+        return decode_response(response, DocumentSummaryResponse)
 
     def get_document(
         self, document_id: str, fill_pages: Optional[bool] = False
@@ -509,7 +681,7 @@ class DocumentOperations:
             "Authorization": f"Bearer {self.configs.auth_token}",
         }
         params = [("fill_pages", fill_pages)]
-        response = requests.get(url, params=params, headers=headers)
+        response = self.session.get(url, params=params, headers=headers)
 
         if response.status_code == 401:
             raise DocumentProcessingException(
@@ -535,9 +707,7 @@ class DocumentOperations:
                 message="Failed to get document",
                 response_data=response.json(),
             )
-        final_response = response.json()
-        final_response["id"] = final_response.pop("_id")
-        return CreateDocumentResponse.model_validate(final_response)
+        return decode_response(response, CreateDocumentResponse, prepare=rename_id)
 
     def get_document_hierarchy(self, document_id: str) -> DocumentHierarchyResponse:
         url = f"{self.configs.base_url}/{self.endpoints.GET_DOCUMENT_HIERARCHY}".format(
@@ -546,7 +716,7 @@ class DocumentOperations:
         headers = {
             "Authorization": f"Bearer {self.configs.auth_token}",
         }
-        response = requests.get(url, headers=headers)
+        response = self.session.get(url, headers=headers)
 
         if response.status_code == 401:
             raise DocumentProcessingException(
@@ -573,11 +743,11 @@ class DocumentOperations:
                 response_data=response.json(),
             )
 
-        return DocumentHierarchyResponse.model_validate(response.json())
+        return decode_response(response, DocumentHierarchyResponse)
 
     def download_form_instance(
         self, document_id: str, download_format: str
-    ) -> Union[Dict[str, Any], pd.DataFrame]:
+    ) -> Union[Dict[str, Any], "pd.DataFrame"]:
         url = f"{self.configs.base_url}/{self.endpoints.DOWNLOAD_FORM_INSTANCE}".format(
             DOC_ID=document_id
         )
@@ -585,7 +755,7 @@ class DocumentOperations:
             "Authorization": f"Bearer {self.configs.auth_token}",
         }
         params = [("download_format", download_format)]
-        response = requests.get(url, params=params, headers=headers)
+        response = self.session.get(url, params=params, headers=headers)
 
         if response.status_code == 401:
             raise DocumentProcessingException(
@@ -614,8 +784,7 @@ class DocumentOperations:
 
         if download_format != "CSV":
             return response.json()
-        data = StringIO(response.text)
-        return pd.read_csv(data)
+        return _read_csv(response.text)
 
     def get_document_categories(self) -> DocumentCategoriesResponse:
         url = f"{self.configs.base_url}/{self.endpoints.GET_DOCUMENT_CATEGORIES}"
@@ -623,7 +792,7 @@ class DocumentOperations:
             "Authorization": f"Bearer {self.configs.auth_token}",
         }
 
-        response = requests.get(url, headers=headers)
+        response = self.session.get(url, headers=headers)
 
         if response.status_code == 401:
             raise DocumentProcessingException(
@@ -649,7 +818,7 @@ class DocumentOperations:
                 message="Failed to get document categories",
                 response_data=response.json(),
             )
-        return DocumentCategoriesResponse(**response.json())
+        return decode_response(response, DocumentCategoriesResponse)
 
     def get_document_tags(self) -> DocumentTagResponse:
         url = f"{self.configs.base_url}/{self.endpoints.GET_DOCUMENT_TAGS}"
@@ -657,7 +826,7 @@ class DocumentOperations:
             "Authorization": f"Bearer {self.configs.auth_token}",
         }
 
-        response = requests.get(url, headers=headers)
+        response = self.session.get(url, headers=headers)
 
         if response.status_code == 401:
             raise DocumentProcessingException(
@@ -683,7 +852,47 @@ class DocumentOperations:
                 message="Failed to get document tags",
                 response_data=response.json(),
             )
-        return DocumentTagResponse(**response.json())
+        return decode_response(response, DocumentTagResponse)
+
+    def add_document_tags(
+        self, document_id: str, tags: List[str]
+    ) -> CreateDocumentResponse:
+        url = f"{self.configs.base_url}/{self.endpoints.UPDATE_DOCUMENT_TAGS.format(DOC_ID=document_id)}"
+        headers = {
+            "Authorization": f"Bearer {self.configs.auth_token}",
+            "Accept": "application/json",
+        }
+        response = self.session.patch(
+            url,
+            headers=headers,
+            json=UpdateDocumentTagsRequest(tags_to_add=tags).model_dump(),
+        )
+
+        if response.status_code == 401:
+            raise DocumentProcessingException(
+                status_code=response.status_code,
+                message=AUTHENTICATION_FAILED_MESSAGE,
+                response_data=response.json(),
+            )
+        elif response.status_code == 422:
+            raise DocumentProcessingException(
+                status_code=response.status_code,
+                message="Validation failed, ensure data entered is correct",
+                response_data=response.json(),
+            )
+        elif response.status_code == 404:
+            raise DocumentProcessingException(
+                status_code=response.status_code,
+                message="Failed to find document",
+                response_data=response.json(),
+            )
+        elif response.status_code != 200:
+            raise DocumentProcessingException(
+                status_code=response.status_code,
+                message="Failed to add document tags",
+                response_data=response.json(),
+            )
+        return decode_response(response, CreateDocumentResponse, prepare=rename_id)
 
     def trigger_document_summary(self, document_id: str) -> DocumentSummaryResponse:
         url = f"{self.configs.base_url}/{self.endpoints.TRIGGER_DOCUMENT_SUMMARY.format(DOC_ID=document_id)}"
@@ -691,7 +900,7 @@ class DocumentOperations:
             "Authorization": f"Bearer {self.configs.auth_token}",
         }
 
-        response = requests.post(url, headers=headers)
+        response = self.session.post(url, headers=headers)
 
         if response.status_code == 401:
             raise DocumentProcessingException(
@@ -717,13 +926,14 @@ class DocumentOperations:
                 message="Failed to trigger document summary",
                 response_data=response.json(),
             )
-        return DocumentSummaryResponse.model_validate(response.json())
+        return decode_response(response, DocumentSummaryResponse)
 
 
 class FolderOperations:
-    def __init__(self, configs):
+    def __init__(self, configs, session: Optional[requests.Session] = None):
         self.configs = configs
         self.endpoints = ServiceEndpoints()
+        self.session = session or create_session()
 
     def create_folder(
         self, folder_request: CreateFolderRequest
@@ -733,7 +943,9 @@ class FolderOperations:
             "Authorization": f"Bearer {self.configs.auth_token}",
             "Accept": "application/json",
         }
-        response = requests.post(url, headers=headers, json=folder_request.model_dump())
+        response = self.session.post(
+            url, headers=headers, json=folder_request.model_dump()
+        )
 
         if response.status_code == 401:
             raise DocumentProcessingException(
@@ -754,17 +966,28 @@ class FolderOperations:
                 response_data=response.json(),
             )
 
-        final_response = response.json()
-        final_response["id"] = final_response.pop("_id")
-        return CreateFolderResponse.model_validate(final_response)
+        return decode_response(response, CreateFolderResponse, prepare=rename_id)
 
     def get_writable_folders(self) -> WritableFoldersResponse:
+        response = self._request_writable_folders()
+        return decode_response(
+            response,
+            WritableFoldersResponse,
+            prepare=lambda folders: {"folders": folders},
+        )
+
+    def iter_writable_folders(self) -> Iterator[WritableFolderData]:
+        """Like `get_writable_folders`, but yields each folder as it is received."""
+        response = self._request_writable_folders(stream=True)
+        yield from iter_response_items(response, model=WritableFolderData)
+
+    def _request_writable_folders(self, stream: bool = False) -> requests.Response:
         url = f"{self.configs.base_url}/{self.endpoints.GET_WRITABLE_FOLDERS}"
         headers = {
             "Authorization": f"Bearer {self.configs.auth_token}",
             "Accept": "application/json",
         }
-        response = requests.get(url, headers=headers)
+        response = self.session.get(url, headers=headers, stream=stream)
 
         if response.status_code == 401:
             raise DocumentProcessingException(
@@ -784,8 +1007,7 @@ class FolderOperations:
                 message="Failed to get writable folder",
                 response_data=response.json(),
             )
-
-        return WritableFoldersResponse(folders=response.json())
+        return response
 
     def get_folder_definition(self, folder_id: str) -> CreateFolderResponse:
         url = f"{self.configs.base_url}/{self.endpoints.GET_FOLDER_DEFINITION.format(FOLDER_ID=folder_id)}"
@@ -793,7 +1015,7 @@ class FolderOperations:
             "Authorization": f"Bearer {self.configs.auth_token}",
             "Accept": "application/json",
         }
-        response = requests.get(url, headers=headers)
+        response = self.session.get(url, headers=headers)
 
         if response.status_code == 401:
             raise DocumentProcessingException(
@@ -813,6 +1035,4 @@ class FolderOperations:
                 message="Failed to get folder definition",
                 response_data=response.json(),
             )
-        final_response = response.json()
-        final_response["id"] = final_response.pop("_id")
-        return CreateFolderResponse.model_validate(final_response)
+        return decode_response(response, CreateFolderResponse, prepare=rename_id)
@@ -0,0 +1,245 @@
+import heapq
+import math
+import statistics
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from documents.models import ExtractedEntity, GetPageTextResponse, Word
+
+Box = Tuple[float, float, float, float]
+
+
+def polygon_bounds(polygon: Sequence[Any]) -> Box:
+    """Bounding box of a polygon given as `{x, y}` dicts, `[x, y]` pairs or a flat list."""
+    if polygon and isinstance(polygon[0], dict):
+        xs = [point["x"] for point in polygon]
+        ys = [point["y"] for point in polygon]
+    elif polygon and isinstance(polygon[0], (list, tuple)):
+        xs = [point[0] for point in polygon]
+        ys = [point[1] for point in polygon]
+    else:
+        xs, ys = polygon[0::2], polygon[1::2]
+    if not xs:
+        raise ValueError("Polygon has no points")
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def _distance(x: float, y: float, box: Box) -> float:
+    dx = max(box[0] - x, 0.0, x - box[2])
+    dy = max(box[1] - y, 0.0, y - box[3])
+    return math.hypot(dx, dy)
+
+
+class SpatialIndex:
+    """Uniform grid index over the bounding boxes of items on a page.
+
+    Each item is registered in every grid cell its box touches, so region
+    queries only look at the cells the region covers and nearest-item queries
+    search outwards ring by ring. The default cell size is twice the median
+    item size, which keeps a few items per cell on typical OCR pages.
+    """
+
+    def __init__(
+        self,
+        items: Sequence[Any],
+        boxes: Sequence[Box],
+        cell_size: Optional[float] = None,
+    ):
+        if len(items) != len(boxes):
+            raise ValueError("items and boxes must have the same length")
+        self.items = list(items)
+        self.boxes = [tuple(map(float, box)) for box in boxes]
+        if cell_size is None:
+            sizes = [max(b[2] - b[0], b[3] - b[1]) for b in self.boxes]
+            cell_size = 2 * statistics.median(sizes) if sizes else 1.0
+        self.cell_size = cell_size if cell_size > 0 else 1.0
+        self._cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        for index, box in enumerate(self.boxes):
+            for cell in self._cells_for(box):
+                self._cells[cell].append(index)
+        self._cell_bounds = (
+            (
+                min(cx for cx, _ in self._cells),
+                min(cy for _, cy in self._cells),
+                max(cx for cx, _ in self._cells),
+                max(cy for _, cy in self._cells),
+            )
+            if self._cells
+            else (0, 0, 0, 0)
+        )
+
+    @classmethod
+    def from_words(
+        cls, words: Sequence[Word], cell_size: Optional[float] = None
+    ) -> "SpatialIndex":
+        """Indexes the words that have a polygon; words without one are left out."""
+        words = [word for word in words if word.polygon]
+        return cls(words, [polygon_bounds(word.polygon) for word in words], cell_size)
+
+    @classmethod
+    def from_page_text(
+        cls, page: GetPageTextResponse, cell_size: Optional[float] = None
+    ) -> "SpatialIndex":
+        """Indexes the words of a `get_page_text_and_words` response (plain or compact).
+
+        Compact words are indexed by their position in `page.words`. As in
+        `from_words`, words without a polygon are left out.
+        """
+        words = page.words
+        if hasattr(words, "bounding_boxes"):
+            offsets = words.point_offsets
+            (indices,) = (offsets[1:] > offsets[:-1]).nonzero()
+            boxes = words.bounding_boxes()[indices]
+            return cls(indices.tolist(), boxes.tolist(), cell_size)
+        return cls.from_words(words, cell_size)
+
+    @classmethod
+    def from_entities(
+        cls,
+        extracted_entities: Sequence[ExtractedEntity],
+        cell_size: Optional[float] = None,
+    ) -> "SpatialIndex":
+        """Indexes the `EntityDetail` polygons returned by `get_page(bounding_boxes=True)`."""
+        entities = [
+            entity
+            for group in extracted_entities
+            for entity in group.entities
+            if entity.polygon
+        ]
+        return cls(
+            entities, [polygon_bounds(entity.polygon) for entity in entities], cell_size
+        )
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def _cell_range(self, x_min, y_min, x_max, y_max) -> Iterator[Tuple[int, int]]:
+        size = self.cell_size
+        for cx in range(math.floor(x_min / size), math.floor(x_max / size) + 1):
+            for cy in range(math.floor(y_min / size), math.floor(y_max / size) + 1):
+                yield cx, cy
+
+    def _cells_for(self, box: Box) -> Iterator[Tuple[int, int]]:
+        return self._cell_range(*box)
+
+    def within(
+        self,
+        x_min: float,
+        y_min: float,
+        x_max: float,
+        y_max: float,
+        fully_inside: bool = False,
+    ) -> List[Any]:
+        """Items whose box intersects the rectangle (or lies inside it)."""
+        matches = set()
+        for cell in self._cell_range(x_min, y_min, x_max, y_max):
+            for index in self._cells.get(cell, ()):
+                box = self.boxes[index]
+                if fully_inside:
+                    hit = (
+                        box[0] >= x_min
+                        and box[1] >= y_min
+                        and box[2] <= x_max
+                        and box[3] <= y_max
+                    )
+                else:
+                    hit = (
+                        box[0] <= x_max
+                        and box[2] >= x_min
+                        and box[1] <= y_max
+                        and box[3] >= y_min
+                    )
+                if hit:
+                    matches.add(index)
+        return [self.items[index] for index in sorted(matches)]
+
+    def nearest(
+        self, x: float, y: float, k: int = 1, max_distance: Optional[float] = None
+    ) -> List[Tuple[Any, float]]:
+        """Up to `k` `(item, distance)` pairs closest to the point, nearest first."""
+        if not self.items or k < 1:
+            return []
+        size = self.cell_size
+        cx, cy = math.floor(x / size), math.floor(y / size)
+        min_cx, min_cy, max_cx, max_cy = self._cell_bounds
+        max_ring = max(
+            abs(cx - min_cx), abs(cx - max_cx), abs(cy - min_cy), abs(cy - max_cy)
+        )
+        seen = set()
+        best: List[Tuple[float, int]] = []
+        for ring in range(max_ring + 1):
+            for cell in self._ring(cx, cy, ring):
+                for index in self._cells.get(cell, ()):
+                    if index not in seen:
+                        seen.add(index)
+                        best.append((_distance(x, y, self.boxes[index]), index))
+            best = heapq.nsmallest(k, best)
+            # Anything in a further ring is at least `ring * size` away.
+            if len(best) == k and best[-1][0] <= ring * size:
+                break
+            if max_distance is not None and ring * size > max_distance:
+                break
+        return [
+            (self.items[index], distance)
+            for distance, index in best
+            if max_distance is None or distance <= max_distance
+        ]
+
+    @staticmethod
+    def _ring(cx: int, cy: int, ring: int) -> Iterator[Tuple[int, int]]:
+        if ring == 0:
+            yield cx, cy
+            return
+        for dx in range(-ring, ring + 1):
+            yield cx + dx, cy - ring
+            yield cx + dx, cy + ring
+        for dy in range(-ring + 1, ring):
+            yield cx - ring, cy + dy
+            yield cx + ring, cy + dy
+
+    def group_lines(self, min_overlap: float = 0.5) -> List[List[Any]]:
+        """Groups items into text lines, top to bottom, each sorted left to right.
+
+        An item joins a line when its vertical extent overlaps the line's by at
+        least `min_overlap` of the smaller height.
+        """
+        order = sorted(
+            range(len(self.items)), key=lambda i: (self.boxes[i][1] + self.boxes[i][3])
+        )
+        lines: List[Tuple[float, float, List[int]]] = []
+        for index in order:
+            _, top, _, bottom = self.boxes[index]
+            if lines:
+                line_top, line_bottom, members = lines[-1]
+                overlap = min(bottom, line_bottom) - max(top, line_top)
+                height = min(bottom - top, line_bottom - line_top)
+                if overlap >= min_overlap * height:
+                    lines[-1] = (min(top, line_top), max(bottom, line_bottom), members)
+                    members.append(index)
+                    continue
+            lines.append((top, bottom, [index]))
+        return [
+            [self.items[i] for i in sorted(members, key=lambda i: self.boxes[i][0])]
+            for _, _, members in lines
+        ]
+
+    def group_columns(self, gap: float = 0.0) -> List[List[Any]]:
+        """Groups items into columns of overlapping horizontal extent, left to right.
+
+        Items closer than `gap` horizontally are merged into the same column.
+        Each column is sorted top to bottom.
+        """
+        order = sorted(range(len(self.items)), key=lambda i: self.boxes[i][0])
+        columns: List[Tuple[float, List[int]]] = []
+        for index in order:
+            left, _, right, _ = self.boxes[index]
+            if columns and left <= columns[-1][0] + gap:
+                column_right, members = columns[-1]
+                columns[-1] = (max(column_right, right), members)
+                members.append(index)
+            else:
+                columns.append((right, [index]))
+        return [
+            [self.items[i] for i in sorted(members, key=lambda i: self.boxes[i][1])]
+            for _, members in columns
+        ]
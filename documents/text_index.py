@@ -0,0 +1,231 @@
+import re
+import sqlite3
+from threading import Lock
+from typing import Iterable, List, Optional, Tuple
+
+from documents.harvest import HarvestResult, iter_document_pages
+from documents.models import CreateDocumentResponse, TextSearchHit
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    doc_id TEXT NOT NULL,
+    page_number INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_doc_id ON pages (doc_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS page_text USING fts5(
+    text,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS indexed_documents (
+    doc_id TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    page_count INTEGER NOT NULL
+);
+"""
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def _quote(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _document_fingerprint(document: CreateDocumentResponse) -> str:
+    pages = ",".join(
+        f"{page.page_number}:{page.status}"
+        for page in sorted(document.pages, key=lambda page: page.page_number)
+    )
+    return f"{document.status}|{pages}"
+
+
+class TextIndex:
+    """Persistent full-text index over the page text of documents.
+
+    Backed by an SQLite FTS5 table, so searches are ranked with BM25 and
+    phrase queries are answered from the positional index. Each document is
+    stored with a fingerprint of its status and page statuses; re-indexing
+    skips documents whose fingerprint has not changed, and replaces all pages
+    of those that have.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(_SCHEMA)
+        self._lock = Lock()
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self) -> "TextIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._connection.execute(
+                "SELECT COUNT(*) FROM indexed_documents"
+            ).fetchone()
+        return count
+
+    def __contains__(self, doc_id: str) -> bool:
+        return self.fingerprint(doc_id) is not None
+
+    def document_ids(self) -> List[str]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT doc_id FROM indexed_documents ORDER BY doc_id"
+            ).fetchall()
+        return [doc_id for (doc_id,) in rows]
+
+    def fingerprint(self, doc_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT fingerprint FROM indexed_documents WHERE doc_id = ?", (doc_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def add_document(
+        self,
+        doc_id: str,
+        pages: Iterable[Tuple[int, str]],
+        fingerprint: str = "",
+    ) -> None:
+        """Replaces the indexed pages of a document with `(page_number, text)` pairs."""
+        pages = list(pages)
+        with self._lock, self._connection:
+            self._delete_pages(doc_id)
+            for page_number, text in pages:
+                cursor = self._connection.execute(
+                    "INSERT INTO pages (doc_id, page_number) VALUES (?, ?)",
+                    (doc_id, page_number),
+                )
+                self._connection.execute(
+                    "INSERT INTO page_text (rowid, text) VALUES (?, ?)",
+                    (cursor.lastrowid, text or ""),
+                )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO indexed_documents VALUES (?, ?, ?)",
+                (doc_id, fingerprint, len(pages)),
+            )
+
+    def _delete_pages(self, doc_id: str) -> None:
+        self._connection.execute(
+            "DELETE FROM page_text WHERE rowid IN"
+            " (SELECT id FROM pages WHERE doc_id = ?)",
+            (doc_id,),
+        )
+        self._connection.execute("DELETE FROM pages WHERE doc_id = ?", (doc_id,))
+
+    def remove_document(self, doc_id: str) -> None:
+        with self._lock, self._connection:
+            self._delete_pages(doc_id)
+            self._connection.execute(
+                "DELETE FROM indexed_documents WHERE doc_id = ?", (doc_id,)
+            )
+
+    def index_documents(
+        self,
+        document_operations,
+        document_ids: Iterable[str],
+        refresh: bool = False,
+        document_concurrency: int = 4,
+        page_concurrency: int = 8,
+    ) -> HarvestResult:
+        """Harvests page text with `get_pages` and indexes new or changed documents.
+
+        Each document is committed as soon as it is indexed. A document whose
+        requests fail (e.g. one deleted meanwhile) is skipped and reported in
+        the result's `failed`, so one bad document does not stop the run.
+        """
+
+        def should_fetch(document: CreateDocumentResponse) -> bool:
+            return refresh or self.fingerprint(document.id) != _document_fingerprint(
+                document
+            )
+
+        def on_error(document_id: str, error: Exception) -> None:
+            result.failed[document_id] = f"{type(error).__name__}: {error}"
+
+        result = HarvestResult()
+        for document, pages in iter_document_pages(
+            document_operations,
+            document_ids,
+            document_concurrency=document_concurrency,
+            page_concurrency=page_concurrency,
+            should_fetch=should_fetch,
+            on_error=on_error,
+        ):
+            if not pages and document.pages:
+                continue
+            self.add_document(
+                document.id,
+                ((page.page_number, page.page_text) for page in pages),
+                fingerprint=_document_fingerprint(document),
+            )
+            result.document_ids.append(document.id)
+        return result
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        phrase: bool = False,
+        raw: bool = False,
+        doc_ids: Optional[Iterable[str]] = None,
+    ) -> List[TextSearchHit]:
+        """Pages matching `query`, best BM25 score first.
+
+        By default every word of `query` must appear on the page. With
+        `phrase=True` the words must appear next to each other in order, and
+        with `raw=True` the query is passed to FTS5 as-is (`OR`, `NEAR`,
+        prefix `term*` and so on).
+        """
+        if raw:
+            match = query
+        elif phrase:
+            match = _quote(" ".join(_TOKEN.findall(query)))
+        else:
+            match = " ".join(_quote(term) for term in _TOKEN.findall(query))
+        if not match.strip() or match == '""':
+            return []
+
+        sql = (
+            "SELECT pages.doc_id, pages.page_number, bm25(page_text),"
+            " snippet(page_text, 0, '[', ']', '...', 12)"
+            " FROM page_text JOIN pages ON pages.id = page_text.rowid"
+            " WHERE page_text MATCH ?"
+        )
+        params: list = [match]
+        if doc_ids is not None:
+            doc_ids = list(doc_ids)
+            sql += f" AND pages.doc_id IN ({','.join('?' * len(doc_ids))})"
+            params.extend(doc_ids)
+        sql += " ORDER BY bm25(page_text) LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            rows = self._connection.execute(sql, params).fetchall()
+        # FTS5 scores are negative, lower is better; flip them for callers.
+        return [
+            TextSearchHit(
+                doc_id=doc_id,
+                page_number=int(page_number),
+                score=-score,
+                snippet=snippet,
+            )
+            for doc_id, page_number, score, snippet in rows
+        ]
+
+    def optimize(self) -> None:
+        """Merges the FTS index segments; worth running after a large harvest."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT INTO page_text (page_text) VALUES ('optimize')"
+            )
@@ -1,155 +1,404 @@
-import requests
+# python3 weav_ai_uploader.py --config config.json
+
+import argparse
+import itertools
 import json
 import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from config_models import ServiceType, build_config
+from documents.service import DocumentOperations
+from http_client import create_session
+from ingestion import RetryPolicy
+from journal import DONE, FAILED, JobJournal
+
+DEFAULT_JOURNAL = "upload_journal.db"
+DEFAULT_WORKERS = 8
+DEFAULT_TAG_WORKERS = 4
+# Tags are patched in batches of at most this many documents of one folder.
+TAG_BATCH_SIZE = 100
+REPORT_INTERVAL = 5.0
+
+MIME_TYPES = {
+    ".pdf": "application/pdf",
+    ".tiff": "image/tiff",
+    ".tif": "image/tiff",
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ".xls": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".doc": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".pptx": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    ".ppt": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".txt": "text/plain",
+    ".csv": "text/csv",
+}
+
 
 class Config:
-    def __init__(self, filename='config.json'):
+    def __init__(self, filename="config.json"):
         self.config = self.load_config(filename)
 
     def load_config(self, filename):
-        with open(filename, 'r') as f:
-            return json.load(f).get('config', {})
+        with open(filename, "r") as f:
+            return json.load(f).get("config", {})
 
-    def get(self, key):
-        return self.config.get(key)
+    def get(self, key, default=None):
+        return self.config.get(key, default)
 
-def get_source_files(source_files_folder, upload_subfolders=False, ignore_files=[]):
+
+def get_source_files(
+    source_files_folder: str,
+    upload_subfolders: bool = False,
+    ignore_files: Optional[List[str]] = None,
+    allowed_file_types: Optional[List[str]] = None,
+) -> Optional[List[Tuple[str, int]]]:
+    """Returns `(path, size)` of every file to upload, grouped by folder."""
     print(f"Getting files from {source_files_folder}")
-    # check if the folder exists
-    if not os.path.exists(source_files_folder):
+    if not os.path.isdir(source_files_folder):
         print(f"Folder {source_files_folder} does not exist.")
         return None
 
-    # get a list of all files in the folder and subfolders
-    if upload_subfolders:
-        file_list = [os.path.join(root, file) for root, dirs, files in os.walk(source_files_folder) for file in files]
-    else:
-        file_list = [os.path.join(source_files_folder, file) for file in os.listdir(source_files_folder) if os.path.isfile(os.path.join(source_files_folder, file))]
-    print(f"Files found: {file_list}")
-    
-    # If the file names contain any part of the string in ignore_files list, remove them
-    if ignore_files:
-        file_list = [file for file in file_list if not any(ignore in file for ignore in ignore_files)]
+    file_list = []
+    skipped = 0
+    for root, dirs, files in os.walk(source_files_folder):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            # Skip names containing any of the ignore_files strings.
+            if ignore_files and any(ignore in path for ignore in ignore_files):
+                continue
+            if allowed_file_types and name.split(".")[-1] not in allowed_file_types:
+                skipped += 1
+                continue
+            try:
+                file_list.append((path, os.path.getsize(path)))
+            except OSError:
+                skipped += 1
+        if not upload_subfolders:
+            break
 
+    if skipped:
+        print(f"Skipping {skipped} files of other types or that cannot be read.")
+    print(f"Files found: {len(file_list)}")
     return file_list
 
-def get_mime_type(file):
-    ext = os.path.splitext(file)[1]
-    if ext == '.pdf':
-        return 'application/pdf'
-    elif ext == '.tiff' or ext == '.tif':
-        return 'image/tiff'
-    elif ext == '.xlsx' or ext == '.xls':
-        return 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    elif ext == '.docx' or ext == '.doc':
-        return 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-    elif ext == '.pptx' or ext == '.ppt':
-        return 'application/vnd.openxmlformats-officedocument.presentationml.presentation'
-    elif ext == '.jpg' or ext == '.jpeg':
-        return 'image/jpeg'
-    elif ext == '.png':
-        return 'image/png'
-    elif ext == '.txt':
-        return 'text/plain'
-    elif ext == '.csv':
-        return 'text/csv'
-    else:
-        return 'application/octet-stream'  # generic binary data
-
-def upload_files(files_list, token, base_weav_url, destination_folder_id, allowed_file_types, folder_tags=False):
-    
-    print(f"files to upload: {files_list}")
-    url = f"{base_weav_url}/file-service/documents/"
-    # print(f"Uploading files to {url}")
-
-    headers = {
-    'accept': 'application/json',
-    'Authorization': f"Bearer {token}"
-    }
-    data = {
-        'folder_id': destination_folder_id
-    }
-
-    for file in files_list:
-        # check if the file type is allowed
-        if file.split('.')[-1] not in allowed_file_types:
-            print(f"{file} : Invalid file type. Skipping.")
-            continue
+
+def get_mime_type(file: str) -> str:
+    ext = os.path.splitext(file)[1].lower()
+    return MIME_TYPES.get(ext, "application/octet-stream")  # generic binary data
+
+
+@lru_cache(maxsize=None)
+def get_folder_tags(folder: str) -> List[str]:
+    """The root directory and subdirectories of a folder, used as tags."""
+    return [tag for tag in folder.replace("\\", "/").split("/") if tag]
+
+
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+class Progress:
+    """Tracks finished files and uploaded bytes and reports throughput.
+
+    The ETA is based on the bytes still to upload, since upload time grows
+    with file size; once everything is uploaded it is based on the files
+    still waiting for their tags.
+    """
+
+    def __init__(self, total_files: int, total_bytes: int):
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.files = 0
+        self.failed = 0
+        self.bytes = 0
+        self.started_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def uploaded(self, size: int) -> None:
+        with self._lock:
+            self.bytes += size
+
+    def finished(self, failed: bool = False) -> None:
+        with self._lock:
+            self.files += 1
+            self.failed += failed
+
+    def upload_failed(self, size: int) -> None:
+        """Counts a file that failed to upload; its bytes are no longer expected."""
+        with self._lock:
+            self.total_bytes -= size
+            self.files += 1
+            self.failed += 1
+
+    def report(self) -> str:
+        with self._lock:
+            files, failed, uploaded = self.files, self.failed, self.bytes
+            total_bytes = self.total_bytes
+        elapsed = max(time.monotonic() - self.started_at, 1e-6)
+        file_rate = files / elapsed
+        byte_rate = uploaded / elapsed
+        if uploaded < total_bytes and byte_rate:
+            eta = format_duration((total_bytes - uploaded) / byte_rate)
+        elif files < self.total_files and file_rate:
+            eta = format_duration((self.total_files - files) / file_rate)
+        elif files >= self.total_files:
+            eta = format_duration(0)
+        else:
+            eta = "unknown"
+        return (
+            f"{files}/{self.total_files} files ({failed} failed) | "
+            f"{file_rate:.1f} files/s, {byte_rate / 1e6:.2f} MB/s | "
+            f"elapsed {format_duration(elapsed)}, ETA {eta}"
+        )
+
+
+class Uploader:
+    """Uploads files concurrently and tags them per folder, resumably.
+
+    Uploads run on a pool of `workers` threads. Once a document is uploaded
+    it is recorded in the journal as submitted with its document id, and
+    handed to a separate pool of `tag_workers` that adds its folder tags.
+    Tags are computed once per folder and patched in batches of up to
+    `TAG_BATCH_SIZE` documents of that folder. Failed uploads are never
+    tagged.
+
+    Running again with the same journal skips finished files, only tags
+    files that were uploaded but not tagged, and retries failed ones.
+    Connection errors, timeouts, 429 and 5xx responses are retried with
+    backoff, except for uploads: they are only retried when the request never
+    reached the server or was refused with 429 or 503, since the server may
+    have stored a file whose upload timed out.
+    """
+
+    def __init__(
+        self,
+        document_operations: DocumentOperations,
+        journal: JobJournal,
+        destination_folder_id: Optional[str] = "",
+        folder_tags: bool = False,
+        workers: int = DEFAULT_WORKERS,
+        tag_workers: int = DEFAULT_TAG_WORKERS,
+        retry: Optional[RetryPolicy] = None,
+        report_interval: float = REPORT_INTERVAL,
+    ):
+        self.document_operations = document_operations
+        self.journal = journal
+        self.destination_folder_id = destination_folder_id
+        self.folder_tags = folder_tags
+        self.workers = workers
+        self.tag_workers = tag_workers
+        self.retry = retry or RetryPolicy()
+        self.report_interval = report_interval
+        self.status_counts: Counter = Counter()
+        self.progress: Optional[Progress] = None
+
+    def _call(self, function, *args, idempotent: bool = True, **kwargs):
+        for attempt in itertools.count(1):
+            try:
+                return function(*args, **kwargs)
+            except Exception as e:
+                if not self.retry.should_retry(e, attempt, idempotent):
+                    raise
+                time.sleep(self.retry.delay(attempt))
+
+    def _upload(self, path: str, size: int) -> Optional[str]:
         try:
-            with open(file, 'rb') as f:
-                print(f"Uploading file {file}")
-                mime_type = get_mime_type(file)
-                # print(os.path.basename(file))
-                files = {"file_uploaded": (os.path.basename(file), f, mime_type)}
-                try:
-                    response = requests.post(url, headers=headers, files=files, data=data)
-                    print(response.json())
-                    # print(response.status_code)
-                    if response.status_code == 200:
-                        print(f"File {file} uploaded successfully.")
-                    else:
-                        print(f"Error uploading file {file}. Status code: {response.status_code}")
-                        print(response.json())
-                        continue
-                except Exception as e:
-                    print(f"Error uploading file {file}. {e}\nSkipping....")
-        except FileNotFoundError:
-            print(f"File {file} not found. Skipping....")
+            response = self._call(
+                self.document_operations.create_document,
+                file_path=path,
+                folder_id=self.destination_folder_id,
+                content_type=get_mime_type(path),
+                idempotent=False,
+            )
         except Exception as e:
-            print(f"Error opening file {file}. {e}\nSkipping....")
-        
-        # get the root directory and subdirectories as a list, and add them as tags
-        if folder_tags:
-
-            tags = []
-            if '/' in file:
-                tags = os.path.dirname(file).split('/')
-            elif '\\' in file:
-                tags = os.path.dirname(file).split('\\')
-            tags = [tag for tag in tags if tag]
-            tags_data = {"tags_to_add": tags}
-    
-            print(f"Tags: {tags}")
-
-            # add tags to the file
-            file_id = response.json().get('_id')
-            patch_url = f"{base_weav_url}/file-service/documents/{file_id}/tags"
-            patch_headers = {
-                'accept': 'application/json',
-                'Authorization': f"Bearer {token}",
-                'Content-Type': 'application/json'
-            }
+            self.journal.failed(path, f"Upload failed: {e}")
+            self.progress.upload_failed(size)
+            return None
+        self.progress.uploaded(size)
+        if self.folder_tags:
+            self.journal.submitted(path, server_id=response.id)
+        else:
+            self.journal.done(path, server_id=response.id)
+            self.progress.finished()
+        return response.id
+
+    def _tag_batch(self, folder: str, batch: List[Tuple[str, str]]) -> None:
+        tags = get_folder_tags(folder)
+        for path, doc_id in batch:
             try:
-                patch_response = requests.patch(patch_url, headers=patch_headers, json=tags_data)
-                if patch_response.status_code == 200:
-                    print(f"Tags added to file {file}")
-                else:
-                    print(f"Error adding tags to file {file}. Status code: {patch_response.status_code}")
-                    print(patch_response.json())
+                if tags:
+                    self._call(
+                        self.document_operations.add_document_tags,
+                        document_id=doc_id,
+                        tags=tags,
+                    )
             except Exception as e:
-                print(f"Error adding tags to file {file}. {e}")        
+                self.journal.failed(path, f"Adding tags failed: {e}")
+                self.progress.finished(failed=True)
+            else:
+                self.journal.done(path)
+                self.progress.finished()
+
+    def run(self, files: List[Tuple[str, int]]) -> Counter:
+        """Uploads and tags `files`, printing progress along the way."""
+        entries = {entry.key: entry for entry in self.journal.entries()}
+        uploads: List[Tuple[str, int]] = []
+        # Documents uploaded by an earlier run that still need their tags.
+        uploaded: Dict[str, List[Tuple[str, str]]] = {}
+        for path, size in files:
+            entry = entries.get(path)
+            if entry is not None and entry.state == DONE:
+                self.status_counts["skipped"] += 1
+            elif entry is not None and entry.server_id:
+                if self.folder_tags:
+                    folder = os.path.dirname(path)
+                    uploaded.setdefault(folder, []).append((path, entry.server_id))
+                else:
+                    self.journal.done(path)
+                    self.status_counts["skipped"] += 1
+            else:
+                uploads.append((path, size))
+        del entries
+        self.journal.add(path for path, _ in uploads)
+
+        remaining = Counter(os.path.dirname(path) for path, _ in uploads)
+        total_files = len(uploads) + sum(len(batch) for batch in uploaded.values())
+        self.progress = Progress(total_files, sum(size for _, size in uploads))
+        if self.status_counts["skipped"]:
+            print(f"Skipping {self.status_counts['skipped']} files already done.")
+
+        with ThreadPoolExecutor(
+            self.workers, thread_name_prefix="upload"
+        ) as upload_pool, ThreadPoolExecutor(
+            self.tag_workers, thread_name_prefix="tags"
+        ) as tag_pool:
+            pending = {}
+
+            def submit_tags(folder: str, flush: bool) -> None:
+                batch = uploaded.get(folder, [])
+                while len(batch) >= TAG_BATCH_SIZE or (flush and batch):
+                    chunk, batch = batch[:TAG_BATCH_SIZE], batch[TAG_BATCH_SIZE:]
+                    future = tag_pool.submit(self._tag_batch, folder, chunk)
+                    pending[future] = None
+                uploaded[folder] = batch
+
+            for folder in list(uploaded):
+                submit_tags(folder, flush=folder not in remaining)
+
+            queued = iter(uploads)
+            uploading = 0
+            last_report = time.monotonic()
+            while True:
+                # Keep the upload pool busy without queueing every file.
+                while uploading < 2 * self.workers:
+                    path, size = next(queued, (None, None))
+                    if path is None:
+                        break
+                    pending[upload_pool.submit(self._upload, path, size)] = path
+                    uploading += 1
+                if not pending:
+                    break
+
+                done, _ = wait(
+                    list(pending),
+                    timeout=self.report_interval,
+                    return_when=FIRST_COMPLETED,
+                )
+                for future in done:
+                    path = pending.pop(future)
+                    result = future.result()
+                    if path is None:
+                        continue
+                    uploading -= 1
+                    folder = os.path.dirname(path)
+                    remaining[folder] -= 1
+                    if result is not None and self.folder_tags:
+                        uploaded.setdefault(folder, []).append((path, result))
+                    submit_tags(folder, flush=remaining[folder] == 0)
+
+                if time.monotonic() - last_report >= self.report_interval:
+                    print(self.progress.report(), flush=True)
+                    last_report = time.monotonic()
+
+        print(self.progress.report(), flush=True)
+        self.status_counts["done"] = self.progress.files - self.progress.failed
+        self.status_counts["failed"] = self.progress.failed
+        return self.status_counts
 
 
 def main():
-    
-    config = Config()
-    try:
-        token = config.get('token')
-        base_weav_url = config.get('base_weav_url')
-        destination_folder_id = config.get('destination_folder_id')
-        allowed_file_types = config.get('allowed_file_types')
-        source_files_folder = config.get('source_file_folder')
-        upload_subfolders = config.get('upload_subfolders')
-        folder_tags = config.get('folder_tags')
-        ignore_files = config.get('ignore_files')
-    except KeyError:
-        print("Config file is missing required fields.\nIt should contain the following fields: token, base_weav_url, destination_folder_id, allowed_file_types")
-        return
-    
-    source_files_list = get_source_files(source_files_folder, upload_subfolders, ignore_files)
-
-    if source_files_list:
-        upload_files(source_files_list, token, base_weav_url, destination_folder_id, allowed_file_types, folder_tags)
+    parser = argparse.ArgumentParser(description="Upload a folder to weav.ai.")
+    parser.add_argument(
+        "--config",
+        type=str,
+        default="config.json",
+        required=False,
+        help="Path of the config file",
+    )
+    args = parser.parse_args()
+
+    config = Config(args.config)
+    token = config.get("token")
+    base_weav_url = config.get("base_weav_url")
+    source_files_folder = config.get("source_file_folder")
+    if not (token and base_weav_url and source_files_folder):
+        print(
+            "Config file is missing required fields.\nIt should contain the following fields: token, base_weav_url, source_file_folder"
+        )
+        return 1
+    destination_folder_id = config.get("destination_folder_id", "")
+    workers = config.get("workers", DEFAULT_WORKERS)
+
+    source_files_list = get_source_files(
+        source_files_folder,
+        config.get("upload_subfolders", True),
+        config.get("ignore_files"),
+        config.get("allowed_file_types"),
+    )
+    if not source_files_list:
+        return 0
+
+    configs = build_config(
+        env=base_weav_url.rstrip("/"), auth_token=token, service=ServiceType.DOCUMENT
+    )
+    document_operations = DocumentOperations(
+        configs=configs, session=create_session(pool_maxsize=workers)
+    )
+    with JobJournal(
+        config.get("journal", DEFAULT_JOURNAL),
+        job=f"upload:{destination_folder_id}",
+    ) as journal:
+        uploader = Uploader(
+            document_operations,
+            journal,
+            destination_folder_id=destination_folder_id,
+            folder_tags=config.get("folder_tags", False),
+            workers=workers,
+            tag_workers=config.get("tag_workers", DEFAULT_TAG_WORKERS),
+        )
+        status_counts = uploader.run(source_files_list)
+        print(
+            f"Done: {status_counts['done']}, failed: {status_counts['failed']}, "
+            f"skipped: {status_counts['skipped']}"
+        )
+        for entry in itertools.islice(journal.entries(FAILED), 20):
+            print(f"{entry.key}: {entry.error}")
+    return 1 if status_counts["failed"] else 0
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,167 @@
+import io
+from typing import Iterator
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# Connection-specific headers are not allowed in HTTP/2 requests.
+_HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-connection",
+    "transfer-encoding",
+    "upgrade",
+}
+CHUNK_SIZE = 64 * 1024
+
+
+def _require_httpx():
+    try:
+        import httpx
+    except ImportError as error:
+        raise ImportError(
+            "HTTP/2 sessions need httpx, install it with `pip install httpx[http2]`"
+        ) from error
+    return httpx
+
+
+class _ResponseStream(io.RawIOBase):
+    """`response.raw` for an httpx response, holding the decoded body.
+
+    `stream` yields chunks as they arrive instead of waiting for `amt` bytes,
+    so server-sent events are not held back.
+    """
+
+    def __init__(self, response):
+        self._response = response
+        self._chunks = response.iter_bytes()
+        self._pending = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if not self._pending:
+            self._pending = next(self._chunks, b"")
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+    def stream(self, amt: int = CHUNK_SIZE, decode_content=None) -> Iterator[bytes]:
+        if self._pending:
+            chunk, self._pending = self._pending, b""
+            yield chunk
+        for chunk in self._chunks:
+            if chunk:
+                yield chunk
+
+    def close(self) -> None:
+        self._response.close()
+        super().close()
+
+    def release_conn(self) -> None:
+        self.close()
+
+
+class HTTP2Adapter(BaseAdapter):
+    """Transport adapter that sends requests through an HTTP/2 `httpx.Client`.
+
+    Concurrent requests to the same host are multiplexed as streams over one
+    connection instead of using one connection each. HTTPS servers that do
+    not offer HTTP/2 are spoken to over HTTP/1.1; plain `http://` URLs use
+    HTTP/1.1 unless `http1=False`, which assumes the server speaks HTTP/2
+    (prior knowledge). TLS verification and client certificates are set per
+    adapter, not per request.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 32,
+        http1: bool = True,
+        verify=True,
+        cert=None,
+    ):
+        super().__init__()
+        httpx = _require_httpx()
+        self._httpx = httpx
+        self.client = httpx.Client(
+            http1=http1,
+            http2=True,
+            verify=verify,
+            cert=cert,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            follow_redirects=False,
+            trust_env=False,
+        )
+
+    def send(
+        self,
+        request: requests.PreparedRequest,
+        stream: bool = False,
+        timeout=None,
+        verify=True,
+        cert=None,
+        proxies=None,
+    ) -> requests.Response:
+        httpx = self._httpx
+        headers = [
+            (name, value)
+            for name, value in request.headers.items()
+            if name.lower() not in _HOP_BY_HOP_HEADERS
+        ]
+        body = request.body
+        if hasattr(body, "read"):
+            reader = body
+            body = iter(lambda: reader.read(CHUNK_SIZE), b"")
+        try:
+            response = self.client.send(
+                self.client.build_request(
+                    request.method,
+                    request.url,
+                    headers=headers,
+                    content=body,
+                    timeout=self._timeout(timeout),
+                ),
+                stream=True,
+            )
+        except httpx.ConnectTimeout as error:
+            raise requests.exceptions.ConnectTimeout(error, request=request)
+        except httpx.TimeoutException as error:
+            raise requests.exceptions.Timeout(error, request=request)
+        except httpx.TransportError as error:
+            raise requests.exceptions.ConnectionError(error, request=request)
+        return self.build_response(request, response, stream)
+
+    def _timeout(self, timeout):
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return self._httpx.Timeout(read, connect=connect)
+        return self._httpx.Timeout(timeout)
+
+    def build_response(
+        self, request: requests.PreparedRequest, response, stream: bool
+    ) -> requests.Response:
+        result = requests.Response()
+        result.status_code = response.status_code
+        result.reason = response.reason_phrase
+        result.headers = CaseInsensitiveDict(response.headers)
+        result.encoding = get_encoding_from_headers(result.headers)
+        result.raw = _ResponseStream(response)
+        result.url = request.url
+        result.request = request
+        result.connection = self
+        if not stream:
+            try:
+                result.content
+            except self._httpx.TransportError as error:
+                raise requests.exceptions.ConnectionError(error, request=request)
+        return result
+
+    def close(self) -> None:
+        self.client.close()
@@ -0,0 +1,265 @@
+import gzip
+import json
+import os
+import sys
+import types
+from functools import lru_cache
+from time import perf_counter
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Optional,
+    Type,
+    TypeVar,
+    Union,
+    get_args,
+    get_origin,
+)
+
+import requests
+import urllib3
+from pydantic import BaseModel
+from requests.adapters import HTTPAdapter
+
+from config_models import get_bool_value
+
+if TYPE_CHECKING:
+    from instrumentation import Instrumentation
+
+DEFAULT_POOL_SIZE = 32
+# JSON request bodies at least this large are gzipped by compressing sessions.
+COMPRESS_MIN_BYTES = 8 * 1024
+
+M = TypeVar("M", bound=BaseModel)
+
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+# `X | None` annotations have their own origin type on Python 3.10+.
+_UNION_TYPES = (Union, getattr(types, "UnionType", Union))
+
+
+class _CompressingSession(requests.Session):
+    """Session that sends large JSON request bodies gzip-compressed."""
+
+    def __init__(self, min_bytes: int = COMPRESS_MIN_BYTES):
+        super().__init__()
+        self.compress_min_bytes = min_bytes
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        body = request.body
+        if (
+            isinstance(body, (bytes, str))
+            and len(body) >= self.compress_min_bytes
+            and "Content-Encoding" not in request.headers
+            and request.headers.get("Content-Type", "").startswith("application/json")
+        ):
+            if isinstance(body, str):
+                body = body.encode()
+            # A fixed mtime keeps the output identical for identical bodies.
+            request.body = gzip.compress(body, compresslevel=6, mtime=0)
+            request.headers["Content-Encoding"] = "gzip"
+            request.headers["Content-Length"] = str(len(request.body))
+        return super().send(request, **kwargs)
+
+
+def create_session(
+    pool_maxsize: int = DEFAULT_POOL_SIZE,
+    instrumentation: Optional["Instrumentation"] = None,
+    compress_requests: Optional[bool] = None,
+    http2: Optional[bool] = None,
+) -> requests.Session:
+    """Creates a `requests.Session` that keeps connections alive per host.
+
+    Service objects send every request through one of these, so repeated and
+    concurrent calls reuse TCP/TLS connections instead of opening new ones.
+    A single session can be shared by several service objects and threads.
+    With `instrumentation`, every call is timed and recorded there.
+
+    Responses are always requested compressed (gzip and deflate, plus br and
+    zstd when `brotli` and `zstandard` are installed) and decompressed while
+    they are read. With `compress_requests`, JSON request bodies of at least
+    `COMPRESS_MIN_BYTES` are sent gzipped as well; the server has to accept
+    `Content-Encoding: gzip`. It defaults to the `WEAV_COMPRESS_REQUESTS`
+    environment variable.
+
+    With `http2` (default: the `WEAV_HTTP2` environment variable), requests go
+    through `http2.HTTP2Adapter`, which multiplexes concurrent requests to a
+    host over a single connection. It needs httpx and cannot be combined with
+    `instrumentation`.
+
+    Setting `WEAV_CASSETTE` to a file path records every exchange there, or
+    replays them without the network when `WEAV_CASSETTE_MODE=replay`
+    (see `cassettes.use_cassette`). Cassettes go through their own adapter,
+    so they cannot be combined with `http2` or `instrumentation`.
+    """
+    if compress_requests is None:
+        compress_requests = get_bool_value(
+            os.environ.get("WEAV_COMPRESS_REQUESTS", "False")
+        )
+    if http2 is None:
+        http2 = instrumentation is None and get_bool_value(
+            os.environ.get("WEAV_HTTP2", "False")
+        )
+    cassette = os.environ.get("WEAV_CASSETTE")
+    if cassette and (http2 or instrumentation is not None):
+        raise ValueError(
+            "WEAV_CASSETTE cannot be combined with HTTP/2 or instrumentation"
+        )
+    session = _CompressingSession() if compress_requests else requests.Session()
+    if http2:
+        if instrumentation is not None:
+            raise ValueError("instrumentation is not supported on HTTP/2 sessions")
+        from http2 import HTTP2Adapter
+
+        adapter = HTTP2Adapter(max_connections=pool_maxsize)
+    elif instrumentation is not None:
+        from instrumentation import InstrumentedAdapter
+
+        adapter = InstrumentedAdapter(instrumentation, pool_maxsize=pool_maxsize)
+    else:
+        adapter = HTTPAdapter(pool_maxsize=pool_maxsize)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    if cassette:
+        from cassettes import use_cassette
+
+        use_cassette(
+            session,
+            cassette,
+            mode=os.environ.get("WEAV_CASSETTE_MODE", "record"),
+            timing=os.environ.get("WEAV_CASSETTE_TIMING", "wire"),
+            pool_maxsize=pool_maxsize,
+        )
+    return session
+
+
+def request_not_sent(error: Exception) -> bool:
+    """Whether `error` is a connection failure from before the request went out.
+
+    Only then is it safe to retry a request that is not idempotent, such as a
+    POST creating a document: after a read timeout or a dropped connection
+    the server may already have acted on it.
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.exceptions.ConnectionError) or not error.args:
+        return False
+    # urllib3 wraps the underlying error in a MaxRetryError.
+    reason = getattr(error.args[0], "reason", error.args[0])
+    if isinstance(reason, urllib3.exceptions.ConnectTimeoutError):
+        # Also covers NewConnectionError, e.g. a refused connection.
+        return True
+    httpx = sys.modules.get("httpx")
+    return httpx is not None and isinstance(reason, httpx.ConnectError)
+
+
+def rename_id(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Renames the `_id` key of a MongoDB-style document to `id`."""
+    data["id"] = data.pop("_id")
+    return data
+
+
+def _constructor(annotation: Any) -> Optional[Callable[[Any], Any]]:
+    """Returns a function building the models inside a value of `annotation`.
+
+    Returns None when the annotation contains no models, so plain values are
+    passed through untouched.
+    """
+    origin = get_origin(annotation)
+    if origin is None:
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            return lambda value: (
+                construct_model(annotation, value) if isinstance(value, dict) else value
+            )
+        return None
+    args = get_args(annotation)
+    if origin in _UNION_TYPES:
+        return next(filter(None, map(_constructor, args)), None)
+    if origin in (list, set, tuple) and args:
+        item = _constructor(args[0])
+        if item is None:
+            return None
+        return lambda value: (
+            [item(element) for element in value] if isinstance(value, list) else value
+        )
+    if origin is dict and len(args) == 2:
+        item = _constructor(args[1])
+        if item is None:
+            return None
+        return lambda value: (
+            {key: item(element) for key, element in value.items()}
+            if isinstance(value, dict)
+            else value
+        )
+    return None
+
+
+@lru_cache(maxsize=None)
+def _nested_constructors(model: Type[BaseModel]) -> tuple:
+    """Input key and constructor of every field of `model` that holds models."""
+    constructors = []
+    for name, field in model.model_fields.items():
+        constructor = _constructor(field.annotation)
+        if constructor is not None:
+            constructors.append((field.alias or name, constructor))
+    return tuple(constructors)
+
+
+def construct_model(model: Type[M], data: Dict[str, Any]) -> M:
+    """Builds `model` from already parsed JSON without validating it.
+
+    Unlike plain `model.model_construct`, nested models are built too. Values
+    are not coerced (e.g. a `datetime` field keeps the string it was sent
+    as), so this is only for responses from a service that is trusted to
+    send the documented shape.
+    """
+    values = dict(data)
+    for key, constructor in _nested_constructors(model):
+        if values.get(key) is not None:
+            values[key] = constructor(values[key])
+    return model.model_construct(**values)
+
+
+def decode_response(
+    response: requests.Response,
+    model: Type[M],
+    prepare: Optional[Callable[[Any], Any]] = None,
+    trusted: bool = False,
+) -> M:
+    """Parses a JSON response body into `model`.
+
+    The body is parsed with orjson when it is installed. `prepare` can
+    reshape the parsed JSON before validation, e.g. `rename_id`. `trusted`
+    skips validation (see `construct_model`), which is much faster for
+    responses made of free-form dicts such as analytics results.
+    When the response came through an instrumented session, the time spent
+    here is recorded as the call's validation phase.
+    """
+    start = perf_counter()
+    result = _decode(response.content, model, prepare, trusted)
+
+    timing = getattr(response, "request_timing", None)
+    if timing is not None:
+        timing.validation = perf_counter() - start
+        response.connection.instrumentation.record_validation(timing)
+    return result
+
+
+def _decode(
+    content: bytes,
+    model: Type[M],
+    prepare: Optional[Callable[[Any], Any]],
+    trusted: bool,
+) -> M:
+    data = json_loads(content)
+    if prepare is not None:
+        data = prepare(data)
+    if trusted:
+        return construct_model(model, data)
+    return model.model_validate(data)
@@ -0,0 +1,511 @@
+import heapq
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+import requests
+from pydantic import BaseModel
+
+from http_client import request_not_sent
+from workflows.exceptions import WorkflowException
+from workflows.models import WorkflowRequest
+from workflows.tracker import TERMINAL_STATES
+
+UPLOAD = "upload"
+PROCESSING = "processing"
+WORKFLOW = "workflow"
+RUN = "run"
+RESULTS = "results"
+STAGES = (UPLOAD, PROCESSING, WORKFLOW, RUN, RESULTS)
+DONE = "done"
+FAILED = "failed"
+
+DEFAULT_WORKERS = {UPLOAD: 4, PROCESSING: 2, WORKFLOW: 4, RUN: 2, RESULTS: 4}
+# Stages whose call creates something on the server.
+_NOT_IDEMPOTENT = (UPLOAD, WORKFLOW)
+# How often blocked threads check whether the pipeline was stopped.
+_WAKE_INTERVAL = 0.2
+_INPUT_DONE = object()
+
+
+class IngestionResult(BaseModel):
+    path: str
+    status: str
+    doc_id: Optional[str] = None
+    workflow_id: Optional[str] = None
+    run_id: Optional[str] = None
+    failed_stage: Optional[str] = None
+    error: Optional[str] = None
+    form_instances: Optional[Any] = None
+
+
+class RetryPolicy:
+    """How often and how soon a stage retries a failed call.
+
+    Connection errors, timeouts, 429 and 5xx responses are retried with
+    exponential backoff; any other error fails the document right away.
+    Calls that are not idempotent, such as uploads, are only retried when the
+    request never reached the server or was refused with 429 or 503, so a
+    timeout cannot create a duplicate.
+    """
+
+    def __init__(
+        self, attempts: int = 3, backoff: float = 1.0, max_backoff: float = 30.0
+    ):
+        if attempts < 1:
+            raise ValueError("attempts must be at least 1")
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def should_retry(
+        self, error: Exception, attempt: int, idempotent: bool = True
+    ) -> bool:
+        if attempt >= self.attempts:
+            return False
+        status_code = getattr(error, "status_code", None)
+        if not idempotent:
+            return request_not_sent(error) or status_code in (429, 503)
+        if isinstance(error, requests.RequestException):
+            return True
+        return isinstance(status_code, int) and (
+            status_code == 429 or status_code >= 500
+        )
+
+    def delay(self, attempt: int) -> float:
+        return min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+
+
+class IngestionCheckpoint:
+    """Append-only JSON-lines record of each document's progress.
+
+    A line is written whenever a document finishes a stage, holding the stage
+    it continues with and the ids collected so far. The last line per path
+    wins, and a line cut short by a crash is ignored.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        states = {}
+        if not os.path.exists(self.path):
+            return states
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    state = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                states[state["path"]] = state
+        return states
+
+    def save(self, state: Dict[str, Any]) -> None:
+        line = json.dumps(state) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a")
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class JournalCheckpoint:
+    """Keeps the pipeline's progress in a `journal.JobJournal`.
+
+    Documents are journaled by path: pending until uploaded, submitted with
+    their document id while they go through the later stages, then done or
+    failed. The full progress is kept as the entry's data. The journal is
+    left open; closing it is up to the caller.
+    """
+
+    def __init__(self, journal):
+        self.journal = journal
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        return {entry.key: entry.data for entry in self.journal.entries() if entry.data}
+
+    def save(self, state: Dict[str, Any]) -> None:
+        path, stage, doc_id = state["path"], state["stage"], state["doc_id"]
+        if stage == DONE:
+            self.journal.done(path, data=state, server_id=doc_id)
+        elif stage == FAILED:
+            self.journal.failed(path, state["error"] or "", data=state)
+        elif doc_id is None:
+            self.journal.pending(path, data=state)
+        else:
+            self.journal.submitted(path, server_id=doc_id, data=state)
+
+    def close(self) -> None:
+        """Does nothing: the journal belongs to whoever opened it."""
+
+
+class _Document:
+    def __init__(self, path: str, state: Optional[Dict[str, Any]] = None):
+        state = state or {}
+        self.path = path
+        self.stage = state.get("stage", UPLOAD)
+        self.doc_id = state.get("doc_id")
+        self.page_count = state.get("page_count")
+        self.workflow_id = state.get("workflow_id")
+        self.run_id = state.get("run_id")
+        # Final state of the workflow run, once it has ended.
+        self.run_state = state.get("run_state")
+        self.failed_stage = state.get("failed_stage")
+        self.error = state.get("error")
+        self.form_instances = None
+        self.attempts = 0
+        self.polls = 0
+        self.waiting_since: Optional[float] = None
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "stage": self.stage,
+            "doc_id": self.doc_id,
+            "page_count": self.page_count,
+            "workflow_id": self.workflow_id,
+            "run_id": self.run_id,
+            "run_state": self.run_state,
+            "failed_stage": self.failed_stage,
+            "error": self.error,
+        }
+
+    def result(self) -> IngestionResult:
+        return IngestionResult(
+            path=self.path,
+            status=self.stage,
+            doc_id=self.doc_id,
+            workflow_id=self.workflow_id,
+            run_id=self.run_id,
+            failed_stage=self.failed_stage,
+            error=self.error,
+            form_instances=self.form_instances,
+        )
+
+
+class IngestionPipeline:
+    """Takes files from upload to extracted form instances as one pipeline.
+
+    Each document passes through these stages:
+    - `upload`: `create_document`
+    - `processing`: polls `get_page_level_status` until OCR and
+      classification have finished every page
+    - `workflow`: `run_workflow`, when `workflow_name` is set
+    - `run`: polls `get_workflow_status` until the run ends
+    - `results`: `download_form_instance`, when `download_results` is set
+
+    Every stage has its own worker pool and bounded input queue. When a
+    stage falls behind, the stages before it block, and at most
+    `max_in_flight` documents are admitted at a time. Polling stages put
+    unfinished documents back after a growing interval instead of holding a
+    worker. Failed calls are retried according to the stage's `RetryPolicy`.
+
+    With a `checkpoint`, progress is recorded after every stage. Running the
+    same files again skips finished documents and resumes the others where
+    they stopped, including documents that failed.
+    """
+
+    def __init__(
+        self,
+        document_operations,
+        workflow_service=None,
+        workflow_name: Optional[str] = None,
+        workflow_data: Optional[Any] = None,
+        folder_id: Optional[str] = "",
+        download_results: bool = True,
+        checkpoint: Optional[IngestionCheckpoint] = None,
+        workers: Optional[Dict[str, int]] = None,
+        queue_size: int = 32,
+        max_in_flight: int = 256,
+        retry: Union[RetryPolicy, Dict[str, RetryPolicy], None] = None,
+        poll_interval: float = 5.0,
+        max_poll_interval: float = 60.0,
+        max_wait: Optional[float] = None,
+    ):
+        if workflow_name is not None and workflow_service is None:
+            raise ValueError("workflow_name needs a workflow_service")
+        self.document_operations = document_operations
+        self.workflow_service = workflow_service
+        self.workflow_name = workflow_name
+        self.workflow_data = workflow_data if workflow_data is not None else {}
+        self.folder_id = folder_id
+        self.checkpoint = checkpoint
+        self.queue_size = queue_size
+        self.max_in_flight = max_in_flight
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.max_wait = max_wait
+
+        self.stages: List[str] = [UPLOAD, PROCESSING]
+        if workflow_name is not None:
+            self.stages += [WORKFLOW, RUN]
+        if download_results:
+            self.stages.append(RESULTS)
+        self.workers = {**DEFAULT_WORKERS, **(workers or {})}
+        if not isinstance(retry, dict):
+            retry = {stage: retry or RetryPolicy() for stage in STAGES}
+        self.retry = {stage: retry.get(stage) or RetryPolicy() for stage in STAGES}
+        self._handlers: Dict[str, Callable[[_Document], Optional[float]]] = {
+            UPLOAD: self._upload,
+            PROCESSING: self._processing,
+            WORKFLOW: self._workflow,
+            RUN: self._run,
+            RESULTS: self._results,
+        }
+        self.status_counts: Counter = Counter()
+        self._counts_lock = threading.Lock()
+
+    def run(self, paths: Iterable[str]) -> Iterator[IngestionResult]:
+        """Yields one result per document, in completion order.
+
+        Documents already finished according to the checkpoint are skipped
+        and counted as `skipped` in `status_counts`.
+        """
+        saved = self.checkpoint.load() if self.checkpoint is not None else {}
+        self._stop = threading.Event()
+        self._queues = {stage: queue.Queue(self.queue_size) for stage in self.stages}
+        self._output: queue.Queue = queue.Queue()
+        self._slots = threading.Semaphore(self.max_in_flight)
+        self._delayed: list = []
+        self._delayed_changed = threading.Condition()
+        self._counter = itertools.count()
+        self._admitted = 0
+
+        threads = [
+            threading.Thread(target=self._feed, args=(paths, saved), daemon=True),
+            threading.Thread(target=self._release_delayed, daemon=True),
+        ]
+        for stage in self.stages:
+            threads += [
+                threading.Thread(
+                    target=self._work,
+                    args=(stage,),
+                    name=f"ingest-{stage}-{index}",
+                    daemon=True,
+                )
+                for index in range(self.workers[stage])
+            ]
+        for thread in threads:
+            thread.start()
+
+        total, finished = None, 0
+        try:
+            while total is None or finished < total:
+                item = self._output.get()
+                if item is _INPUT_DONE:
+                    total = self._admitted
+                    continue
+                if isinstance(item, BaseException):
+                    raise item
+                finished += 1
+                self._slots.release()
+                yield item
+        finally:
+            self._stop.set()
+            with self._delayed_changed:
+                self._delayed_changed.notify_all()
+            for thread in threads:
+                thread.join()
+            if self.checkpoint is not None:
+                self.checkpoint.close()
+
+    def _count(self, status: str) -> None:
+        with self._counts_lock:
+            self.status_counts[status] += 1
+
+    def _resume_stage(self, state: Dict[str, Any]) -> str:
+        stage = state["stage"]
+        if stage == DONE:
+            return DONE
+        if stage == FAILED:
+            stage = state.get("failed_stage") or UPLOAD
+            # A run that ended unsuccessfully cannot succeed any more; start
+            # a new one.
+            if stage == RUN and state.get("run_state") in TERMINAL_STATES:
+                stage = WORKFLOW
+        # The stage may not be part of this pipeline, e.g. without a workflow.
+        for candidate in STAGES[STAGES.index(stage) :]:
+            if candidate in self.stages:
+                return candidate
+        return DONE
+
+    def _feed(self, paths: Iterable[str], saved: Dict[str, Dict[str, Any]]) -> None:
+        try:
+            for path in paths:
+                state = saved.get(path)
+                document = _Document(path, state)
+                if state is not None:
+                    document.stage = self._resume_stage(state)
+                    document.error = document.failed_stage = None
+                    if document.stage == WORKFLOW:
+                        document.workflow_id = document.run_id = None
+                        document.run_state = None
+                if document.stage == DONE:
+                    self._count("skipped")
+                    continue
+                while not self._slots.acquire(timeout=_WAKE_INTERVAL):
+                    if self._stop.is_set():
+                        return
+                self._admitted += 1
+                self._put(document.stage, document)
+        except BaseException as error:
+            self._output.put(error)
+        self._output.put(_INPUT_DONE)
+
+    def _put(self, stage: str, document: _Document) -> None:
+        while not self._stop.is_set():
+            try:
+                self._queues[stage].put(document, timeout=_WAKE_INTERVAL)
+                return
+            except queue.Full:
+                continue
+
+    def _later(self, delay: float, document: _Document) -> None:
+        with self._delayed_changed:
+            heapq.heappush(
+                self._delayed,
+                (time.monotonic() + delay, next(self._counter), document),
+            )
+            self._delayed_changed.notify()
+
+    def _release_delayed(self) -> None:
+        while not self._stop.is_set():
+            with self._delayed_changed:
+                now = time.monotonic()
+                if not self._delayed or self._delayed[0][0] > now:
+                    timeout = self._delayed[0][0] - now if self._delayed else None
+                    self._delayed_changed.wait(timeout)
+                    continue
+                _, _, document = heapq.heappop(self._delayed)
+            self._put(document.stage, document)
+
+    def _work(self, stage: str) -> None:
+        handler = self._handlers[stage]
+        inbox = self._queues[stage]
+        while not self._stop.is_set():
+            try:
+                document = inbox.get(timeout=_WAKE_INTERVAL)
+            except queue.Empty:
+                continue
+            try:
+                wait = handler(document)
+            except Exception as error:
+                document.attempts += 1
+                policy = self.retry[stage]
+                idempotent = stage not in _NOT_IDEMPOTENT
+                if policy.should_retry(error, document.attempts, idempotent):
+                    self._later(policy.delay(document.attempts), document)
+                else:
+                    self._fail(document, error)
+                continue
+            if wait is not None:
+                # The poll went through, so earlier errors were transient.
+                document.attempts = 0
+                self._later(wait, document)
+            else:
+                self._advance(document)
+
+    def _advance(self, document: _Document) -> None:
+        index = self.stages.index(document.stage) + 1
+        document.stage = self.stages[index] if index < len(self.stages) else DONE
+        document.attempts = document.polls = 0
+        document.waiting_since = None
+        if not self._save(document):
+            return
+        if document.stage == DONE:
+            self._count(DONE)
+            self._output.put(document.result())
+        else:
+            self._put(document.stage, document)
+
+    def _fail(self, document: _Document, error: Exception) -> None:
+        document.failed_stage, document.stage = document.stage, FAILED
+        document.error = f"{type(error).__name__}: {error}"
+        if not self._save(document):
+            return
+        self._count(FAILED)
+        self._output.put(document.result())
+
+    def _save(self, document: _Document) -> bool:
+        """Records the document's progress; a failure to do so ends `run()`."""
+        if self.checkpoint is None:
+            return True
+        try:
+            self.checkpoint.save(document.state())
+        except Exception as error:
+            self._output.put(error)
+            return False
+        return True
+
+    def _poll_again(self, document: _Document) -> float:
+        now = time.monotonic()
+        if document.waiting_since is None:
+            document.waiting_since = now
+        elif self.max_wait is not None and now - document.waiting_since > self.max_wait:
+            raise TimeoutError(f"Not finished after {self.max_wait}s")
+        document.polls += 1
+        return min(
+            self.max_poll_interval, self.poll_interval * 1.5 ** (document.polls - 1)
+        )
+
+    def _upload(self, document: _Document) -> None:
+        response = self.document_operations.create_document(
+            file_path=document.path, folder_id=self.folder_id
+        )
+        document.doc_id = response.id
+        document.page_count = len(response.pages)
+
+    def _processing(self, document: _Document) -> Optional[float]:
+        if not document.page_count:
+            # Pages may not be known yet right after the upload.
+            response = self.document_operations.get_document(document.doc_id)
+            document.page_count = len(response.pages)
+        if document.page_count:
+            status = self.document_operations.get_page_level_status(document.doc_id)
+            if all(
+                step.pages_done + step.pages_failed >= document.page_count
+                for step in (status.ocr, status.classification)
+            ):
+                return None
+        return self._poll_again(document)
+
+    def _workflow(self, document: _Document) -> None:
+        response = self.workflow_service.run_workflow(
+            workflow_name=self.workflow_name,
+            data=WorkflowRequest(doc_id=document.doc_id, data=self.workflow_data),
+        )
+        document.workflow_id, document.run_id = response.workflow_id, response.run_id
+
+    def _run(self, document: _Document) -> Optional[float]:
+        status = self.workflow_service.get_workflow_status(
+            workflow_id=document.workflow_id, workflow_run_id=document.run_id
+        )
+        state = status.status.lower()
+        if state not in TERMINAL_STATES:
+            return self._poll_again(document)
+        document.run_state = state
+        if state != "success":
+            raise WorkflowException(
+                status_code=None,
+                message=f"Workflow run {document.run_id} ended as {state}",
+                response_data=f"Workflow run ended as {state}",
+            )
+        return None
+
+    def _results(self, document: _Document) -> None:
+        document.form_instances = self.document_operations.download_form_instance(
+            document_id=document.doc_id, download_format="JSON"
+        )
@@ -0,0 +1,423 @@
+import math
+import re
+import threading
+from time import perf_counter
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from config_models import ServiceEndpoints
+
+PHASES = ("connect", "tls", "ttfb", "download", "total", "validation")
+
+# Bucket bounds, in seconds, used for the Prometheus export.
+PROMETHEUS_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+class LatencyHistogram:
+    """Log-linear latency histogram in the style of HdrHistogram.
+
+    Values are recorded in microseconds. Below `2 ** sub_bucket_bits` every
+    value has its own bucket; above, each power of two is split into
+    `2 ** sub_bucket_bits` equal buckets, so any recorded value is known to
+    within about 3% (with the default of 5 bits) while the whole range from
+    a microsecond to hours needs only a few hundred buckets.
+    """
+
+    def __init__(self, sub_bucket_bits: int = 5):
+        self.sub_bucket_count = 1 << sub_bucket_bits
+        self._counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def _index(self, micros: int) -> int:
+        size = self.sub_bucket_count
+        if micros < size:
+            return micros
+        shift = micros.bit_length() - size.bit_length()
+        return size + shift * size + ((micros >> shift) - size)
+
+    def _bucket_bounds(self, index: int) -> Tuple[int, int]:
+        """Smallest and largest microsecond value that fall into bucket `index`."""
+        size = self.sub_bucket_count
+        if index < size:
+            return index, index
+        shift, offset = divmod(index - size, size)
+        lower = (size + offset) << shift
+        return lower, lower + (1 << shift) - 1
+
+    def record(self, seconds: float) -> None:
+        seconds = max(seconds, 0.0)
+        index = self._index(int(seconds * 1_000_000))
+        self._counts[index] = self._counts.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        if other.sub_bucket_count != self.sub_bucket_count:
+            raise ValueError("Histograms must use the same sub_bucket_bits")
+        for index, count in other._counts.items():
+            self._counts[index] = self._counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    def buckets(self) -> Iterator[Tuple[float, int]]:
+        """`(upper bound in seconds, count)` of every non-empty bucket, ascending."""
+        for index in sorted(self._counts):
+            yield (self._bucket_bounds(index)[1] + 1) / 1_000_000, self._counts[index]
+
+    def percentile(self, percentile: float) -> float:
+        """Latency in seconds below which `percentile` percent of values fall."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(percentile * self.count / 100))
+        seen = 0
+        for index in sorted(self._counts):
+            seen += self._counts[index]
+            if seen >= rank:
+                lower, upper = self._bucket_bounds(index)
+                value = (lower + upper) / 2 / 1_000_000
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "min": self.min or 0.0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max or 0.0,
+        }
+
+
+class RequestTiming:
+    """Timings and sizes of one HTTP call, in seconds and bytes.
+
+    `connect` covers DNS resolution and the TCP handshake and `tls` the TLS
+    handshake; both are 0 when a pooled connection was reused. `ttfb` runs
+    from the connection being ready to the response headers arriving, and
+    `download` from there to the end of the body (0 for streamed responses,
+    whose body is read by the caller). `validation` is filled in by
+    `http_client.decode_response`.
+    """
+
+    __slots__ = (
+        "method",
+        "endpoint",
+        "url",
+        "status_code",
+        "connect",
+        "tls",
+        "ttfb",
+        "download",
+        "total",
+        "validation",
+        "request_bytes",
+        "response_bytes",
+        "error",
+    )
+
+    def __init__(self, method: str, endpoint: str, url: str):
+        self.method = method
+        self.endpoint = endpoint
+        self.url = url
+        self.status_code: Optional[int] = None
+        self.connect = 0.0
+        self.tls = 0.0
+        self.ttfb = 0.0
+        self.download = 0.0
+        self.total = 0.0
+        self.validation: Optional[float] = None
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, object]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _endpoint_patterns() -> List[Tuple[re.Pattern, str]]:
+    endpoints = ServiceEndpoints()
+    patterns = {}
+    for template in vars(endpoints).values():
+        path = template.split("?")[0].strip("/")
+        regex = re.sub(r"\\\{[A-Z_]+\\\}", "[^/]+", re.escape(path))
+        patterns[path] = re.compile(f"(?:^|/){regex}/?$")
+    # Prefer the template with the most literal text, e.g. documents/categories
+    # over documents/{DOC_ID}.
+    return sorted(
+        ((pattern, path) for path, pattern in patterns.items()),
+        key=lambda item: -len(re.sub(r"\{[A-Z_]+\}", "", item[1])),
+    )
+
+
+_ENDPOINT_PATTERNS = _endpoint_patterns()
+_ID_SEGMENT = re.compile(r"^(?:[0-9a-f]{24}|[0-9a-f-]{36}|\d+)$", re.IGNORECASE)
+
+
+def endpoint_name(url: str) -> str:
+    """Maps a request URL onto its `ServiceEndpoints` template.
+
+    URLs that match no template have ID-like path segments replaced by `{id}`,
+    so they still aggregate per endpoint rather than per object.
+    """
+    path = re.sub(r"/{2,}", "/", requests.utils.urlparse(url).path)
+    for pattern, template in _ENDPOINT_PATTERNS:
+        if template and pattern.search(path):
+            return template
+    return "/".join(
+        "{id}" if _ID_SEGMENT.match(segment) else segment
+        for segment in path.strip("/").split("/")
+    )
+
+
+_connection_timing = threading.local()
+
+
+class _TimedConnectionMixin:
+    def _new_conn(self):
+        start = perf_counter()
+        sock = super()._new_conn()
+        _connection_timing.connect = perf_counter() - start
+        return sock
+
+    def connect(self):
+        start = perf_counter()
+        super().connect()
+        elapsed = perf_counter() - start
+        _connection_timing.tls = max(elapsed - _connection_timing.connect, 0.0)
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+Hook = Callable[[str, RequestTiming], None]
+
+
+class Instrumentation:
+    """Collects `RequestTiming`s into per-endpoint latency histograms.
+
+    Hooks are called as `hook(stage, timing)`: with stage `"response"` once
+    the response has arrived (or `"error"` if the request failed), and with
+    `"decoded"` after `decode_response` validated the body. Exceptions from
+    hooks propagate to the caller.
+    """
+
+    def __init__(self, sub_bucket_bits: int = 5):
+        self.sub_bucket_bits = sub_bucket_bits
+        self._hooks: List[Hook] = []
+        self._histograms: Dict[Tuple[str, str, str], LatencyHistogram] = {}
+        self._responses: Dict[Tuple[str, str, str], int] = {}
+        self._bytes: Dict[Tuple[str, str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def add_hook(self, hook: Hook) -> None:
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook: Hook) -> None:
+        self._hooks.remove(hook)
+
+    def _observe(self, timing: RequestTiming, phase: str, seconds: float) -> None:
+        key = (timing.method, timing.endpoint, phase)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = LatencyHistogram(self.sub_bucket_bits)
+        histogram.record(seconds)
+
+    def record_response(self, timing: RequestTiming) -> None:
+        status = str(timing.status_code) if timing.error is None else "error"
+        with self._lock:
+            for phase in ("connect", "tls", "ttfb", "download", "total"):
+                self._observe(timing, phase, getattr(timing, phase))
+            key = (timing.method, timing.endpoint, status)
+            self._responses[key] = self._responses.get(key, 0) + 1
+            for direction, size in (
+                ("request", timing.request_bytes),
+                ("response", timing.response_bytes),
+            ):
+                key = (timing.method, timing.endpoint, direction)
+                self._bytes[key] = self._bytes.get(key, 0) + size
+        stage = "response" if timing.error is None else "error"
+        for hook in list(self._hooks):
+            hook(stage, timing)
+
+    def record_validation(self, timing: RequestTiming) -> None:
+        with self._lock:
+            self._observe(timing, "validation", timing.validation or 0.0)
+        for hook in list(self._hooks):
+            hook("decoded", timing)
+
+    def histogram(self, method: str, endpoint: str, phase: str) -> LatencyHistogram:
+        with self._lock:
+            merged = LatencyHistogram(self.sub_bucket_bits)
+            histogram = self._histograms.get((method, endpoint, phase))
+            if histogram is not None:
+                merged.merge(histogram)
+            return merged
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """`{"<METHOD> <endpoint>": {phase: {count, mean, p50, ...}}}`."""
+        with self._lock:
+            result: Dict[str, Dict[str, Dict[str, float]]] = {}
+            for (method, endpoint, phase), histogram in sorted(
+                self._histograms.items()
+            ):
+                result.setdefault(f"{method} {endpoint}", {})[
+                    phase
+                ] = histogram.summary()
+            return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._responses.clear()
+            self._bytes.clear()
+
+    def prometheus_text(self, prefix: str = "weav_http") -> str:
+        """Renders all metrics in the Prometheus text exposition format."""
+
+        def labels(**values: str) -> str:
+            escaped = (
+                name
+                + '="'
+                + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+                + '"'
+                for name, value in values.items()
+            )
+            return "{" + ",".join(escaped) + "}"
+
+        lines = [
+            f"# HELP {prefix}_phase_seconds Latency of each phase of HTTP calls.",
+            f"# TYPE {prefix}_phase_seconds histogram",
+        ]
+        with self._lock:
+            for (method, endpoint, phase), histogram in sorted(
+                self._histograms.items()
+            ):
+                buckets = list(histogram.buckets())
+                for bound in PROMETHEUS_BUCKETS:
+                    count = sum(c for upper, c in buckets if upper <= bound)
+                    label = labels(
+                        method=method, endpoint=endpoint, phase=phase, le=str(bound)
+                    )
+                    lines.append(f"{prefix}_phase_seconds_bucket{label} {count}")
+                label = labels(method=method, endpoint=endpoint, phase=phase, le="+Inf")
+                lines.append(f"{prefix}_phase_seconds_bucket{label} {histogram.count}")
+                label = labels(method=method, endpoint=endpoint, phase=phase)
+                lines.append(f"{prefix}_phase_seconds_sum{label} {histogram.total}")
+                lines.append(f"{prefix}_phase_seconds_count{label} {histogram.count}")
+
+            lines.append(f"# HELP {prefix}_responses_total HTTP calls by status code.")
+            lines.append(f"# TYPE {prefix}_responses_total counter")
+            for (method, endpoint, status), count in sorted(self._responses.items()):
+                label = labels(method=method, endpoint=endpoint, status=status)
+                lines.append(f"{prefix}_responses_total{label} {count}")
+
+            lines.append(
+                f"# HELP {prefix}_bytes_total Payload bytes sent and received."
+            )
+            lines.append(f"# TYPE {prefix}_bytes_total counter")
+            for (method, endpoint, direction), size in sorted(self._bytes.items()):
+                label = labels(method=method, endpoint=endpoint, direction=direction)
+                lines.append(f"{prefix}_bytes_total{label} {size}")
+        return "\n".join(lines) + "\n"
+
+
+def _body_size(body) -> int:
+    if body is None:
+        return 0
+    if isinstance(body, (bytes, bytearray, str)):
+        return len(body)
+    # Streamed bodies (generators, files) are not measured.
+    return 0
+
+
+class InstrumentedAdapter(HTTPAdapter):
+    """`HTTPAdapter` that times every request it sends.
+
+    The resulting `RequestTiming` is stored on the response as
+    `response.request_timing` and passed to the `Instrumentation`.
+    """
+
+    def __init__(self, instrumentation: Instrumentation, **kwargs):
+        self.instrumentation = instrumentation
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool,
+        }
+
+    def send(self, request, stream=False, **kwargs) -> requests.Response:
+        timing = RequestTiming(request.method, endpoint_name(request.url), request.url)
+        timing.request_bytes = _body_size(request.body)
+        _connection_timing.connect = 0.0
+        _connection_timing.tls = 0.0
+        start = perf_counter()
+        try:
+            response = super().send(request, stream=stream, **kwargs)
+        except Exception as e:
+            timing.total = perf_counter() - start
+            timing.connect = _connection_timing.connect
+            timing.tls = _connection_timing.tls
+            timing.error = type(e).__name__
+            self.instrumentation.record_response(timing)
+            raise
+        headers_received = perf_counter()
+        timing.connect = _connection_timing.connect
+        timing.tls = _connection_timing.tls
+        timing.ttfb = max(headers_received - start - timing.connect - timing.tls, 0.0)
+        timing.status_code = response.status_code
+        if stream:
+            timing.response_bytes = int(response.headers.get("Content-Length") or 0)
+        else:
+            timing.response_bytes = len(response.content)
+            timing.download = perf_counter() - headers_received
+        timing.total = perf_counter() - start
+        response.request_timing = timing
+        self.instrumentation.record_response(timing)
+        return response
@@ -0,0 +1,207 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from pydantic import BaseModel
+
+PENDING = "pending"
+SUBMITTED = "submitted"
+DONE = "done"
+FAILED = "failed"
+STATES = (PENDING, SUBMITTED, DONE, FAILED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    job TEXT NOT NULL,
+    key TEXT NOT NULL,
+    state TEXT NOT NULL,
+    server_id TEXT,
+    data TEXT,
+    error TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (job, key)
+);
+CREATE INDEX IF NOT EXISTS items_state ON items (job, state);
+"""
+_INSERT = """
+INSERT INTO items (job, key, state, server_id, data, error, updated_at)
+VALUES (:job, :key, :state, :server_id, :data, :error, :updated_at)
+ON CONFLICT (job, key) DO NOTHING
+"""
+# Only the columns passed in are overwritten, so e.g. marking an item done
+# keeps the server id it was submitted with.
+_UPSERT = """
+INSERT INTO items (job, key, state, server_id, data, error, updated_at)
+VALUES (:job, :key, :state, :server_id, :data, :error, :updated_at)
+ON CONFLICT (job, key) DO UPDATE SET
+    state = excluded.state,
+    server_id = coalesce(excluded.server_id, items.server_id),
+    data = coalesce(excluded.data, items.data),
+    error = excluded.error,
+    updated_at = excluded.updated_at
+"""
+
+
+class JournalEntry(BaseModel):
+    key: str
+    state: str
+    server_id: Optional[str] = None
+    data: Optional[Any] = None
+    error: Optional[str] = None
+    updated_at: float
+
+
+class JobJournal:
+    """Durable per-item state of a bulk operation, kept in SQLite.
+
+    Every item of a job, e.g. a file to upload or a document to run a
+    workflow on, is identified by a `key` and moves from `pending` to
+    `submitted` (once the server accepted it, with the `server_id` it
+    returned) and on to `done` or `failed`. Each change is committed before
+    the call returns, so a process that crashes or is redeployed can pick up
+    exactly where it stopped: skip what is done, check on what was submitted
+    and redo the rest.
+
+    The database runs in WAL mode, so one change costs a single append to
+    the log, and can be shared by several jobs and by concurrent threads.
+    `synchronous="FULL"` also survives power loss at the cost of an fsync per
+    change; the default only survives crashes of the process.
+    """
+
+    def __init__(self, path: str, job: str = "default", synchronous: str = "NORMAL"):
+        self.path = path
+        self.job = job
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(f"PRAGMA synchronous={synchronous}")
+        self._connection.execute("PRAGMA busy_timeout=30000")
+        self._connection.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _connected(self) -> sqlite3.Connection:
+        # Called with the lock held.
+        if self._connection is None:
+            raise RuntimeError(f"Journal {self.path} is closed")
+        return self._connection
+
+    def _write(self, rows: Iterable[Dict[str, Any]], sql: str = _UPSERT) -> int:
+        with self._lock:
+            cursor = self._connected().cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                count = cursor.executemany(sql, rows).rowcount
+            except BaseException:
+                cursor.execute("ROLLBACK")
+                raise
+            cursor.execute("COMMIT")
+            return count
+
+    def _row(
+        self,
+        key: str,
+        state: str,
+        server_id: Optional[str] = None,
+        data: Optional[Any] = None,
+        error: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        return {
+            "job": self.job,
+            "key": key,
+            "state": state,
+            "server_id": server_id,
+            "data": None if data is None else json.dumps(data, default=str),
+            "error": error,
+            "updated_at": time.time(),
+        }
+
+    def add(self, keys: Iterable[str]) -> int:
+        """Records `keys` as pending, leaving already known keys alone."""
+        return self._write((self._row(key, PENDING) for key in keys), _INSERT)
+
+    def pending(self, key: str, data: Optional[Any] = None) -> None:
+        self._write([self._row(key, PENDING, data=data)])
+
+    def submitted(
+        self, key: str, server_id: Optional[str] = None, data: Optional[Any] = None
+    ) -> None:
+        self._write([self._row(key, SUBMITTED, server_id=server_id, data=data)])
+
+    def done(
+        self, key: str, data: Optional[Any] = None, server_id: Optional[str] = None
+    ) -> None:
+        self._write([self._row(key, DONE, server_id=server_id, data=data)])
+
+    def failed(self, key: str, error: str, data: Optional[Any] = None) -> None:
+        self._write([self._row(key, FAILED, data=data, error=error)])
+
+    def retry_failed(self) -> int:
+        """Moves every failed item back to pending and returns how many."""
+        with self._lock:
+            cursor = self._connected().execute(
+                "UPDATE items SET state = ?, error = NULL, updated_at = ? "
+                "WHERE job = ? AND state = ?",
+                (PENDING, time.time(), self.job, FAILED),
+            )
+            return cursor.rowcount
+
+    def get(self, key: str) -> Optional[JournalEntry]:
+        entries = list(self._select("AND key = ?", (key,)))
+        return entries[0] if entries else None
+
+    def entries(self, *states: str) -> Iterator[JournalEntry]:
+        """Yields the job's items, only those in `states` if any are given."""
+        if not states:
+            return self._select()
+        placeholders = ", ".join("?" * len(states))
+        return self._select(f"AND state IN ({placeholders})", states)
+
+    def _select(self, condition: str = "", parameters=()) -> Iterator[JournalEntry]:
+        with self._lock:
+            rows = self._connected().execute(
+                "SELECT key, state, server_id, data, error, updated_at FROM items "
+                f"WHERE job = ? {condition} ORDER BY rowid",
+                (self.job, *parameters),
+            ).fetchall()
+        for key, state, server_id, data, error, updated_at in rows:
+            yield JournalEntry(
+                key=key,
+                state=state,
+                server_id=server_id,
+                data=None if data is None else json.loads(data),
+                error=error,
+                updated_at=updated_at,
+            )
+
+    def states(self) -> Dict[str, str]:
+        """Returns the state of every item of the job by key."""
+        with self._lock:
+            return dict(
+                self._connected().execute(
+                    "SELECT key, state FROM items WHERE job = ?", (self.job,)
+                )
+            )
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(
+                self._connected().execute(
+                    "SELECT state, count(*) FROM items WHERE job = ? GROUP BY state",
+                    (self.job,),
+                )
+            )
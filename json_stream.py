@@ -0,0 +1,168 @@
+import re
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Type
+
+import requests
+
+from http_client import M, construct_model, json_loads
+
+CHUNK_SIZE = 256 * 1024
+
+# Before the array: every character that changes the structure.
+_STRUCTURE = re.compile(rb'["{}\[\],:]')
+_STRING_TAIL = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+# Inside the array: skip scalars and whole strings up to the next bracket, or
+# the next comma between elements, in a single call.
+_STRING = rb'"[^"\\]*(?:\\.[^"\\]*)*"'
+_SKIP_NESTED = re.compile(rb'(?:[^"{}\[\]]+|' + _STRING + rb")*", re.DOTALL)
+_SKIP_ELEMENTS = re.compile(rb'(?:[^"{}\[\],]+|' + _STRING + rb")*", re.DOTALL)
+_WHITESPACE = b" \t\r\n"
+
+
+class JSONArrayScanner:
+    """Splits one JSON array out of a document that arrives in chunks.
+
+    The array is either the document itself (`key=None`) or the value of
+    `key` in the top-level object, e.g. `"form_instances"`. `feed` returns
+    the raw bytes of every array element completed by the new data, so each
+    element can be parsed on its own and the document is never held in
+    memory as a whole. The scanner only tracks nesting and strings; elements
+    are not checked for validity until they are parsed.
+    """
+
+    def __init__(self, key: Optional[str] = None):
+        self._key = None if key is None else b'"' + key.encode() + b'"'
+        self._buffer = bytearray()
+        self._position = 0
+        self._depth = 0
+        self._last_string = None
+        self._key_matched = False
+        self._array_depth = None
+        self._element_start = 0
+        self.done = False
+
+    def feed(self, data: bytes) -> List[bytes]:
+        if self.done:
+            return []
+        self._buffer += data
+        elements = []
+        if self._array_depth is None:
+            self._find_array()
+        if self._array_depth is not None:
+            self._split_elements(elements)
+
+        keep = self._position
+        if self._array_depth is not None:
+            keep = min(keep, self._element_start)
+        del self._buffer[:keep]
+        self._position -= keep
+        self._element_start -= keep
+        if self.done:
+            self._buffer = bytearray()
+        return elements
+
+    def _find_array(self) -> None:
+        buffer = self._buffer
+        while self._array_depth is None:
+            match = _STRUCTURE.search(buffer, self._position)
+            if match is None:
+                self._position = len(buffer)
+                return
+            if buffer[match.start()] == 0x22:  # "
+                tail = _STRING_TAIL.match(buffer, match.end())
+                if tail is None:
+                    # The string continues in the next chunk.
+                    self._position = match.start()
+                    return
+                if self._depth == 1:
+                    self._last_string = bytes(buffer[match.start() : tail.end()])
+                self._position = tail.end()
+            else:
+                self._position = match.end()
+                self._seek(buffer[match.start()])
+
+    def _split_elements(self, elements: List[bytes]) -> None:
+        buffer = self._buffer
+        length = len(buffer)
+        while True:
+            skip = _SKIP_NESTED if self._depth > self._array_depth else _SKIP_ELEMENTS
+            end = skip.match(buffer, self._position).end()
+            # Stopping on a quote means the string continues in the next chunk.
+            if end == length or buffer[end] == 0x22:
+                self._position = end
+                return
+            char = buffer[end]
+            self._position = end + 1
+            if char in b"{[":
+                self._depth += 1
+            elif self._depth > self._array_depth:
+                self._depth -= 1
+            else:
+                element = bytes(buffer[self._element_start : end])
+                if element.strip(_WHITESPACE):
+                    elements.append(element)
+                self._element_start = self._position
+                if char == 0x5D:  # ]
+                    self.done = True
+                    return
+
+    def _seek(self, char: int) -> None:
+        if char in b"{[":
+            self._depth += 1
+            if char == 0x5B and (  # [
+                (self._key is None and self._depth == 1)
+                or (self._key_matched and self._depth == 2)
+            ):
+                self._array_depth = self._depth
+                self._element_start = self._position
+            self._key_matched = False
+        elif char in b"}]":
+            self._depth -= 1
+            self._key_matched = False
+        elif char == 0x3A:  # :
+            self._key_matched = self._depth == 1 and self._last_string == self._key
+        else:
+            self._key_matched = False
+
+
+def iter_json_array(
+    chunks: Iterable[bytes], key: Optional[str] = None
+) -> Iterator[Any]:
+    """Yields the parsed elements of a JSON array as its chunks arrive.
+
+    See `JSONArrayScanner` for `key`. Nothing is yielded when the array is
+    missing or `null`.
+    """
+    scanner = JSONArrayScanner(key)
+    for chunk in chunks:
+        for element in scanner.feed(chunk):
+            yield json_loads(element)
+        if scanner.done:
+            return
+
+
+def iter_response_items(
+    response: requests.Response,
+    key: Optional[str] = None,
+    model: Optional[Type[M]] = None,
+    prepare: Optional[Callable[[Any], Any]] = None,
+    trusted: bool = False,
+) -> Iterator[Any]:
+    """Yields the elements of a JSON array in a `stream=True` response.
+
+    Each element is reshaped with `prepare` and validated as `model` (or
+    built with `construct_model` when `trusted`) as soon as it has been
+    received; without `model` the parsed JSON is yielded. The response is
+    closed when the iteration ends or is abandoned.
+    """
+    try:
+        for item in iter_json_array(response.iter_content(CHUNK_SIZE), key):
+            if prepare is not None:
+                item = prepare(item)
+            if model is None:
+                yield item
+            elif trusted:
+                yield construct_model(model, item)
+            else:
+                yield model.model_validate(item)
+    finally:
+        response.close()
@@ -0,0 +1,164 @@
+import importlib
+import inspect
+import json
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from pydantic import BaseModel, ValidationError
+
+from client_registry import ClientRegistry, default_registry
+from config_models import ENV_PATH, ServiceType
+
+WORKFLOW_SERVICE = (ServiceType.WORKFLOWS, "workflows.service", "WorkflowService")
+FORM_OPERATIONS = (ServiceType.DOCUMENT, "documents.service", "FormOperations")
+DOCUMENT_OPERATIONS = (ServiceType.DOCUMENT, "documents.service", "DocumentOperations")
+FOLDER_OPERATIONS = (ServiceType.DOCUMENT, "documents.service", "FolderOperations")
+CHAT_SERVICE = (ServiceType.CHATS, "chats.service", "ChatService")
+AGENT_SERVICE = (ServiceType.AGENT, "agents.service", "AgentService")
+AGENT_OPERATIONS = (ServiceType.AGENT, "agents.service", "AgentOperations")
+
+# Operation name -> (service, method name).
+OPERATIONS: Dict[str, Tuple[Tuple[ServiceType, str, str], str]] = {
+    "get_all_workflows": (WORKFLOW_SERVICE, "get_all_workflows"),
+    "get_single_workflow": (WORKFLOW_SERVICE, "get_single_workflow"),
+    "skip_steps_in_workflow": (WORKFLOW_SERVICE, "skip_steps_in_workflow"),
+    "rerun_workflow": (WORKFLOW_SERVICE, "rerun_workflow"),
+    "run_workflow": (WORKFLOW_SERVICE, "run_workflow"),
+    "get_workflow_status": (WORKFLOW_SERVICE, "get_workflow_status"),
+    "get_workflow_runs_for_document": (
+        WORKFLOW_SERVICE,
+        "get_workflow_runs_for_document",
+    ),
+    "create_form": (FORM_OPERATIONS, "create_form"),
+    "filter_form": (FORM_OPERATIONS, "filter_form"),
+    "execute_form_analytics": (FORM_OPERATIONS, "execute_form_analytics"),
+    "filter_form_instances": (FORM_OPERATIONS, "filter_form_instances"),
+    "get_form_definition": (FORM_OPERATIONS, "get_form_definition"),
+    "update_form_definition": (FORM_OPERATIONS, "update_form_definition"),
+    "delete_form_definition": (FORM_OPERATIONS, "delete_form_definition"),
+    "download_query_result": (FORM_OPERATIONS, "download_query_result"),
+    "create_document": (DOCUMENT_OPERATIONS, "create_document"),
+    "get_page": (DOCUMENT_OPERATIONS, "get_page"),
+    "get_page_text_and_words": (DOCUMENT_OPERATIONS, "get_page_text_and_words"),
+    "get_pages": (DOCUMENT_OPERATIONS, "get_pages"),
+    "get_page_level_status": (DOCUMENT_OPERATIONS, "get_page_level_status"),
+    "get_document_summary_status": (
+        DOCUMENT_OPERATIONS,
+        "get_document_summary_status",
+    ),
+    "get_document": (DOCUMENT_OPERATIONS, "get_document"),
+    "get_document_hierarchy": (DOCUMENT_OPERATIONS, "get_document_hierarchy"),
+    "download_form_instance": (DOCUMENT_OPERATIONS, "download_form_instance"),
+    "get_document_categories": (DOCUMENT_OPERATIONS, "get_document_categories"),
+    "get_document_tags": (DOCUMENT_OPERATIONS, "get_document_tags"),
+    "add_document_tags": (DOCUMENT_OPERATIONS, "add_document_tags"),
+    "trigger_document_summary": (DOCUMENT_OPERATIONS, "trigger_document_summary"),
+    "create_folder": (FOLDER_OPERATIONS, "create_folder"),
+    "get_writable_folders": (FOLDER_OPERATIONS, "get_writable_folders"),
+    "get_folder_definition": (FOLDER_OPERATIONS, "get_folder_definition"),
+    "get_chat_logs": (CHAT_SERVICE, "get_chat_logs"),
+    "get_chat_history": (CHAT_SERVICE, "get_chat_history"),
+    "chat": (CHAT_SERVICE, "chat"),
+    "get_agent_types": (AGENT_SERVICE, "get_agent_types"),
+    "get_agent_chat_history": (AGENT_SERVICE, "get_chat_history"),
+    "delete_agent_chat_history": (AGENT_SERVICE, "delete_chat_history"),
+    "get_all_agents": (AGENT_OPERATIONS, "get_all_agents"),
+    "get_agent_response": (AGENT_OPERATIONS, "get_agent_response"),
+    "get_agent": (AGENT_OPERATIONS, "get_agent"),
+}
+
+
+class ServiceCache:
+    """Service objects of one tenant, kept warm in a `ClientRegistry`.
+
+    Configurations are resolved once per `ServiceType`, every service object
+    shares the tenant's pooled session, and chat/agent services share a chat
+    history cache. Safe to use from several threads.
+    """
+
+    def __init__(
+        self,
+        env_file_path: str = ENV_PATH,
+        registry: Optional[ClientRegistry] = None,
+    ):
+        self.env_file_path = env_file_path
+        self.registry = registry or default_registry
+        self.tenant = self.registry.register_env_file(env_file_path)
+
+    def get_service(self, service_type: ServiceType, module_name: str, class_name: str):
+        service_class = getattr(importlib.import_module(module_name), class_name)
+        return self.registry.get_client(self.tenant, service_class, service_type)
+
+    def reload(self) -> None:
+        """Re-reads the env file and drops cached configurations and services."""
+        self.registry.reload(self.tenant)
+        self.tenant = self.registry.register_env_file(self.env_file_path)
+
+
+def resolve_operation(services: ServiceCache, op: str) -> Callable:
+    if op not in OPERATIONS:
+        raise ValueError(f"Unknown operation: {op}")
+    (service_type, module_name, class_name), method_name = OPERATIONS[op]
+    service = services.get_service(service_type, module_name, class_name)
+    return getattr(service, method_name)
+
+
+def build_kwargs(method: Callable, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Maps flat JSON params onto a service method's arguments.
+
+    Params named after a method argument are passed through. If the method
+    takes a request model (e.g. `WorkflowRequest`), every other param becomes
+    a field of that model, so `{"workflow_name": ..., "doc_id": ...}` is enough
+    to call `run_workflow`.
+    """
+    parameters = inspect.signature(method).parameters
+    model_params = [
+        name
+        for name, parameter in parameters.items()
+        if inspect.isclass(parameter.annotation)
+        and issubclass(parameter.annotation, BaseModel)
+    ]
+    if not model_params:
+        return dict(params)
+    model_param = model_params[0]
+    kwargs = {
+        name: value
+        for name, value in params.items()
+        if name in parameters and name != model_param
+    }
+    model_fields = {
+        name: value for name, value in params.items() if name not in kwargs
+    }
+    kwargs[model_param] = parameters[model_param].annotation.model_validate(
+        model_fields
+    )
+    return kwargs
+
+
+def to_jsonable(result: Any) -> Any:
+    if isinstance(result, BaseModel):
+        return result.model_dump(mode="json")
+    if isinstance(result, (list, tuple, Iterator)):
+        return [to_jsonable(item) for item in result]
+    if isinstance(result, dict):
+        return {key: to_jsonable(value) for key, value in result.items()}
+    if hasattr(result, "to_dict"):
+        # pandas DataFrame from the CSV download operations
+        return result.to_dict(orient="records")
+    return result
+
+
+def run_operation(services: ServiceCache, op: str, params: Dict[str, Any]) -> Any:
+    """Runs a named operation and returns a JSON-serialisable result."""
+    method = resolve_operation(services, op)
+    return to_jsonable(method(**build_kwargs(method, params)))
+
+
+def error_payload(error: Exception) -> Dict[str, Any]:
+    """JSON description of a failed operation, keeping API error details."""
+    payload = {"type": type(error).__name__, "message": str(error)}
+    for attribute in ("status_code", "message", "response_data"):
+        if hasattr(error, attribute):
+            payload[attribute] = getattr(error, attribute)
+    if isinstance(error, ValidationError):
+        payload["errors"] = json.loads(error.json())
+    return payload
@@ -0,0 +1,317 @@
+# python3 weav.py daemon &
+# python3 weav.py call get_workflow_status --params '{"workflow_id": "process_form_workflow", "workflow_run_id": "..."}'
+# python3 weav.py batch operations.jsonl --output results.jsonl --concurrency workflows=16 document=32
+# python3 weav.py ingest scans/ --workflow_name process_form_workflow --checkpoint ingest.checkpoint --output forms.jsonl
+
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+
+# Same values as config_models.BOOL_CHOICES; not imported so that `call` only
+# needs the standard library.
+BOOL_CHOICES = ["True", "t", "true", "False", "f", "false"]
+
+
+def default_socket_path() -> str:
+    """`$WEAV_SOCKET`, else a socket in the user's runtime directory.
+
+    Without `$XDG_RUNTIME_DIR`, the socket goes into a directory private to
+    the user below the temporary directory; the daemon creates it with mode
+    0700.
+    """
+    if os.environ.get("WEAV_SOCKET"):
+        return os.environ["WEAV_SOCKET"]
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or os.path.join(
+        tempfile.gettempdir(), f"weav-{os.getuid()}"
+    )
+    return os.path.join(runtime_dir, "weav.sock")
+
+
+DEFAULT_SOCKET_PATH = default_socket_path()
+
+
+def call_daemon(socket_path: str, op: str, params: dict) -> dict:
+    """Sends one operation to a running daemon and returns its reply."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.sendall(json.dumps({"op": op, "params": params}).encode() + b"\n")
+        with client.makefile("rb") as reader:
+            return json.loads(reader.readline())
+
+
+def call_in_process(op: str, params: dict) -> dict:
+    # Only imported when no daemon is running: this is the slow path.
+    from operations import ServiceCache, error_payload, run_operation
+
+    try:
+        return {"ok": True, "result": run_operation(ServiceCache(), op, params)}
+    except Exception as e:
+        return {"ok": False, "error": error_payload(e)}
+
+
+def run_batch(args, parser: argparse.ArgumentParser) -> int:
+    from batch_runner import BatchRunner, read_operations
+    from config_models import ServiceType, get_bool_value
+    from journal import JobJournal
+    from operations import ServiceCache
+
+    concurrency = {}
+    for limit in args.concurrency:
+        service, _, value = limit.partition("=")
+        try:
+            concurrency[ServiceType(service)] = int(value)
+        except ValueError:
+            services = ", ".join(service_type.value for service_type in ServiceType)
+            parser.error(
+                f"invalid --concurrency {limit!r}, expected SERVICE=LIMIT with "
+                f"SERVICE one of: {services}"
+            )
+
+    journal = None
+    if args.journal:
+        journal = JobJournal(args.journal, job=f"batch:{os.path.abspath(args.input)}")
+
+    # A resumed run adds the remaining records to the earlier output.
+    mode = "a" if journal is not None else "w"
+    output = open(args.output, mode) if args.output else sys.stdout
+    failed = 0
+    try:
+        with BatchRunner(
+            ServiceCache(),
+            concurrency=concurrency,
+            default_concurrency=args.default_concurrency,
+            journal=journal,
+        ) as runner:
+            for record in runner.run(
+                read_operations(args.input), ordered=get_bool_value(args.ordered)
+            ):
+                failed += not record["ok"]
+                output.write(json.dumps(record, default=str) + "\n")
+                output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if journal is not None:
+            journal.close()
+    return 1 if failed else 0
+
+
+def iter_files(paths: list):
+    """Yields the given files, and the files below the given directories."""
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                yield os.path.join(root, name)
+
+
+def run_ingest(args) -> int:
+    from config_models import get_bool_value
+    from ingestion import IngestionCheckpoint, IngestionPipeline, JournalCheckpoint
+    from journal import JobJournal
+    from operations import DOCUMENT_OPERATIONS, WORKFLOW_SERVICE, ServiceCache
+
+    checkpoint = journal = None
+    if args.journal:
+        journal = JobJournal(args.journal, job="ingest")
+        checkpoint = JournalCheckpoint(journal)
+    elif args.checkpoint:
+        checkpoint = IngestionCheckpoint(args.checkpoint)
+
+    services = ServiceCache()
+    pipeline = IngestionPipeline(
+        document_operations=services.get_service(*DOCUMENT_OPERATIONS),
+        workflow_service=services.get_service(*WORKFLOW_SERVICE),
+        workflow_name=args.workflow_name,
+        folder_id=args.folder_id,
+        download_results=get_bool_value(args.download_results),
+        checkpoint=checkpoint,
+    )
+    output = open(args.output, "a") if args.output else sys.stdout
+    try:
+        for result in pipeline.run(iter_files(args.paths)):
+            output.write(result.model_dump_json() + "\n")
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if journal is not None:
+            journal.close()
+    print(json.dumps(dict(pipeline.status_counts)), file=sys.stderr)
+    return 1 if pipeline.status_counts["failed"] else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Weav command line client.")
+    parser.add_argument(
+        "--socket",
+        type=str,
+        default=DEFAULT_SOCKET_PATH,
+        required=False,
+        help="Unix socket of the daemon",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    daemon_parser = subparsers.add_parser("daemon", help="Run the long-lived daemon")
+    daemon_parser.add_argument(
+        "--env_file",
+        type=str,
+        default=None,
+        required=False,
+        help="Path of the .env file",
+    )
+    daemon_parser.add_argument(
+        "--instrument",
+        type=str,
+        choices=BOOL_CHOICES,
+        default="false",
+        required=False,
+        help="Set to true to time API calls; read them with `call metrics`",
+    )
+
+    call_parser = subparsers.add_parser("call", help="Run a single operation")
+    call_parser.add_argument("op", type=str, help="Operation name, e.g. get_page")
+    call_parser.add_argument(
+        "--params",
+        type=str,
+        default=r"{}",
+        required=False,
+        help="Operation parameters as JSON",
+    )
+
+    batch_parser = subparsers.add_parser(
+        "batch", help="Run operations from a JSONL file"
+    )
+    batch_parser.add_argument("input", type=str, help="JSONL file of operations")
+    batch_parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        required=False,
+        help="JSONL file for results, stdout by default",
+    )
+    batch_parser.add_argument(
+        "--ordered",
+        type=str,
+        choices=BOOL_CHOICES,
+        default="false",
+        required=False,
+        help="Set to true to write results in input order",
+    )
+    batch_parser.add_argument(
+        "--concurrency",
+        nargs="+",
+        default=[],
+        required=False,
+        help="Per-service limits, e.g. workflows=8 document=16",
+    )
+    batch_parser.add_argument(
+        "--default_concurrency",
+        type=int,
+        default=8,
+        required=False,
+        help="Limit for services not listed in --concurrency",
+    )
+    batch_parser.add_argument(
+        "--journal",
+        type=str,
+        default=None,
+        required=False,
+        help="SQLite journal; rerunning with it skips operations already done",
+    )
+
+    ingest_parser = subparsers.add_parser(
+        "ingest", help="Upload files and collect their extracted forms"
+    )
+    ingest_parser.add_argument(
+        "paths", type=str, nargs="+", help="Files, or directories to walk"
+    )
+    ingest_parser.add_argument(
+        "--workflow_name",
+        type=str,
+        default=None,
+        required=False,
+        help="Workflow to run on every document once OCR is done",
+    )
+    ingest_parser.add_argument(
+        "--folder_id",
+        type=str,
+        default="",
+        required=False,
+        help="Folder to upload into",
+    )
+    ingest_parser.add_argument(
+        "--checkpoint",
+        type=str,
+        default=None,
+        required=False,
+        help="Progress file; rerunning with it resumes where the last run stopped",
+    )
+    ingest_parser.add_argument(
+        "--journal",
+        type=str,
+        default=None,
+        required=False,
+        help="SQLite journal to keep progress in instead of --checkpoint",
+    )
+    ingest_parser.add_argument(
+        "--download_results",
+        type=str,
+        choices=BOOL_CHOICES,
+        default="true",
+        required=False,
+        help="Set to false to skip downloading form instances",
+    )
+    ingest_parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        required=False,
+        help="JSONL file results are appended to, stdout by default",
+    )
+
+    args = parser.parse_args()
+
+    if args.command == "batch":
+        return run_batch(args, batch_parser)
+    if args.command == "ingest":
+        return run_ingest(args)
+
+    if args.command == "daemon":
+        from config_models import ENV_PATH, get_bool_value
+        from daemon import serve
+
+        serve(
+            args.socket,
+            args.env_file or ENV_PATH,
+            instrument=get_bool_value(args.instrument),
+        )
+        return 0
+
+    try:
+        params = json.loads(args.params)
+    except json.JSONDecodeError:
+        raise Exception("Invalid data in --params")
+    try:
+        reply = call_daemon(args.socket, args.op, params)
+    except (FileNotFoundError, ConnectionRefusedError):
+        reply = call_in_process(args.op, params)
+
+    if not reply["ok"]:
+        print(json.dumps(reply["error"], indent=2, default=str), file=sys.stderr)
+        return 1
+    result = reply["result"]
+    print(
+        result if isinstance(result, str) else json.dumps(result, indent=2, default=str)
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
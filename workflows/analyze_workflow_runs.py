@@ -0,0 +1,61 @@
+# python3 workflows/analyze_workflow_runs.py --workflow_name process_form_workflow --run_ids_file run_ids.txt
+
+import sys
+import os
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from config_models import LoadConfigurations, ServiceType, get_bool_value, BOOL_CHOICES
+from service import WorkflowService
+from workflows.dag import WorkflowDAG
+from pprint import pprint
+
+if __name__ == "__main__":
+    configs = LoadConfigurations().set_config(service=ServiceType.WORKFLOWS)
+    workflows = WorkflowService(configs=configs)
+    parser = argparse.ArgumentParser(description="Provide parameters for the script.")
+
+    parser.add_argument(
+        "--show_internal_steps",
+        type=str,
+        choices=BOOL_CHOICES,
+        default="false",
+        required=False,
+        help="Set to true to include all steps",
+    )
+    parser.add_argument(
+        "--workflow_name",
+        type=str,
+        required=True,
+        help="Name of workflow",
+    )
+    parser.add_argument(
+        "--run_ids_file",
+        type=str,
+        required=True,
+        help="File with one workflow run ID per line",
+    )
+
+    args = parser.parse_args()
+    show_internal_steps = get_bool_value(args.show_internal_steps)
+
+    dag = WorkflowDAG(
+        workflows.get_single_workflow(
+            workflow_name=args.workflow_name, show_internal_steps=show_internal_steps
+        )
+    )
+    with open(args.run_ids_file) as f:
+        for run_id in (line.strip() for line in f):
+            if run_id:
+                dag.add_run(
+                    workflows.get_workflow_status(
+                        workflow_id=args.workflow_name,
+                        workflow_run_id=run_id,
+                        show_internal_steps=show_internal_steps,
+                    )
+                )
+
+    critical_path, duration = dag.critical_path()
+    print(f"Critical path ({duration:.1f}s): {' -> '.join(critical_path)}")
+    pprint([timing.model_dump() for timing in dag.task_timings()])
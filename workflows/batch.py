@@ -0,0 +1,154 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from journal import DONE, SUBMITTED, JobJournal
+from workflows.models import BatchRunResult, CompletedRun, WorkflowRequest
+
+SUBMIT_FAILED_STATE = "submit_failed"
+SKIPPED_STATE = "skipped"
+
+
+class WorkflowBatch:
+    """Handle for a set of workflow runs submitted concurrently.
+
+    Runs are submitted as soon as the batch is created. Results are streamed
+    through `results()` in completion order, while `status_counts` keeps a
+    running tally of run states (`submit_failed` for runs that were rejected).
+
+    With a `journal`, every submission is recorded under its document id.
+    Documents whose run was already submitted or finished according to the
+    journal are not submitted again and count as `skipped`; their runs are
+    still part of `runs()`, so `wait_for_runs` picks them up again.
+    """
+
+    def __init__(
+        self,
+        workflow_service,
+        workflow_name: str,
+        doc_ids: List[str],
+        data: Optional[Any] = None,
+        max_concurrency: int = 8,
+        journal: Optional[JobJournal] = None,
+    ):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.workflow_service = workflow_service
+        self.workflow_name = workflow_name
+        self.data = data if data is not None else {}
+        self.journal = journal
+        self.total = len(doc_ids)
+        self.status_counts: Counter = Counter()
+        self._lock = Lock()
+        self._completed: List[BatchRunResult] = []
+        # (workflow_id, run_id) -> doc_id of every run accepted by the server.
+        self._run_doc_ids: Dict[Tuple[str, str], str] = {}
+        if journal is not None:
+            journal.add(doc_ids)
+            doc_ids = self._skip_journaled(doc_ids)
+        executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="workflow-batch"
+        )
+        self._futures = [executor.submit(self._submit, doc_id) for doc_id in doc_ids]
+        # No more work is queued; already submitted runs keep going.
+        executor.shutdown(wait=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.cancel()
+        self.wait()
+
+    def _skip_journaled(self, doc_ids: List[str]) -> List[str]:
+        remaining = []
+        for doc_id in doc_ids:
+            entry = self.journal.get(doc_id)
+            if entry is None or entry.state not in (SUBMITTED, DONE):
+                remaining.append(doc_id)
+                continue
+            self.status_counts[SKIPPED_STATE] += 1
+            if entry.state == SUBMITTED and entry.data:
+                run = (entry.data["workflow_id"], entry.data["run_id"])
+                self._run_doc_ids[run] = doc_id
+        return remaining
+
+    def _submit(self, doc_id: str) -> BatchRunResult:
+        try:
+            response = self.workflow_service.run_workflow(
+                workflow_name=self.workflow_name,
+                data=WorkflowRequest(doc_id=doc_id, data=self.data),
+            )
+            result = BatchRunResult(doc_id=doc_id, response=response)
+            state = response.state or "submitted"
+        except Exception as e:
+            # Any error, e.g. a response that fails validation, only fails
+            # this run; the rest of the batch carries on.
+            result = BatchRunResult(doc_id=doc_id, error=str(e))
+            state = SUBMIT_FAILED_STATE
+        if self.journal is not None:
+            if result.response is not None:
+                self.journal.submitted(
+                    doc_id,
+                    server_id=response.run_id,
+                    data={
+                        "workflow_id": response.workflow_id,
+                        "run_id": response.run_id,
+                    },
+                )
+            else:
+                self.journal.failed(doc_id, result.error)
+        with self._lock:
+            self.status_counts[state] += 1
+            self._completed.append(result)
+            if result.response is not None:
+                run = (result.response.workflow_id, result.response.run_id)
+                self._run_doc_ids[run] = doc_id
+        return result
+
+    @property
+    def completed(self) -> int:
+        return len(self._completed)
+
+    def results(self) -> Iterator[BatchRunResult]:
+        """Yields each run's result as soon as its submission finishes."""
+        for future in as_completed(self._futures):
+            if not future.cancelled():
+                yield future.result()
+
+    def wait(self) -> List[BatchRunResult]:
+        """Blocks until every run is submitted and returns all results."""
+        return list(self.results())
+
+    def cancel(self) -> int:
+        """Cancels runs that have not been submitted yet."""
+        return sum(future.cancel() for future in self._futures)
+
+    def summary(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.status_counts)
+
+    def runs(self) -> List[Tuple[str, str]]:
+        """Returns `(workflow_id, run_id)` for every run accepted so far."""
+        with self._lock:
+            return list(self._run_doc_ids)
+
+    def wait_for_runs(self, **kwargs) -> Iterator[CompletedRun]:
+        """Waits on `runs()` like `WorkflowService.wait_for_runs`.
+
+        Finished runs are recorded in the journal as done, or as failed when
+        their status is not `success`.
+        """
+        for completed_run in self.workflow_service.wait_for_runs(self.runs(), **kwargs):
+            if self.journal is not None:
+                doc_id = self._run_doc_ids[
+                    (completed_run.workflow_id, completed_run.run_id)
+                ]
+                status = completed_run.status.status
+                if status.lower() == "success":
+                    self.journal.done(doc_id)
+                else:
+                    self.journal.failed(doc_id, f"Workflow run {status}")
+            yield completed_run
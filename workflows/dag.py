@@ -0,0 +1,129 @@
+from collections import defaultdict
+from typing import Dict, List, Sequence, Tuple
+
+from workflows.models import TaskTiming, Workflow, WorkflowStatusResponse
+
+
+def _percentile(values: Sequence[float], percentile: float) -> float:
+    """Linearly interpolated percentile of `values` (0 when empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * percentile / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+class WorkflowDAG:
+    """Task graph of a workflow with timing statistics gathered from its runs.
+
+    The graph comes from `Workflow.tasks[*].downstream_tasks`. Every run added
+    with `add_run` contributes, per task, its latency (`end_date - start_date`)
+    and its queueing time: the gap between the latest upstream task finishing
+    (or the run starting, for root tasks) and the task starting.
+    """
+
+    def __init__(self, workflow: Workflow):
+        self.name = workflow.name
+        self.downstream: Dict[str, List[str]] = {
+            task.name: list(task.downstream_tasks) for task in workflow.tasks
+        }
+        self.upstream: Dict[str, List[str]] = {name: [] for name in self.downstream}
+        for name, children in self.downstream.items():
+            for child in children:
+                self.upstream.setdefault(child, []).append(name)
+                self.downstream.setdefault(child, [])
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.queueing_times: Dict[str, List[float]] = defaultdict(list)
+        self.run_durations: List[float] = []
+
+    def topological_order(self) -> List[str]:
+        remaining = {name: len(parents) for name, parents in self.upstream.items()}
+        ready = [name for name, count in remaining.items() if count == 0]
+        order = []
+        while ready:
+            name = ready.pop()
+            order.append(name)
+            for child in self.downstream[name]:
+                remaining[child] -= 1
+                if remaining[child] == 0:
+                    ready.append(child)
+        if len(order) != len(remaining):
+            raise ValueError(f"Workflow {self.name} has a cycle")
+        return order
+
+    def add_run(self, status: WorkflowStatusResponse) -> None:
+        tasks = {
+            task.name: task
+            for task in status.tasks or []
+            if task.start_date is not None and task.end_date is not None
+        }
+        for name, task in tasks.items():
+            self.latencies[name].append(
+                (task.end_date - task.start_date).total_seconds()
+            )
+            upstream_ends = [
+                tasks[parent].end_date
+                for parent in self.upstream.get(name, [])
+                if parent in tasks
+            ]
+            ready_at = max(upstream_ends) if upstream_ends else status.start_date
+            if ready_at is not None:
+                self.queueing_times[name].append(
+                    max((task.start_date - ready_at).total_seconds(), 0.0)
+                )
+        if status.start_date is not None and status.end_date is not None:
+            self.run_durations.append(
+                (status.end_date - status.start_date).total_seconds()
+            )
+
+    def critical_path(self, percentile: float = 50) -> Tuple[List[str], float]:
+        """Returns the heaviest path and its cost in seconds.
+
+        A task costs its queueing time plus its latency, both taken at the
+        given percentile across the recorded runs.
+        """
+        cost = {
+            name: _percentile(self.latencies.get(name, []), percentile)
+            + _percentile(self.queueing_times.get(name, []), percentile)
+            for name in self.downstream
+        }
+        best: Dict[str, float] = {}
+        previous: Dict[str, str] = {}
+        for name in self.topological_order():
+            parents = self.upstream[name]
+            heaviest_parent = max(parents, key=best.get) if parents else None
+            best[name] = cost[name] + (
+                best[heaviest_parent] if heaviest_parent is not None else 0
+            )
+            if heaviest_parent is not None:
+                previous[name] = heaviest_parent
+        if not best:
+            return [], 0.0
+        node = max(best, key=best.get)
+        path = [node]
+        while node in previous:
+            node = previous[node]
+            path.append(node)
+        return path[::-1], best[path[0]]
+
+    def task_timings(self, percentile: float = 50) -> List[TaskTiming]:
+        """Per-task latency and queueing percentiles, slowest tasks first."""
+        critical_tasks = set(self.critical_path(percentile)[0])
+        timings = [
+            TaskTiming(
+                name=name,
+                samples=len(self.latencies.get(name, [])),
+                latency_p50=_percentile(self.latencies.get(name, []), 50),
+                latency_p90=_percentile(self.latencies.get(name, []), 90),
+                latency_p99=_percentile(self.latencies.get(name, []), 99),
+                queueing_p50=_percentile(self.queueing_times.get(name, []), 50),
+                queueing_p90=_percentile(self.queueing_times.get(name, []), 90),
+                on_critical_path=name in critical_tasks,
+            )
+            for name in self.topological_order()
+        ]
+        return sorted(
+            timings, key=lambda t: t.latency_p50 + t.queueing_p50, reverse=True
+        )
@@ -53,13 +53,31 @@ if __name__ == "__main__":
         help="Max fetch size",
     )
 
+    parser.add_argument(
+        "--all",
+        type=str,
+        choices=BOOL_CHOICES,
+        default="False",
+        required=False,
+        help="If set to true, all pages of runs are fetched",
+    )
+
     args = parser.parse_args()
 
-    workflow_response = workflows.get_workflow_runs_for_document(
-        doc_id=args.doc_id,
-        state=args.state,
-        query=args.query,
-        skip=args.skip,
-        limit=args.limit,
-    )
-    pprint(workflow_response.model_dump())
+    if get_bool_value(args.all):
+        for document_run in workflows.iter_workflow_runs_for_document(
+            doc_id=args.doc_id,
+            state=args.state,
+            query=args.query,
+            page_size=args.limit,
+        ):
+            pprint(document_run.model_dump())
+    else:
+        workflow_response = workflows.get_workflow_runs_for_document(
+            doc_id=args.doc_id,
+            state=args.state,
+            query=args.query,
+            skip=args.skip,
+            limit=args.limit,
+        )
+        pprint(workflow_response.model_dump())
@@ -80,3 +80,27 @@ class DocumentRun(BaseModel):
 class DocumentWorkflowRunsResponse(BaseModel):
     docs: List[DocumentRun]
     total: int
+
+
+class BatchRunResult(BaseModel):
+    doc_id: str
+    response: Optional[RunWorkflowResponse] = None
+    error: Optional[str] = ""
+
+
+class CompletedRun(BaseModel):
+    workflow_id: str
+    run_id: str
+    status: WorkflowStatusResponse
+    polls: int
+
+
+class TaskTiming(BaseModel):
+    name: str
+    samples: int
+    latency_p50: float
+    latency_p90: float
+    latency_p99: float
+    queueing_p50: float
+    queueing_p90: float
+    on_critical_path: bool = False
@@ -0,0 +1,91 @@
+# python3 workflows/run_workflow_batch.py --workflow_name process_form_workflow --doc_ids_file doc_ids.txt --max_concurrency 16 --journal batch.db
+
+import sys
+import os
+import argparse
+import json
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from config_models import LoadConfigurations, ServiceType, get_bool_value, BOOL_CHOICES
+from service import WorkflowService
+from journal import JobJournal
+from pprint import pprint
+
+if __name__ == "__main__":
+    configs = LoadConfigurations().set_config(service=ServiceType.WORKFLOWS)
+    workflows = WorkflowService(configs=configs)
+    parser = argparse.ArgumentParser(description="Provide parameters for the script.")
+
+    parser.add_argument(
+        "--workflow_name",
+        type=str,
+        required=True,
+        help="Name of workflow",
+    )
+    parser.add_argument(
+        "--doc_ids_file",
+        type=str,
+        required=True,
+        help="File with one document ID per line",
+    )
+    parser.add_argument(
+        "--data",
+        type=str,
+        default=r"{}",
+        required=False,
+        help="Extra parameters for the workflow",
+    )
+    parser.add_argument(
+        "--max_concurrency",
+        type=int,
+        default=8,
+        required=False,
+        help="Number of runs submitted in parallel",
+    )
+    parser.add_argument(
+        "--journal",
+        type=str,
+        default=None,
+        required=False,
+        help="SQLite journal; rerunning with it skips documents already submitted",
+    )
+    parser.add_argument(
+        "--wait",
+        type=str,
+        choices=BOOL_CHOICES,
+        default="false",
+        required=False,
+        help="Set to true to wait until every run finishes",
+    )
+
+    args = parser.parse_args()
+    try:
+        data = json.loads(args.data)
+    except json.JSONDecodeError:
+        raise Exception("Invalid data in --data")
+
+    with open(args.doc_ids_file) as f:
+        doc_ids = [line.strip() for line in f if line.strip()]
+
+    journal = None
+    if args.journal:
+        journal = JobJournal(args.journal, job=f"run_workflow:{args.workflow_name}")
+
+    batch = workflows.run_workflow_batch(
+        workflow_name=args.workflow_name,
+        doc_ids=doc_ids,
+        data=data,
+        max_concurrency=args.max_concurrency,
+        journal=journal,
+    )
+    for result in batch.results():
+        if result.response is not None:
+            print(f"{result.doc_id}: {result.response.run_id}")
+        else:
+            print(f"{result.doc_id}: failed - {result.error}")
+    pprint(batch.summary())
+
+    if get_bool_value(args.wait):
+        for completed_run in batch.wait_for_runs():
+            print(f"{completed_run.run_id}: {completed_run.status.status}")
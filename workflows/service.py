@@ -9,22 +9,33 @@ from workflows.models import (
     WorkflowRequest,
     WorkflowStatusResponse,
     DocumentWorkflowRunsResponse,
+    DocumentRun,
+    CompletedRun,
 )
+from workflows.batch import WorkflowBatch
 from workflows.exceptions import WorkflowException
+from http_client import create_session, decode_response
+from journal import JobJournal
+from workflows.tracker import WorkflowRunTracker
+from concurrency import imap_ordered
 import requests
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 
 class WorkflowService:
-    def __init__(self, configs: ConfigModel):
+    def __init__(
+        self, configs: ConfigModel, session: Optional[requests.Session] = None
+    ):
         self.configs = configs
         self.endpoints = ServiceEndpoints()
+        self.session = session or create_session()
 
     def get_all_workflows(
         self, show_internal_steps: bool = False
     ) -> GetAllWorkflowsResponse:
         url = f"{self.configs.base_url}/{self.endpoints.GET_ALL_WORKFLOWS}"
-        response = requests.get(
+        response = self.session.get(
             url=url,
             params=[("show_internal_steps", show_internal_steps)],
             headers={"Authorization": f"Bearer {self.configs.auth_token}"},
@@ -41,13 +52,17 @@ class WorkflowService:
                 message="Failed to get workflows",
                 response_data=response.json(),
             )
-        return GetAllWorkflowsResponse(workflows=response.json())
+        return decode_response(
+            response,
+            GetAllWorkflowsResponse,
+            prepare=lambda workflows: {"workflows": workflows},
+        )
 
     def get_single_workflow(
         self, workflow_name: str, show_internal_steps: bool
     ) -> Workflow:
         url = f"{self.configs.base_url}/{self.endpoints.GET_SINGLE_WORKFLOW.format(WORKFLOW_NAME=workflow_name)}"
-        response = requests.get(
+        response = self.session.get(
             url=url,
             params=[("show_internal_steps", show_internal_steps)],
             headers={"Authorization": f"Bearer {self.configs.auth_token}"},
@@ -65,13 +80,13 @@ class WorkflowService:
                 response_data=response.json(),
             )
 
-        return Workflow.model_validate(response.json())
+        return decode_response(response, Workflow)
 
     def skip_steps_in_workflow(
         self, workflow_name: str, data: SkipStepsInWorkflowRequest
     ) -> Workflow:
         url = f"{self.configs.base_url}/{self.endpoints.SKIP_TASK_IN_WORKFLOW.format(WORKFLOW_NAME=workflow_name)}"
-        response = requests.post(
+        response = self.session.post(
             url=url,
             json=data.tasks,
             headers={"Authorization": f"Bearer {self.configs.auth_token}"},
@@ -88,13 +103,13 @@ class WorkflowService:
                 message=f"Failed to skip steps in workflow {workflow_name}",
                 response_data=response.json(),
             )
-        return Workflow.model_validate(response.json())
+        return decode_response(response, Workflow)
 
     def rerun_workflow(
         self, workflow_name: str, data: WorkflowRequest
     ) -> RunWorkflowResponse:
         url = f"{self.configs.base_url}/{self.endpoints.RERUN_WORKFLOW.format(WORKFLOW_NAME=workflow_name)}"
-        response = requests.post(
+        response = self.session.post(
             url=url,
             json=data.model_dump(),
             headers={"Authorization": f"Bearer {self.configs.auth_token}"},
@@ -111,13 +126,13 @@ class WorkflowService:
                 message=f"Failed to re-run workflow {workflow_name}",
                 response_data=response.json(),
             )
-        return RunWorkflowResponse.model_validate(response.json())
+        return decode_response(response, RunWorkflowResponse)
 
     def run_workflow(
         self, workflow_name: str, data: WorkflowRequest
     ) -> RunWorkflowResponse:
         url = f"{self.configs.base_url}/{self.endpoints.RUN_WORKFLOW.format(WORKFLOW_NAME=workflow_name)}"
-        response = requests.post(
+        response = self.session.post(
             url=url,
             json=data.model_dump(),
             headers={"Authorization": f"Bearer {self.configs.auth_token}"},
@@ -134,7 +149,24 @@ class WorkflowService:
                 message=f"Failed to run workflow {workflow_name}",
                 response_data=response.json(),
             )
-        return RunWorkflowResponse.model_validate(response.json())
+        return decode_response(response, RunWorkflowResponse)
+
+    def run_workflow_batch(
+        self,
+        workflow_name: str,
+        doc_ids: List[str],
+        data: Optional[Any] = None,
+        max_concurrency: int = 8,
+        journal: Optional[JobJournal] = None,
+    ) -> WorkflowBatch:
+        return WorkflowBatch(
+            workflow_service=self,
+            workflow_name=workflow_name,
+            doc_ids=doc_ids,
+            data=data,
+            max_concurrency=max_concurrency,
+            journal=journal,
+        )
 
     def get_workflow_status(
         self,
@@ -143,7 +175,7 @@ class WorkflowService:
         show_internal_steps: Optional[bool] = False,
     ) -> WorkflowStatusResponse:
         url = f"{self.configs.base_url}/{self.endpoints.WORKFLOW_STATUS.format(WORKFLOW_ID=workflow_id,WORKFLOW_RUN_ID=workflow_run_id)}"
-        response = requests.get(
+        response = self.session.get(
             url=url,
             params=[("show_internal_steps", show_internal_steps)],
             headers={"Authorization": f"Bearer {self.configs.auth_token}"},
@@ -160,7 +192,24 @@ class WorkflowService:
                 message="Failed to get workflows",
                 response_data=response.json(),
             )
-        return WorkflowStatusResponse.model_validate(response.json())
+        return decode_response(response, WorkflowStatusResponse)
+
+    def wait_for_runs(
+        self,
+        runs: Iterable[Tuple[str, str]],
+        initial_interval: float = 5.0,
+        min_interval: float = 2.0,
+        max_interval: float = 60.0,
+        timeout: Optional[float] = None,
+    ) -> Iterator[CompletedRun]:
+        tracker = WorkflowRunTracker(
+            workflow_service=self,
+            initial_interval=initial_interval,
+            min_interval=min_interval,
+            max_interval=max_interval,
+            timeout=timeout,
+        )
+        return tracker.wait(runs)
 
     def get_workflow_runs_for_document(
         self,
@@ -181,7 +230,7 @@ class WorkflowService:
             (name, value) for name, value in params if value not in ("", None)
         ]
         url = f"{self.configs.base_url}/{self.endpoints.WORKFLOW_RUNS}"
-        response = requests.get(
+        response = self.session.get(
             url=url,
             params=filtered_params,
             headers={"Authorization": f"Bearer {self.configs.auth_token}"},
@@ -198,4 +247,63 @@ class WorkflowService:
                 message=f"Failed to get workflow runs for {doc_id}",
                 response_data=response.json(),
             )
-        return DocumentWorkflowRunsResponse.model_validate(response.json())
+        return decode_response(response, DocumentWorkflowRunsResponse)
+
+    def iter_workflow_runs_for_document(
+        self,
+        doc_id: str,
+        state: str = "",
+        query: str = "",
+        page_size: int = 25,
+        prefetch: int = 2,
+    ) -> Iterator[DocumentRun]:
+        """Yields every workflow run of a document, walking all pages.
+
+        The first page reports `total`, which is used to request up to
+        `prefetch` further pages in the background while earlier ones are
+        being consumed. Runs are yielded in server order.
+        """
+        first_page = self.get_workflow_runs_for_document(
+            doc_id=doc_id, state=state, query=query, skip=0, limit=page_size
+        )
+        yield from first_page.docs
+        if len(first_page.docs) < page_size:
+            return
+
+        skips = range(page_size, first_page.total, page_size)
+
+        def fetch_page(skip: int) -> DocumentWorkflowRunsResponse:
+            return self.get_workflow_runs_for_document(
+                doc_id=doc_id, state=state, query=query, skip=skip, limit=page_size
+            )
+
+        if prefetch < 1:
+            pages = map(fetch_page, skips)
+        else:
+            pages = imap_ordered(fetch_page, skips, max_workers=prefetch)
+        for page in pages:
+            yield from page.docs
+
+    def get_workflow_runs_for_documents(
+        self,
+        doc_ids: List[str],
+        state: str = "",
+        query: str = "",
+        page_size: int = 100,
+        max_concurrency: int = 8,
+    ) -> Dict[str, List[DocumentRun]]:
+        """Fetches the complete run list of many documents concurrently."""
+
+        def fetch_all(doc_id: str) -> List[DocumentRun]:
+            return list(
+                self.iter_workflow_runs_for_document(
+                    doc_id=doc_id,
+                    state=state,
+                    query=query,
+                    page_size=page_size,
+                    prefetch=0,
+                )
+            )
+
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            return dict(zip(doc_ids, executor.map(fetch_all, doc_ids)))
@@ -0,0 +1,127 @@
+import heapq
+import itertools
+import time
+from typing import Iterable, Iterator, Optional, Set, Tuple
+
+from workflows.exceptions import WorkflowException
+from workflows.models import CompletedRun, WorkflowStatusResponse
+
+TERMINAL_STATES = {"success", "failed"}
+
+
+class _TrackedRun:
+    def __init__(self, workflow_id: str, run_id: str, interval: float):
+        self.workflow_id = workflow_id
+        self.run_id = run_id
+        self.interval = interval
+        self.polls = 0
+        self.last_done: Optional[int] = None
+        self.last_poll_at: Optional[float] = None
+
+
+def _task_progress(status: WorkflowStatusResponse) -> Tuple[int, int]:
+    done = total = 0
+    for task in status.tasks or []:
+        summary = task.task_status_summary
+        finished = summary.success + summary.failed + summary.skipped
+        done += finished
+        total += finished + summary.running + summary.queued
+    return done, total
+
+
+class WorkflowRunTracker:
+    """Waits on many workflow runs from a single polling loop.
+
+    Every run has its own polling interval. After each poll the tracker
+    compares the finished task count from `TaskStatusSummary` with the previous
+    poll, estimates how long the run still needs and schedules the next poll
+    for roughly half of that. Runs that make no progress back off towards
+    `max_interval`, so idle or long-running runs cost few requests.
+    """
+
+    def __init__(
+        self,
+        workflow_service,
+        initial_interval: float = 5.0,
+        min_interval: float = 2.0,
+        max_interval: float = 60.0,
+        terminal_states: Optional[Set[str]] = None,
+        timeout: Optional[float] = None,
+    ):
+        if not 0 < min_interval <= initial_interval <= max_interval:
+            raise ValueError(
+                "Intervals must satisfy 0 < min_interval <= initial_interval <= max_interval"
+            )
+        self.workflow_service = workflow_service
+        self.initial_interval = initial_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.terminal_states = terminal_states or TERMINAL_STATES
+        self.timeout = timeout
+
+    def _clamp(self, interval: float) -> float:
+        return max(self.min_interval, min(self.max_interval, interval))
+
+    def _next_interval(
+        self, run: _TrackedRun, status: WorkflowStatusResponse, now: float
+    ) -> float:
+        done, total = _task_progress(status)
+        previous_done, previous_poll_at = run.last_done, run.last_poll_at
+        run.last_done, run.last_poll_at = done, now
+        if previous_done is None or previous_poll_at is None:
+            return run.interval
+        progressed = done - previous_done
+        if progressed <= 0:
+            return self._clamp(run.interval * 1.5)
+        rate = progressed / max(now - previous_poll_at, 1e-6)
+        remaining = max(total - done, 1)
+        return self._clamp(remaining / rate / 2)
+
+    def wait(self, runs: Iterable[Tuple[str, str]]) -> Iterator[CompletedRun]:
+        """Yields each `(workflow_id, run_id)` once it reaches a terminal state.
+
+        Raises:
+            TimeoutError: Raised if `timeout` seconds pass with runs still pending.
+            WorkflowException: Raised if authentication fails while polling.
+        """
+        started_at = time.monotonic()
+        counter = itertools.count()
+        schedule = []
+        for workflow_id, run_id in dict.fromkeys(runs):
+            run = _TrackedRun(workflow_id, run_id, self.initial_interval)
+            heapq.heappush(schedule, (started_at, next(counter), run))
+
+        while schedule:
+            due_at, _, run = heapq.heappop(schedule)
+            if self.timeout is not None and due_at - started_at > self.timeout:
+                raise TimeoutError(
+                    f"{len(schedule) + 1} workflow runs still pending after {self.timeout}s"
+                )
+            delay = due_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+            run.polls += 1
+            try:
+                status = self.workflow_service.get_workflow_status(
+                    workflow_id=run.workflow_id, workflow_run_id=run.run_id
+                )
+            except Exception as e:
+                if isinstance(e, WorkflowException) and e.status_code == 401:
+                    raise
+                # Any other error, e.g. a response that fails validation, only
+                # backs off this run; the other runs keep being polled.
+                run.interval = self._clamp(run.interval * 2)
+            else:
+                if status.status.lower() in self.terminal_states:
+                    yield CompletedRun(
+                        workflow_id=run.workflow_id,
+                        run_id=run.run_id,
+                        status=status,
+                        polls=run.polls,
+                    )
+                    continue
+                run.interval = self._next_interval(run, status, time.monotonic())
+            heapq.heappush(
+                schedule, (time.monotonic() + run.interval, next(counter), run)
+            )